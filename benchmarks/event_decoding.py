@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark decoding of API Gateway event bodies the way dancers usually
+do it, with :func:`json.loads` in every helper that needs the body,
+against an ``api_gateway`` event view from :mod:`lambada.events`.
+
+Run from the repository root with
+``PYTHONPATH=. python benchmarks/event_decoding.py [records] [reads]``, which
+needs no ``PYTHONPATH`` once lambada is installed with
+``pip install -e .``.
+"""
+from __future__ import print_function
+import json
+import sys
+import timeit
+
+from lambada.events import ApiGatewayEvent, JSON_BACKEND, loads
+
+
+def make_event(records):
+    """
+    Build an API Gateway proxy event with a body of many records.
+    """
+    body = dict(items=[
+        dict(
+            id=index,
+            name='item {}'.format(index),
+            price=index * 1.25,
+            tags=['lambada', 'dance', str(index % 7)],
+            active=index % 2 == 0,
+        )
+        for index in range(records)
+    ])
+    return dict(
+        httpMethod='POST',
+        path='/items',
+        headers={'Content-Type': 'application/json'},
+        body=json.dumps(body),
+    )
+
+
+def main(argv=None):
+    """
+    Time each way of reading the body and print the results.
+    """
+    argv = argv or sys.argv[1:]
+    records = int(argv[0]) if argv else 1000
+    reads = int(argv[1]) if len(argv) > 1 else 3
+    event = make_event(records)
+    number = 50
+
+    def stdlib_once():
+        """Decode the body once with the standard library."""
+        return json.loads(event['body'])
+
+    def backend_once():
+        """Decode the body once with the fastest backend."""
+        return loads(event['body'])
+
+    def stdlib_repeated():
+        """Decode the body in each helper, as dancers tend to."""
+        return [json.loads(event['body'])['items'] for _ in range(reads)]
+
+    def view_repeated():
+        """Read the body through a new view, decoding it once."""
+        view = ApiGatewayEvent(event)
+        return [view.body['items'] for _ in range(reads)]
+
+    print('{} byte body, {} reads per event, JSON backend {}'.format(
+        len(event['body']), reads, JSON_BACKEND
+    ))
+    for name, func in (
+            ('json.loads once', stdlib_once),
+            ('{} once'.format(JSON_BACKEND), backend_once),
+            ('json.loads per read', stdlib_repeated),
+            ('api_gateway view', view_repeated),
+    ):
+        best = min(timeit.repeat(func, number=number, repeat=5))
+        print('{:>24}: {:>8.3f} ms'.format(name, best / number * 1000))
+
+
+if __name__ == '__main__':
+    main()
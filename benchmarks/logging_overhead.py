@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark the logging overhead of dancer calls as events grow, with
+debug logging of the whole event the way dancers were logged before,
+the bounded previews from :mod:`lambada.logs`, and a
+:class:`lambada.logs.LogSink` writing a JSON line per invocation.
+
+Run from the repository root with
+``PYTHONPATH=. python benchmarks/logging_overhead.py [records]``, which
+needs no ``PYTHONPATH`` once lambada is installed with
+``pip install -e .``.
+"""
+from __future__ import print_function
+import logging
+import os
+import sys
+import timeit
+
+from lambada import Lambada
+from lambada.common import LambdaContext
+from lambada.logs import LogSink
+
+
+def make_event(records):
+    """
+    Build an SQS event with many records.
+    """
+    return dict(Records=[
+        dict(
+            messageId=str(index),
+            body='{"id": %d, "name": "item %d"}' % (index, index),
+            attributes=dict(ApproximateReceiveCount='1'),
+        )
+        for index in range(records)
+    ])
+
+
+def make_tune(metrics_sink=None):
+    """
+    Build a tune with a dancer that does nothing with its event.
+    """
+    tune = Lambada(metrics_sink=metrics_sink)
+
+    @tune.dancer
+    def noop(event, _):
+        """Ignore the event."""
+        return len(event)
+
+    return tune
+
+
+def time_calls(event, context, number=50):
+    """
+    Time a dancer call with each kind of logging.
+
+    Returns:
+        list: Tuples of the kind of logging and milliseconds per call.
+    """
+    lambada_log = logging.getLogger('lambada')
+    plain, sink = make_tune(), make_tune(LogSink())
+
+    def full_repr():
+        """Also log the whole event like the old debug logging did."""
+        lambada_log.debug(
+            'Calling %s with event: %r and context: %r', 'noop', event, context
+        )
+        return plain(event, context)
+
+    results = []
+    for name, level, func in (
+            ('no logging', logging.WARNING, lambda: plain(event, context)),
+            ('debug full repr', logging.DEBUG, full_repr),
+            ('debug preview', logging.DEBUG, lambda: plain(event, context)),
+            ('json log sink', logging.INFO, lambda: sink(event, context)),
+    ):
+        lambada_log.setLevel(level)
+        best = min(timeit.repeat(func, number=number, repeat=5))
+        results.append((name, best / number * 1000))
+    return results
+
+
+def main(argv=None):
+    """
+    Time a dancer call with each kind of logging and print the results.
+    """
+    argv = argv or sys.argv[1:]
+    records = int(argv[0]) if argv else 1000
+    event = make_event(records)
+    devnull = open(os.devnull, 'w')
+    handler = logging.StreamHandler(devnull)
+    root = logging.getLogger()
+    root.addHandler(handler)
+    try:
+        print('{} records, {} byte event'.format(records, len(repr(event))))
+        for name, milliseconds in time_calls(event, LambdaContext('noop')):
+            print('{:>16}: {:>8.3f} ms'.format(name, milliseconds))
+    finally:
+        root.removeHandler(handler)
+        devnull.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -4,12 +4,26 @@ Lambada package entry point
 """
 from __future__ import unicode_literals
 from functools import wraps
+from importlib import import_module
+import json
 import logging
 import os
+import signal
+from threading import Lock
+import time
+from timeit import default_timer
 
-from six import iteritems
+from six import iteritems, text_type
 import yaml
 
+from lambada.batch import process_batch
+
+try:
+    from time import process_time
+except ImportError:  # pragma: no cover
+    # CPU time on python 2 unixes
+    from time import clock as process_time
+
 __version__ = '0.2.1'
 log = logging.getLogger(__name__)
 
@@ -25,10 +39,23 @@ OPTIONAL_CONFIG = dict(
     vpc=None,
     subnets=None,
     security_groups=None,
+    # Lambda runtime of the functions, lambda_uploader's default if unset
+    runtime=None,
+    # Name of a Lambda layer with the requirements, see lambada.layer
+    layer=None,
+    # Stage suffixes of deployed function names, see lambada.routing
+    stages=[],
+    # Deploy with a handler importing only the called dancer's module
+    bootstrap=False,
 )
 
+# Use the much faster libyaml loader when PyYAML was built with it
+YAML_LOADER = getattr(yaml, 'CLoader', yaml.Loader)  # pylint: disable=C0103
+
 CONFIG_PATHS = [
-    os.path.join(os.getcwd(), '_lambada.yml'),  # "Private" bouncer config
+    # "Private" bouncer config, precompiled to JSON when packaging
+    os.path.join(os.getcwd(), '_lambada.json'),
+    os.path.join(os.getcwd(), '_lambada.yml'),
     os.environ.get('BOUNCER_CONFIG', ''),
     os.path.join(os.getcwd(), 'lambada.yml'),
     os.path.join(os.path.expanduser('~'), '.lambada.yml'),
@@ -60,7 +87,8 @@ def get_config_from_file(config_file=None):
 
     """
     Finds configuration file and returns the python object
-    in it or raises on parsing failures.
+    in it or raises on parsing failures.  Files ending in ``.json`` are
+    loaded as JSON and anything else as YAML.
 
     Args:
         config_file (str): Optional path to configuration file, runs
@@ -68,6 +96,7 @@ def get_config_from_file(config_file=None):
 
     Raises:
         yaml.YAMLError
+        ValueError: for invalid JSON.
 
     Returns:
         dict: empty if no configuration file was found, or the
@@ -82,7 +111,9 @@ def get_config_from_file(config_file=None):
         return {}
 
     with open(config_file) as config:
-        return yaml.load(config)
+        if config_file.endswith('.json'):
+            return json.load(config)
+        return yaml.load(config, Loader=YAML_LOADER)
 
 
 class Bouncer(object):
@@ -114,9 +145,13 @@ class Bouncer(object):
     variable in it, and ``BOUNCER_THING`` is set, the value of the
     environment variable will override the configuration file.
 
+    Use :meth:`get` to share one bouncer per configuration file and
+    prefix in a process instead of loading the configuration again.
+
     """
     # pylint: disable=too-few-public-methods
     _frozen = False
+    _instances = {}
 
     def __init__(self, config_file=None, env_prefix='BOUNCER_'):
         """
@@ -133,6 +168,24 @@ class Bouncer(object):
         self.__dict__ = config
         self._frozen = True
 
+    @classmethod
+    def get(cls, config_file=None, env_prefix='BOUNCER_'):
+        """
+        Get the bouncer for the given arguments, creating it the first
+        time it is asked for.
+
+        Args:
+            See :class:`Bouncer`.
+
+        Returns:
+            Bouncer: Shared instance for this process.
+        """
+        key = (config_file, env_prefix)
+        bouncer = cls._instances.get(key)
+        if bouncer is None:
+            bouncer = cls._instances[key] = cls(config_file, env_prefix)
+        return bouncer
+
     def __getattr__(self, name):
         """Return elements of the configuration as attributes."""
         return self.__dict__[name]
@@ -159,18 +212,195 @@ class Bouncer(object):
             default_flow_style=False
         )
 
+    def compile(self, stream):
+        """
+        Write out the current configuration to the given stream as JSON,
+        which loads much faster than YAML when the function starts.
+
+        Args:
+            stream: Text stream to write to.
+        """
+        stream.write(text_type(json.dumps(
+            {k: v for k, v in iteritems(self.__dict__) if k != '_frozen'},
+            default=str,
+            sort_keys=True
+        )))
+
+
+class BudgetExceeded(Exception):
+    """
+    Raised in a dancer that is still running when its :class:`Budget`
+    runs out.
+    """
+
+
+class Budget(object):
+    """
+    Soft deadline for a dancer some margin before the Lambda timeout,
+    so it can stop cleanly instead of being killed.
+
+    Used as a context manager it interrupts the code inside by raising
+    :class:`BudgetExceeded`, or calling ``on_budget`` instead if given,
+    when the deadline passes.  That relies on ``SIGALRM``, so it only
+    happens in the main thread on platforms that have it.  Work done
+    through :meth:`iterate` is never interrupted, it stops between
+    items instead.
+    """
+    def __init__(self, context, margin_ms=0, on_budget=None):
+        """
+        Args:
+            context: AWS Lambda context object, without a timeout the
+                budget never runs out.
+            margin_ms (int): Milliseconds before the timeout to stop.
+            on_budget (callable): Called with the budget when the
+                deadline passes instead of raising.
+        """
+        get_remaining = getattr(context, 'get_remaining_time_in_millis', None)
+        remaining = get_remaining() if get_remaining else None
+        self.deadline = None
+        if remaining is not None:
+            self.deadline = default_timer() + (remaining - margin_ms) / 1000.0
+        self.on_budget = on_budget
+        self.cooperative = False
+        self._previous_handler = None
+
+    def remaining_ms(self):
+        """
+        Milliseconds until the deadline, negative once it has passed,
+        or ``None`` if there is no deadline.
+        """
+        if self.deadline is None:
+            return None
+        return (self.deadline - default_timer()) * 1000
+
+    @property
+    def expired(self):
+        """
+        Whether the deadline has passed.
+        """
+        remaining = self.remaining_ms()
+        return remaining is not None and remaining <= 0
+
+    def check(self):
+        """
+        Checkpoint for long running work.
+
+        Raises:
+            BudgetExceeded: if the deadline has passed.
+        """
+        if self.expired:
+            raise BudgetExceeded('Ran out of budget')
+
+    def iterate(self, items, reserve_ms=0):
+        """
+        Iterate over work items until the budget runs out.
+
+        Args:
+            items (iterable): Work items.
+            reserve_ms (int): Stop once there are fewer milliseconds
+                than this left, i.e. the time one item takes.
+
+        Returns:
+            BudgetIterator: Iterator over the items that fits in the
+                budget, with the rest in its ``remainder``.
+        """
+        return BudgetIterator(self, items, reserve_ms)
+
+    def _on_deadline(self, *_):
+        """
+        Signal handler for when the deadline passes.
+        """
+        if self.cooperative:
+            return
+        if self.on_budget is not None:
+            self.on_budget(self)
+            return
+        raise BudgetExceeded('Ran out of budget')
+
+    def __enter__(self):
+        """
+        Start the timer for the deadline.
+        """
+        remaining = self.remaining_ms()
+        if remaining is None or not hasattr(signal, 'setitimer'):
+            return self
+        try:
+            self._previous_handler = signal.signal(
+                signal.SIGALRM, self._on_deadline
+            )
+        except ValueError:
+            log.debug('Budget is only enforced in the main thread')
+            return self
+        if remaining <= 0:
+            self.__exit__()
+            self._on_deadline()
+        else:
+            signal.setitimer(signal.ITIMER_REAL, remaining / 1000.0)
+        return self
+
+    def __exit__(self, *_):
+        """
+        Stop the timer and restore the previous signal handler.
+        """
+        if self._previous_handler is not None:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, self._previous_handler)
+            self._previous_handler = None
+
+
+class BudgetIterator(object):
+    """
+    Iterator from :meth:`Budget.iterate` that stops handing out items
+    once the budget runs out, leaving the unprocessed ones in
+    :attr:`remainder`.
+    """
+    def __init__(self, budget, items, reserve_ms=0):
+        """
+        Args:
+            See :meth:`Budget.iterate`.
+        """
+        self.budget = budget
+        self.reserve_ms = reserve_ms
+        self.remainder = []
+        self._items = iter(items)
+
+    def __iter__(self):
+        """Iterate over items while there is budget."""
+        return self
+
+    def __next__(self):
+        """
+        Get the next item, or stop and collect the rest of them if the
+        budget has run out.
+        """
+        self.budget.cooperative = True
+        item = next(self._items)
+        remaining = self.budget.remaining_ms()
+        if remaining is not None and remaining <= self.reserve_ms:
+            self.remainder = [item] + list(self._items)
+            log.debug(
+                'Ran out of budget with %s item(s) left', len(self.remainder)
+            )
+            raise StopIteration
+        return item
+
+    next = __next__  # Python 2
+
 
 class Dancer(object):
     """
     Simple function wrapping class to add context
     to the function (i.e. name, description, memory.)
     """
-    # pylint: disable=too-few-public-methods
+    # pylint: disable=too-few-public-methods,too-many-instance-attributes
     def __init__(
             self,
             function,
             name=None,
             description='',
+            budget_ms=None,
+            on_budget=None,
+            event_type=None,
             **kwargs
     ):
         """Creates a dancer object to let us know something has
@@ -180,14 +410,29 @@ class Dancer(object):
             function (callable): Function to wrap.
             name (str): Name of function.
             description (str): Description of function.
+            budget_ms (int): Enforce a :class:`Budget` ending this many
+                milliseconds before the Lambda timeout.
+            on_budget (callable): Called with the :class:`Budget`
+                instead of raising :class:`BudgetExceeded`.
+            event_type (str): Pass the event as a view from
+                :mod:`lambada.events` that decodes its payload once, see
+                :data:`lambada.events.EVENT_TYPES`.
             kwargs: See :data:`OPTIONAL_CONFIG` for options, if not
                 specified in dancer, the Lambada objects configuration is
                 used, and if that is unspecified, the defaults listed there
                 are used.
         """
+        # pylint: disable=too-many-arguments
         self.function = function
         self.name = name
         self.description = description
+        self.budget_ms = budget_ms
+        self.on_budget = on_budget
+        self.event_type = event_type
+        self.adapter = None
+        if event_type is not None:
+            from lambada.events import adapter
+            self.adapter = adapter(event_type)
         self.override_config = kwargs
 
     @property
@@ -204,9 +449,180 @@ class Dancer(object):
 
     def __call__(self, *args, **kwargs):
         """
-        Calls the function.
+        Calls the function, running it on the persistent event loop
+        from :mod:`lambada.aio` if it is a coroutine function.
         """
-        return self.function(*args, **kwargs)
+        if self.adapter is not None:
+            args = (self.adapter(args[0]),) + args[1:]
+        result = self.function(*args, **kwargs)
+        if hasattr(result, '__await__'):
+            from lambada.aio import run
+            result = run(result)
+        return result
+
+
+class LazyDancer(Dancer):
+    """
+    Dancer whose function lives in another module that is only imported
+    the first time the dancer is called, so that dancers with heavy
+    imports don't slow down the cold start of the others.
+    """
+    # pylint: disable=too-few-public-methods
+    def __init__(self, path, name=None, description='', **kwargs):
+        """
+        Args:
+            path (str): Dotted path to the function, i.e.
+                ``reports.monthly`` for the ``monthly`` function in the
+                ``reports`` module.
+            name (str): Name of function, defaults to the last part of
+                ``path``.
+            description (str): Description of function.
+            kwargs: See :class:`Dancer`.
+        """
+        module_name, _, attribute = path.rpartition('.')
+        if not module_name:
+            raise ValueError(
+                'Lazy dancer paths need a module and function: {}'.format(
+                    path
+                )
+            )
+        super(LazyDancer, self).__init__(
+            None, name or attribute, description, **kwargs
+        )
+        self.path = path
+
+    def load(self):
+        """
+        Import the module and return the function, unwrapping it if it
+        was itself decorated as a dancer.
+        """
+        if self.function is None:
+            module_name, _, attribute = self.path.rpartition('.')
+            log.debug('Importing %s for dancer %s', self.path, self.name)
+            function = getattr(import_module(module_name), attribute)
+            self.function = getattr(function, 'function', function)
+        return self.function
+
+    def __call__(self, *args, **kwargs):
+        """
+        Loads and calls the function.
+        """
+        return self.load()(*args, **kwargs)
+
+
+class Resource(object):
+    """
+    Expensive object, such as a database connection or client, that is
+    created the first time it is needed and then kept for every warm
+    invocation in the same container.  Calling the resource returns
+    the object, creating it again if it has outlived its ``ttl`` or
+    fails its ``check``.  Factories that are coroutine functions give a
+    future to ``await`` instead, on the persistent event loop that runs
+    coroutine dancers, see :mod:`lambada.aio`.
+    """
+    # pylint: disable=too-many-instance-attributes
+    def __init__(self, factory, name=None, ttl=None, check=None, close=None):
+        """
+        Args:
+            factory (callable): Function without arguments that creates
+                the object.
+            name (str): Name of the resource, defaults to the name of
+                the factory.
+            ttl (float): Seconds to keep the object before creating it
+                again, kept forever if ``None``.
+            check (callable): Called with the object on each use, which
+                is created again if it returns something false or
+                raises.
+            close (callable): Called with objects that are replaced.
+        """
+        # pylint: disable=too-many-arguments
+        self.factory = factory
+        self.name = name or factory.__name__
+        self.ttl = ttl
+        self.check = check
+        self.close = close
+        self.hits = 0
+        self.misses = 0
+        self.creation_time = 0.0
+        self._value = None
+        self._created = None
+        self._lock = Lock()
+
+    def _is_usable(self):
+        """
+        Whether the current object can be handed out again.
+        """
+        if self._created is None:
+            return False
+        if self.ttl is not None and \
+                default_timer() - self._created > self.ttl:
+            log.debug('Resource %s expired', self.name)
+            return False
+        if self.check is None:
+            return True
+        # Failing health checks just mean making a new one
+        # pylint: disable=broad-except
+        try:
+            healthy = self.check(self._value)
+        except Exception:
+            log.debug('Resource %s check raised', self.name, exc_info=True)
+            healthy = False
+        if not healthy:
+            log.debug('Resource %s failed its check', self.name)
+        return healthy
+
+    def reset(self):
+        """
+        Discard the current object so the next use creates a new one.
+        """
+        if self._created is not None and self.close is not None:
+            # pylint: disable=broad-except
+            try:
+                self.close(self._value)
+            except Exception:
+                log.warning(
+                    'Unable to close resource %s', self.name, exc_info=True
+                )
+        self._value = None
+        self._created = None
+
+    def __call__(self):
+        """
+        Get the object, creating it if needed.
+        """
+        with self._lock:
+            if self._is_usable():
+                self.hits += 1
+                return self._value
+            self.misses += 1
+            self.reset()
+            start = default_timer()
+            self._value = self.factory()
+            if hasattr(self._value, '__await__'):
+                # Async factories become futures on the dancers' loop
+                from lambada.aio import ensure_future
+                self._value = ensure_future(self._value)
+            self._created = default_timer()
+            self.creation_time += self._created - start
+            log.debug(
+                'Created resource %s in %.3f seconds',
+                self.name,
+                self._created - start
+            )
+            return self._value
+
+    @property
+    def stats(self):
+        """
+        Counters of how the resource has been used: ``hits``,
+        ``misses`` (each of which created the object), and the total
+        ``creation_time`` in seconds.
+        """
+        return dict(
+            hits=self.hits,
+            misses=self.misses,
+            creation_time=self.creation_time,
+        )
 
 
 class Lambada(object):
@@ -216,18 +632,41 @@ class Lambada(object):
     """
     # pylint: disable=too-few-public-methods
 
-    def __init__(self, handler='lambda.tune', bouncer=Bouncer(), **kwargs):
+    def __init__(
+            self,
+            handler='lambda.tune',
+            bouncer=None,
+            metrics_sink=None,
+            **kwargs
+    ):
         """
         Setup the data structure of dancers and do some auto configuration
         for us with deploying to AWS using :mod:`lambda_uploader`. See
-        :data:`OPTIONAL_CONFIG` for arguments and defaults.
+        :data:`OPTIONAL_CONFIG` for arguments and defaults.  Without a
+        ``bouncer`` the shared one from :meth:`Bouncer.get` is loaded
+        the first time :attr:`bouncer` is used.  Every dancer call is
+        measured and sent to ``metrics_sink`` if one is given, see
+        :mod:`lambada.metrics`.
         """
         self.config = dict(handler=handler)
-        self.bouncer = bouncer
+        self._bouncer = bouncer
+        self.metrics_sink = metrics_sink
+        self.budget = None
+        self._cold = True
         for key, default in iteritems(OPTIONAL_CONFIG):
             self.config[key] = kwargs.get(key, default)
         log.debug('Base lambada configuration is: %r', self.config)
         self.dancers = {}
+        self.resources = {}
+
+    @property
+    def bouncer(self):
+        """
+        The :class:`Bouncer` configuration of this tune.
+        """
+        if self._bouncer is None:
+            self._bouncer = Bouncer.get()
+        return self._bouncer
 
     def __call__(self, event, context):
         """
@@ -238,14 +677,121 @@ class Lambada(object):
             context: AWS Lambda context object passed in.
         """
         dancer = context.function_name
+        if dancer not in self.dancers:
+            # Deployed names may carry a stage suffix or qualifier
+            from lambada.routing import normalize_function_name
+            dancer = normalize_function_name(dancer, self.config['stages'])
         try:
-            return self.dancers[dancer](event, context)
+            dancer_obj = self.dancers[dancer]
         except KeyError:
             raise Exception(
                 'No matching dancer for the Lambda function: {}'.format(
-                    dancer
+                    context.function_name
                 )
             )
+        if isinstance(dancer_obj, LazyDancer):
+            # Import on first call and keep the loaded dancer around
+            dancer_obj = self.dancers[dancer] = Dancer(
+                self._wrap(dancer_obj.load(), dancer),
+                dancer,
+                dancer_obj.description,
+                dancer_obj.budget_ms,
+                dancer_obj.on_budget,
+                dancer_obj.event_type,
+                **dancer_obj.override_config
+            )
+        cold, self._cold = self._cold, False
+        if self.metrics_sink is None:
+            return self._dance(dancer_obj, event, context)
+        return self._measure(dancer_obj, event, context, cold)
+
+    def _dance(self, dancer_obj, event, context):
+        """
+        Call a dancer, within its :class:`Budget` if it has one.  The
+        budget is available as :attr:`budget` during the call.
+        """
+        if dancer_obj.budget_ms is None:
+            return dancer_obj(event, context)
+        self.budget = Budget(
+            context, dancer_obj.budget_ms, dancer_obj.on_budget
+        )
+        try:
+            with self.budget:
+                return dancer_obj(event, context)
+        finally:
+            self.budget = None
+
+    def _measure(self, dancer_obj, event, context, cold):
+        """
+        Call a dancer and send its invocation metrics to
+        :attr:`metrics_sink`.
+
+        Args:
+            dancer_obj (Dancer): Dancer to call.
+            event: Amazon event passed in
+            context: AWS Lambda context object passed in.
+            cold (bool): Whether this is the first call in the container.
+        """
+        remaining = getattr(context, 'get_remaining_time_in_millis', None)
+        invocation = dict(
+            # Resolved name, so every stage reports the same dancer
+            dancer=dancer_obj.name,
+            request_id=getattr(context, 'aws_request_id', None),
+            cold_start=cold,
+            remaining_ms=remaining() if remaining else None,
+            error=True,
+            timestamp=int(round(time.time() * 1000)),
+        )
+        if getattr(self.metrics_sink, 'include_event', False):
+            invocation['event'] = event
+        start, cpu_start = default_timer(), process_time()
+        try:
+            result = self._dance(dancer_obj, event, context)
+            invocation['error'] = False
+            return result
+        finally:
+            invocation['duration_ms'] = (default_timer() - start) * 1000
+            invocation['cpu_ms'] = (process_time() - cpu_start) * 1000
+            # Metrics must never break the dancer
+            # pylint: disable=broad-except
+            try:
+                self.metrics_sink.emit(invocation)
+            except Exception:
+                log.warning('Unable to emit metrics', exc_info=True)
+
+    @staticmethod
+    def _wrap(func, name):
+        """
+        Wrap a dancer function with what needs to happen on every call.
+
+        Args:
+            func (callable): Function to wrap.
+            name (str): Name of the dancer.
+
+        Returns:
+            callable: Wrapped function.
+        """
+        @wraps(func)
+        def _decorator(*args, **kwargs):
+            """
+            Inner decorator that gets called when the dancer executes.
+            """
+            if log.isEnabledFor(logging.DEBUG):
+                # Kept out of cold starts that don't log at this level
+                from lambada.logs import preview
+                # Events can be huge, so only log bounded previews
+                log.debug(
+                    'Calling %s with arguments: %s',
+                    name,
+                    ', '.join(
+                        [preview(arg) for arg in args] + [
+                            '{}={}'.format(key, preview(value))
+                            for key, value in sorted(iteritems(kwargs))
+                        ]
+                    )
+                )
+            return func(*args, **kwargs)
+        return _decorator
 
     def dancer(
             self,
@@ -263,7 +809,8 @@ class Lambada(object):
             description (str): Description field in AWS of the function.
             kwargs: Key/Value overrides of either defaults or Lambada class
                 configuration values. See :data:`OPTIONAL_CONFIG` for
-                available options.
+                available options, and :class:`Dancer` for ``budget_ms``
+                and ``on_budget``.
         Returns:
             Dancer: Object with configuration and callable that is the function
                 being wrapped
@@ -281,18 +828,6 @@ class Lambada(object):
             Returns:
                 Function wrapped with arguments
             """
-            @wraps(func)
-            def _decorator(*args, **kwargs):
-                """
-                Inner decorator that gets called when the dancer executes.
-                """
-                log.debug(
-                    'Calling %s with event: %r and context: %r',
-                    real_name,
-                    *args
-                )
-                return func(*args, **kwargs)
-
             # Add decorated function to registry
             if (not name) or callable(name):
                 real_name = func.__name__
@@ -300,7 +835,7 @@ class Lambada(object):
                 real_name = name
 
             self.dancers[real_name] = Dancer(
-                _decorator, real_name, description, **kwargs
+                self._wrap(func, real_name), real_name, description, **kwargs
             )
 
             return self.dancers[real_name]
@@ -310,3 +845,155 @@ class Lambada(object):
         if callable(name):
             return _dancer(name)
         return _dancer
+
+    def lazy_dancer(
+            self,
+            path,
+            name=None,
+            description='',
+            **kwargs
+    ):
+        """
+        Adds a dancer by the dotted path to its function without importing
+        it.  The module is imported the first time the dancer is called,
+        and the loaded dancer replaces the lazy one in :attr:`dancers`.
+
+        Args:
+            path (str): Dotted path to the function such as
+                ``reports.monthly``.
+            name (str): Optional lambda function name (default uses the
+                last part of the path).
+            description (str): Description field in AWS of the function.
+            kwargs: Key/Value overrides of either defaults or Lambada class
+                configuration values. See :data:`OPTIONAL_CONFIG` for
+                available options, and :class:`Dancer` for ``budget_ms``
+                and ``on_budget``.
+        Returns:
+            LazyDancer: Object with configuration that imports the function
+                when called.
+        """
+        dancer = LazyDancer(path, name, description, **kwargs)
+        self.dancers[dancer.name] = dancer
+        return dancer
+
+    def batch_dancer(self, name=None, description='', workers=1, **kwargs):
+        """
+        Wrapper like :meth:`dancer` for functions handling one record of
+        an SQS, Kinesis, or DynamoDB stream event at a time.  The dancer
+        calls the function with every record in ``event['Records']`` and
+        returns the identifiers of the records that raised as
+        ``batchItemFailures``, so only those are retried.  This requires
+        ``ReportBatchItemFailures`` on the event source mapping.
+
+        Args:
+            name (str): Optional lambda function name (default uses the
+                name of the function decorated).
+            description (str): Description field in AWS of the function.
+            workers (int): Number of threads processing records at the
+                same time, kept between calls.  Records for ``async def``
+                functions are all awaited at once instead.
+            kwargs: See :meth:`dancer`.  With a ``budget_ms``, records
+                not started before the budget runs out are reported as
+                failed, and an ``event_type`` gives the function a view
+                of each record rather than of the whole event.
+
+        Returns:
+            Dancer: Object with configuration and callable that handles
+                the whole event.
+        """
+        record_view = None
+        if kwargs.get('event_type') is not None:
+            from lambada.events import adapter
+            record_view = adapter(kwargs.pop('event_type'), record=True)
+
+        def _batch_dancer(func):
+            """
+            Inner decorator that wraps the record function in a handler
+            of the whole event and adds it as a dancer.
+            """
+            pools = []
+
+            @wraps(func)
+            def handler(event, context):
+                """
+                Process the records of the event.
+                """
+                if workers > 1 and not pools:
+                    # Only pay for the import when it is needed
+                    from multiprocessing.pool import ThreadPool
+                    pools.append(ThreadPool(workers))
+                if self.budget is not None:
+                    self.budget.cooperative = True
+                records = event.get('Records', [])
+                if record_view is not None:
+                    records = [record_view(record) for record in records]
+                failures = process_batch(
+                    func,
+                    records,
+                    context,
+                    pools[0] if pools else None,
+                    self.budget
+                )
+                return dict(batchItemFailures=[
+                    dict(itemIdentifier=identifier)
+                    for identifier in failures
+                ])
+
+            real_name = func.__name__ if not name or callable(name) else name
+            return self.dancer(real_name, description, **kwargs)(handler)
+
+        if callable(name):
+            return _batch_dancer(name)
+        return _batch_dancer
+
+    def resource(self, name=None, ttl=None, check=None, close=None):
+        """
+        Wrapper that registers a function creating an expensive object
+        as a :class:`Resource` shared by all dancers of this tune.
+
+        Args:
+            name (str): Optional resource name (default uses the name of
+                the function decorated).
+            ttl (float): Seconds before the object is created again.
+            check (callable): Health check called with the object on
+                each use.
+            close (callable): Called with objects that are replaced.
+
+        Returns:
+            Resource: Callable that returns the created object.
+        """
+        def _resource(func):
+            """
+            Inner decorator that adds the function to the resources.
+            """
+            real_name = func.__name__ if not name or callable(name) else name
+            self.resources[real_name] = Resource(
+                func, real_name, ttl, check, close
+            )
+            return self.resources[real_name]
+
+        if callable(name):
+            return _resource(name)
+        return _resource
+
+    def get_resource(self, name):
+        """
+        Get the object of a registered resource, for dancers that don't
+        have the :class:`Resource` itself at hand.
+
+        Args:
+            name (str): Name of the resource.
+
+        Raises:
+            KeyError: if no resource has the name.
+        """
+        return self.resources[name]()
+
+    def resource_stats(self):
+        """
+        Get the :attr:`Resource.stats` of every resource by name.
+        """
+        return {
+            name: resource.stats
+            for name, resource in iteritems(self.resources)
+        }
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+Persistent :mod:`asyncio` event loops for coroutine dancers.  Each
+thread gets one loop that is kept for every later call, so that
+sessions and connections created on it survive between warm
+invocations.  This is only imported once a dancer returns something
+awaitable, keeping :mod:`asyncio` out of the cold start of everything
+else.
+"""
+import asyncio
+import threading
+
+_local = threading.local()  # pylint: disable=invalid-name
+
+
+def get_loop():
+    """
+    Get the event loop of the current thread, creating it the first
+    time or if it was closed.
+
+    Returns:
+        asyncio.AbstractEventLoop: Loop that is reused between calls.
+    """
+    loop = getattr(_local, 'loop', None)
+    if loop is None or loop.is_closed():
+        loop = _local.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+    return loop
+
+
+def ensure_future(awaitable):
+    """
+    Schedule an awaitable on the loop of the current thread.
+
+    Returns:
+        asyncio.Future: Future that can be awaited any number of times.
+    """
+    return asyncio.ensure_future(awaitable, loop=get_loop())
+
+
+def run(awaitable):
+    """
+    Run an awaitable to completion on the loop of the current thread.
+    If it is interrupted, such as by :class:`lambada.BudgetExceeded`,
+    the task is cancelled so it doesn't resume in the next call.
+
+    Returns:
+        The result of the awaitable.
+    """
+    loop = get_loop()
+    task = ensure_future(awaitable)
+    try:
+        return loop.run_until_complete(task)
+    except BaseException:
+        task.cancel()
+        raise
+
+
+def gather(awaitables):
+    """
+    Run awaitables concurrently on the loop of the current thread.
+
+    Returns:
+        list: Result of each awaitable, or the exception it raised.
+    """
+    # Schedule them first so gather uses this thread's loop
+    futures = [ensure_future(awaitable) for awaitable in awaitables]
+    return run(asyncio.gather(*futures, return_exceptions=True))
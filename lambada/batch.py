@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+Processing of batched SQS, Kinesis, and DynamoDB stream records for
+:meth:`lambada.Lambada.batch_dancer`.
+"""
+import logging
+
+log = logging.getLogger(__name__)
+
+# Code flag of ``async def`` functions, see :data:`inspect.CO_COROUTINE`
+CO_COROUTINE = 0x80
+
+
+def is_coroutine_function(func):
+    """
+    Whether the function is an ``async def`` function, checked without
+    importing :mod:`asyncio` or :mod:`inspect`.
+    """
+    code = getattr(func, '__code__', None)
+    return bool(getattr(code, 'co_flags', 0) & CO_COROUTINE)
+
+
+def record_identifier(record):
+    """
+    Identifier AWS expects in ``batchItemFailures`` for a record of an
+    SQS, Kinesis, or DynamoDB stream event.
+
+    Args:
+        record (dict): One of the ``Records`` of the event.
+
+    Returns:
+        str: Message ID or sequence number, ``None`` if there is neither.
+    """
+    if 'messageId' in record:
+        return record['messageId']
+    for source, key in (('kinesis', 'sequenceNumber'),
+                        ('dynamodb', 'SequenceNumber')):
+        if key in record.get(source, {}):
+            return record[source][key]
+    return None
+
+
+def process_batch(func, records, context, pool=None, budget=None):
+    """
+    Call a function with each record of a batch, collecting the records
+    that failed instead of stopping at the first one.  Records for an
+    ``async def`` function are all processed concurrently on the event
+    loop from :mod:`lambada.aio` instead.
+
+    Args:
+        func (callable): Function called with a record and the context.
+        records (list): Records of the event.
+        context: AWS Lambda context object passed in.
+        pool (multiprocessing.pool.ThreadPool): Pool to process the
+            records concurrently with, one at a time if ``None``.
+        budget (lambada.Budget): Records not started before this runs
+            out are counted as failed so they are retried.
+
+    Raises:
+        Exception: if a record without an identifier failed, which fails
+            the whole batch.
+
+    Returns:
+        list: Identifiers of the failed records in the order given.
+    """
+    # pylint: disable=too-many-arguments
+
+    def process(record):
+        """Process one record and report whether it succeeded."""
+        if budget is not None and budget.expired:
+            return False
+        # Failed records are retried by AWS, so keep going
+        # pylint: disable=broad-except
+        try:
+            func(record, context)
+        except Exception:
+            log.warning(
+                'Record %s failed', record_identifier(record), exc_info=True
+            )
+            return False
+        return True
+
+    if is_coroutine_function(func):
+        results = process_async(func, records, context, budget)
+    elif pool is None:
+        results = [process(record) for record in records]
+    else:
+        results = pool.map(process, records)
+    failures = []
+    for record, succeeded in zip(records, results):
+        if succeeded:
+            continue
+        identifier = record_identifier(record)
+        if identifier is None:
+            raise Exception('A record without an identifier failed')
+        failures.append(identifier)
+    return failures
+
+
+def process_async(func, records, context, budget=None):
+    """
+    Await a coroutine function for every record at the same time.
+
+    Args:
+        See :func:`process_batch`.
+
+    Returns:
+        list: Whether each record succeeded.
+    """
+    if budget is not None and budget.expired:
+        return [False] * len(records)
+    from lambada.aio import gather
+    results = []
+    for record, outcome in zip(
+            records, gather([func(record, context) for record in records])
+    ):
+        failed = isinstance(outcome, BaseException)
+        if failed:
+            log.warning(
+                'Record %s failed',
+                record_identifier(record),
+                exc_info=(type(outcome), outcome, outcome.__traceback__)
+            )
+        results.append(not failed)
+    return results
@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+"""
+Local benchmarking of dancers by replaying recorded events through
+:meth:`lambada.Lambada.__call__` in process.
+"""
+from __future__ import division
+import io
+import json
+import logging
+import os
+import sys
+from timeit import default_timer
+
+from lambada.common import LambdaContext
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
+try:
+    import tracemalloc
+except ImportError:  # pragma: no cover
+    tracemalloc = None
+
+log = logging.getLogger(__name__)
+
+# Benchmark values where bigger is worse, and how to describe them
+COMPARED_VALUES = (
+    (('latency_ms', 'p50'), 'p50 latency'),
+    (('latency_ms', 'p95'), 'p95 latency'),
+    (('latency_ms', 'p99'), 'p99 latency'),
+    (('memory', 'peak_allocated_bytes'), 'peak allocations'),
+    (('memory', 'peak_rss_bytes'), 'peak RSS'),
+)
+
+
+def load_events(path):
+    """
+    Load newline delimited JSON events.
+
+    Args:
+        path (str): Path to a file with one JSON event per line.
+
+    Returns:
+        list: Decoded events, skipping blank lines.
+    """
+    with io.open(path, encoding='UTF-8') as stream:
+        return [json.loads(line) for line in stream if line.strip()]
+
+
+def percentile(values, percent):
+    """
+    Linearly interpolated percentile of the given values.
+
+    Args:
+        values (list): Numbers to get the percentile of.
+        percent (float): Percentile between 0 and 100.
+
+    Returns:
+        float: The percentile, or ``None`` if there are no values.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * percent / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def peak_rss():
+    """
+    Peak resident set size of this process in bytes, or ``None`` where
+    it isn't available.
+    """
+    if resource is None:  # pragma: no cover
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes while macOS reports bytes
+    return usage if sys.platform == 'darwin' else usage * 1024
+
+
+class QuietOutput(object):
+    """
+    Context manager that discards anything written to stdout, so that
+    dancers printing their events don't flood the benchmark output.
+    """
+    def __init__(self):
+        """Nothing redirected yet."""
+        self._stdout = None
+        self._devnull = None
+
+    def __enter__(self):
+        """Redirect stdout to the null device."""
+        self._stdout = sys.stdout
+        self._devnull = open(os.devnull, 'w')
+        sys.stdout = self._devnull
+        return self
+
+    def __exit__(self, *_):
+        """Restore stdout."""
+        sys.stdout = self._stdout
+        self._devnull.close()
+
+
+def invoke(tune, dancer, event):
+    """
+    Call a dancer through the tune with a fresh simulated context.
+
+    Returns:
+        bool: ``True`` if the dancer returned without raising.
+    """
+    # Errors are counted rather than stopping the benchmark
+    # pylint: disable=broad-except
+    try:
+        tune(event, LambdaContext(function_name=dancer))
+    except Exception:
+        log.debug('Benchmarked dancer %s raised', dancer, exc_info=True)
+        return False
+    return True
+
+
+def trace_call(tune, dancer, event):
+    """
+    Call a dancer while tracing memory allocations.
+
+    Returns:
+        int: Peak bytes allocated during the call, or ``None`` when
+            :mod:`tracemalloc` isn't available.
+    """
+    if tracemalloc is None:
+        invoke(tune, dancer, event)
+        return None
+    tracemalloc.start()
+    try:
+        invoke(tune, dancer, event)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def summarize(values):
+    """
+    Summary statistics of the given values.
+
+    Returns:
+        dict: ``min``, ``mean``, ``p50``, ``p95``, ``p99``, and ``max``.
+    """
+    if not values:
+        return dict.fromkeys(('min', 'mean', 'p50', 'p95', 'p99', 'max'))
+    return dict(
+        min=min(values),
+        mean=sum(values) / len(values),
+        p50=percentile(values, 50),
+        p95=percentile(values, 95),
+        p99=percentile(values, 99),
+        max=max(values),
+    )
+
+
+def benchmark(tune, dancer, events, iterations=100, warmup=10):
+    """
+    Replay events through a dancer and measure it.  Latency is timed
+    without memory tracing, and allocations are then traced for one
+    call per event so tracing doesn't skew the latency.
+
+    Args:
+        tune (Lambada): Lambada object with the dancer.
+        dancer (str): Name of the dancer to benchmark.
+        events (list): Events to replay, cycled through as needed.
+        iterations (int): Number of timed calls.
+        warmup (int): Number of untimed calls before timing.
+
+    Returns:
+        dict: Benchmark results with ``latency_ms``,
+            ``throughput_per_second``, ``errors``, and ``memory``.
+    """
+    events = events or [None]
+    latencies = []
+    errors = 0
+    with QuietOutput():
+        for index in range(warmup):
+            invoke(tune, dancer, events[index % len(events)])
+        total_start = default_timer()
+        for index in range(iterations):
+            start = default_timer()
+            if not invoke(tune, dancer, events[index % len(events)]):
+                errors += 1
+            latencies.append((default_timer() - start) * 1000)
+        total = default_timer() - total_start
+        allocations = [
+            trace_call(tune, dancer, event)
+            for event in events[:max(1, min(iterations, len(events)))]
+        ]
+    allocations = [value for value in allocations if value is not None]
+    return dict(
+        dancer=dancer,
+        events=len(events),
+        iterations=iterations,
+        warmup=warmup,
+        errors=errors,
+        latency_ms=summarize(latencies),
+        throughput_per_second=iterations / total if total else None,
+        memory=dict(
+            peak_rss_bytes=peak_rss(),
+            peak_allocated_bytes=max(allocations) if allocations else None,
+            mean_allocated_bytes=(
+                sum(allocations) / len(allocations) if allocations else None
+            ),
+        ),
+    )
+
+
+def compare(result, baseline, threshold=10):
+    """
+    Compare benchmark results with a baseline.
+
+    Args:
+        result (dict): Results from :func:`benchmark`.
+        baseline (dict): Earlier results to compare with.
+        threshold (float): Percentage increase allowed before a value
+            counts as a regression.
+
+    Returns:
+        list: Descriptions of each regression found.
+    """
+    regressions = []
+    for (section, key), description in COMPARED_VALUES:
+        current = result.get(section, {}).get(key)
+        previous = baseline.get(section, {}).get(key)
+        if current is None or not previous:
+            continue
+        change = (current - previous) / previous * 100
+        if change > threshold:
+            regressions.append(
+                '{} went from {:.2f} to {:.2f} (+{:.1f}%)'.format(
+                    description, previous, current, change
+                )
+            )
+    return regressions
@@ -0,0 +1,832 @@
+# -*- coding: utf-8 -*-
+"""
+Helpers for building packages, such as hashing the inputs of a build,
+making the built zip files reproducible, caching them locally, and
+working out which requirements each dancer actually needs.
+"""
+import ast
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import shutil
+import struct
+import subprocess
+import sys
+import time
+import zipfile
+
+from lambda_uploader.package import TEMP_WORKSPACE_NAME
+from six import string_types, text_type
+
+from lambada import LazyDancer
+
+try:
+    from importlib import metadata
+except ImportError:  # pragma: no cover
+    metadata = None
+
+log = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.expanduser('~'), '.cache', 'lambada'
+)
+HASH_CHUNK_SIZE = 64 * 1024
+MANIFEST_SUFFIX = '.manifest.json'
+# Earliest timestamp a zip file can hold
+ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+# Timestamp pip is told to build with, so that python compiles files
+# checked by hash instead of by modification time (PEP 552)
+SOURCE_DATE_EPOCH = '315532800'
+# Magic number of the first python writing a flags word in .pyc files
+PEP_552_MAGIC = 3392
+REQUIREMENT_NAME_RE = re.compile(r'^\s*([A-Za-z0-9][A-Za-z0-9._-]*)')
+
+
+def _is_ignored(relative_path, ignore):
+    """
+    Mirror :mod:`lambda_uploader` ignore handling, which searches
+    each relative path for any of the given regular expressions.
+    """
+    return any(re.search(pattern, relative_path) for pattern in ignore)
+
+
+def iter_files(path, ignore=None):
+    """
+    List the files in the given directory in a stable order.
+
+    Args:
+        path (str): Directory to walk.
+        ignore (list): Regular expressions of relative paths to skip.
+
+    Returns:
+        list: ``(relative_path, absolute_path)`` tuples sorted by
+            relative path with ``/`` as the separator.
+    """
+    ignore = ignore or []
+    files = []
+    for root, _, filenames in os.walk(path):
+        for filename in filenames:
+            absolute_path = os.path.join(root, filename)
+            relative_path = os.path.relpath(absolute_path, path).replace(
+                os.sep, '/'
+            )
+            if not _is_ignored(relative_path, ignore):
+                files.append((relative_path, absolute_path))
+    return sorted(files)
+
+
+def hash_file(path, digest=None):
+    """
+    Hash the contents of a file.
+
+    Args:
+        path (str): File to hash.
+        digest: Optional :mod:`hashlib` object to update instead of
+            creating a new SHA-256 one.
+
+    Returns:
+        The updated :mod:`hashlib` object.
+    """
+    digest = digest or hashlib.sha256()
+    with io.open(path, 'rb') as stream:
+        for chunk in iter(lambda: stream.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest
+
+
+def hash_requirements(path, requirements):
+    """
+    Hash the requirements of a build the same way
+    :mod:`lambda_uploader` would resolve them.
+
+    Args:
+        path (str): Project directory, used to find the default
+            ``requirements.txt``.
+        requirements: Path to a requirements file, a list of
+            requirements, or ``None``.
+
+    Returns:
+        str: Hex digest of the requirements.
+    """
+    digest = hashlib.sha256()
+    if not requirements:
+        requirements = os.path.join(path, 'requirements.txt')
+    if isinstance(requirements, string_types):
+        if os.path.isfile(requirements):
+            hash_file(requirements, digest)
+        else:
+            digest.update(requirements.encode('UTF-8'))
+    else:
+        digest.update('\n'.join(requirements).encode('UTF-8'))
+    return digest.hexdigest()
+
+
+def hash_dependencies(path, requirements):
+    """
+    Create a key identifying the installed dependencies of a build,
+    which only change with the requirements and python version.
+
+    Args:
+        See :func:`hash_requirements`.
+
+    Returns:
+        str: Hex digest of the dependency inputs.
+    """
+    digest = hashlib.sha256()
+    digest.update('python {}.{}\0'.format(*sys.version_info[:2]).encode(
+        'UTF-8'
+    ))
+    digest.update(hash_requirements(path, requirements).encode('UTF-8'))
+    return digest.hexdigest()
+
+
+def has_requirements(path, requirements):
+    """
+    Check whether a build has any requirements to install, falling back
+    to the project ``requirements.txt`` like :mod:`lambda_uploader`.
+    """
+    if requirements:
+        return True
+    return os.path.isfile(os.path.join(path, 'requirements.txt'))
+
+
+def install_dependencies(path, requirements, venv_dir):
+    """
+    Create a virtualenv and install the requirements of a build into it,
+    the way :mod:`lambda_uploader` does in its workspace.
+
+    Args:
+        path (str): Project directory, used to find the default
+            ``requirements.txt``.
+        requirements: Path to a requirements file, a list of
+            requirements, or ``None``.
+        venv_dir (str): Directory to create the virtualenv in.
+
+    Raises:
+        subprocess.CalledProcessError: if virtualenv or pip fail.
+    """
+    if not requirements:
+        requirements = os.path.join(path, 'requirements.txt')
+    if isinstance(requirements, string_types):
+        arguments = ['-r', os.path.abspath(requirements)]
+    else:
+        arguments = list(requirements)
+    pip = os.path.join(venv_dir, 'bin', 'pip')
+    if sys.platform in ('win32', 'cygwin'):  # pragma: no cover
+        pip = os.path.join(venv_dir, 'Scripts', 'pip.exe')
+    # Compiled files then don't depend on when they were installed
+    env = os.environ.copy()
+    env.setdefault('SOURCE_DATE_EPOCH', SOURCE_DATE_EPOCH)
+    with open(os.devnull, 'w') as devnull:
+        subprocess.check_call(
+            ['virtualenv', '-p', sys.executable, venv_dir],
+            stdout=devnull
+        )
+        subprocess.check_call(
+            [pip, 'install'] + arguments, stdout=devnull, env=env
+        )
+
+
+def exclude_patterns(names):
+    """
+    Build regular expressions matching exactly the given relative
+    paths, in the form :mod:`lambda_uploader` takes files to ignore.
+    """
+    return [r'^{}$'.format(re.escape(name)) for name in names]
+
+
+def hash_package_inputs(
+        path,
+        requirements,
+        ignore_files=None,
+        extra_files=None,
+        exclude=None,
+        layer=None
+):
+    """
+    Create a key identifying everything that goes into a package.
+
+    Args:
+        path (str): Project directory being packaged, including the
+            exported bouncer configuration.
+        requirements: Requirements as passed to
+            :func:`lambda_uploader.package.build_package`.
+        ignore_files (list): Regular expressions of files to leave out.
+        extra_files (list): Extra files or directories to include.
+        exclude (list): Relative paths that should not affect the key,
+            such as the zip being built.
+        layer (str): Name of the layer providing the requirements
+            instead, in which case they are left out.
+
+    Returns:
+        str: Hex digest of the package inputs.
+    """
+    # pylint: disable=too-many-arguments
+    ignore_files = list(ignore_files or [])
+    extra_files = list(extra_files or [])
+    digest = hashlib.sha256()
+
+    def update(*parts):
+        """Add null separated parts to the digest."""
+        for part in parts:
+            digest.update(part.encode('UTF-8'))
+            digest.update(b'\0')
+
+    update('python', '{}.{}'.format(*sys.version_info[:2]))
+    if layer:
+        update('layer', layer)
+    else:
+        update('requirements', hash_requirements(path, requirements))
+    update('ignore', *ignore_files)
+    update('extra', *extra_files)
+
+    skip = ignore_files + [
+        r'^{}/'.format(re.escape(TEMP_WORKSPACE_NAME))
+    ] + exclude_patterns(exclude or [])
+    for relative_path, absolute_path in iter_files(path, skip):
+        update('source', relative_path)
+        hash_file(absolute_path, digest)
+    for extra in extra_files:
+        if os.path.isdir(extra):
+            files = iter_files(extra)
+        else:
+            files = [(os.path.basename(extra), extra)]
+        for relative_path, absolute_path in files:
+            update('extra_file', relative_path)
+            hash_file(absolute_path, digest)
+    return digest.hexdigest()
+
+
+def is_timestamp_pyc(name, data):
+    """
+    Check whether a zip entry is a compiled python file checked against
+    the modification time of its source.  Those record when they were
+    compiled, and also go stale once the source timestamps are
+    normalized, unlike the hash based files of :pep:`552`.
+
+    Args:
+        name (str): Path of the file in the zip.
+        data (bytes): Contents of the file.
+
+    Returns:
+        bool: ``True`` for ``.pyc`` files that aren't hash based.
+    """
+    if not name.endswith('.pyc'):
+        return False
+    if len(data) < 8:
+        return True
+    magic, _, flags = struct.unpack('<HHI', data[:8])
+    # Python 2 magic numbers are higher than those of python 3
+    return not (PEP_552_MAGIC <= magic < 20000 and flags & 1)
+
+
+def normalize_zip(zip_file):
+    """
+    Rewrite a zip file so that identical contents always produce
+    identical bytes.  Entries are sorted by name, timestamps are set to
+    :data:`ZIP_EPOCH`, permissions are reduced to ``0644`` or ``0755``,
+    and everything is deflated with the default compression level.
+    Compiled files that embed their compile time are left out, see
+    :func:`is_timestamp_pyc`.
+
+    Args:
+        zip_file (str): Path of the zip file to rewrite in place.
+    """
+    temp_path = '{}.{}.tmp'.format(zip_file, os.getpid())
+    with zipfile.ZipFile(zip_file) as source:
+        with zipfile.ZipFile(
+            temp_path, 'w', zipfile.ZIP_DEFLATED
+        ) as destination:
+            for info in sorted(source.infolist(), key=lambda i: i.filename):
+                if info.filename.endswith('/'):
+                    continue
+                data = source.read(info)
+                if is_timestamp_pyc(info.filename, data):
+                    continue
+                mode = 0o755 if (info.external_attr >> 16) & 0o111 else 0o644
+                normalized = zipfile.ZipInfo(info.filename, ZIP_EPOCH)
+                normalized.compress_type = zipfile.ZIP_DEFLATED
+                normalized.create_system = 3  # Always claim to be unix
+                normalized.external_attr = (0o100000 | mode) << 16
+                destination.writestr(normalized, data)
+    os.rename(temp_path, zip_file)
+
+
+def manifest_path(zip_file):
+    """Path of the manifest written next to the given zip file."""
+    return os.path.splitext(zip_file)[0] + MANIFEST_SUFFIX
+
+
+def write_manifest(zip_file):
+    """
+    Write a JSON manifest next to the zip file listing the SHA-256 and
+    size of every file in it, along with the hash of the zip itself.
+
+    Args:
+        zip_file (str): Path to the built zip file.
+
+    Returns:
+        str: Path to the manifest.
+    """
+    files = {}
+    with zipfile.ZipFile(zip_file) as package:
+        for info in package.infolist():
+            files[info.filename] = dict(
+                sha256=hashlib.sha256(package.read(info)).hexdigest(),
+                size=info.file_size,
+            )
+    manifest = dict(
+        sha256=hash_file(zip_file).hexdigest(),
+        files=files,
+    )
+    path = manifest_path(zip_file)
+    with io.open(path, 'w', encoding='UTF-8') as stream:
+        stream.write(
+            text_type(json.dumps(manifest, indent=2, sort_keys=True))
+        )
+    return path
+
+
+class BuildCache(object):
+    """
+    Content addressed cache of built package zip files, and of the
+    virtualenvs their dependencies were installed in, with entries
+    evicted by age and/or total cache size.
+    """
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_size=None,
+                 max_age=None):
+        """
+        Args:
+            cache_dir (str): Directory to store cached zip files in.
+            max_size (int): Maximum total size of the cache in bytes,
+                least recently used entries are evicted first.
+            max_age (int): Maximum age of an entry in seconds since it
+                was last used.
+        """
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.max_age = max_age
+
+    def path(self, key):
+        """Path to the cached zip file for the given key."""
+        return os.path.join(self.cache_dir, '{}.zip'.format(key))
+
+    def get(self, key, destination):
+        """
+        Copy the cached zip for key to destination if there is one.
+
+        Returns:
+            bool: ``True`` on a cache hit.
+        """
+        cached = self.path(key)
+        if not os.path.isfile(cached):
+            log.debug('Build cache miss for %s', key)
+            return False
+        log.debug('Build cache hit for %s', key)
+        shutil.copyfile(cached, destination)
+        # Mark the entry as recently used for eviction
+        os.utime(cached, None)
+        return True
+
+    def put(self, key, zip_file):
+        """
+        Store a copy of the zip file under key and evict old entries.
+        """
+        if not os.path.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        cached = self.path(key)
+        temp_path = '{}.{}.tmp'.format(cached, os.getpid())
+        shutil.copyfile(zip_file, temp_path)
+        # Rename so concurrent builds never see partial files
+        os.rename(temp_path, cached)
+        self.evict()
+
+    def dependencies_path(self, key):
+        """Path to the cached virtualenv for the given key."""
+        return os.path.join(self.cache_dir, 'dependencies', key)
+
+    def dependencies(self, key, install):
+        """
+        Get a virtualenv of installed dependencies, installing them the
+        first time they are asked for.
+
+        Args:
+            key (str): Key from :func:`hash_dependencies`.
+            install (callable): Called with a directory to install the
+                dependencies into on a cache miss.
+
+        Returns:
+            tuple: Path to the virtualenv and ``True`` if it was cached.
+        """
+        cached = self.dependencies_path(key)
+        if os.path.isdir(cached):
+            log.debug('Dependency cache hit for %s', key)
+            os.utime(cached, None)
+            return cached, True
+        log.debug('Dependency cache miss for %s', key)
+        temp_path = '{}.{}.tmp'.format(cached, os.getpid())
+        if os.path.isdir(temp_path):
+            shutil.rmtree(temp_path)
+        os.makedirs(temp_path)
+        try:
+            install(temp_path)
+            # Rename so concurrent builds never see partial installs
+            os.rename(temp_path, cached)
+        except OSError:
+            if not os.path.isdir(cached):
+                raise
+            log.debug('Dependencies for %s were installed meanwhile', key)
+        finally:
+            if os.path.isdir(temp_path):
+                shutil.rmtree(temp_path)
+        # The new virtualenv is about to be used, however big it is
+        self.evict(keep=[cached])
+        return cached, False
+
+    def entries(self):
+        """
+        List cached entries, both zip files and dependency virtualenvs.
+
+        Returns:
+            list: ``(last_used, size, path)`` tuples, oldest first.
+        """
+        entries = []
+        if os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith('.zip'):
+                    continue
+                path = os.path.join(self.cache_dir, name)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+        dependencies_dir = os.path.join(self.cache_dir, 'dependencies')
+        if os.path.isdir(dependencies_dir):
+            for name in os.listdir(dependencies_dir):
+                path = os.path.join(dependencies_dir, name)
+                if name.endswith('.tmp') or not os.path.isdir(path):
+                    continue
+                size = sum(
+                    os.path.getsize(absolute_path)
+                    for _, absolute_path in iter_files(path)
+                    if not os.path.islink(absolute_path)
+                )
+                entries.append((os.stat(path).st_mtime, size, path))
+        return sorted(entries)
+
+    def evict(self, keep=()):
+        """
+        Remove entries older than :attr:`max_age` and then the least
+        recently used entries until the cache fits in :attr:`max_size`.
+
+        Args:
+            keep (iterable): Paths of entries that are in use and must
+                not be removed, even if the cache stays too big.
+
+        Returns:
+            list: Paths of the removed entries.
+        """
+        removed = []
+        entries = [
+            entry for entry in self.entries() if entry[2] not in keep
+        ]
+        if self.max_age is not None:
+            cutoff = time.time() - self.max_age
+            removed.extend(
+                path for last_used, _, path in entries if last_used < cutoff
+            )
+            entries = [entry for entry in entries if entry[2] not in removed]
+        if self.max_size is not None:
+            total = sum(
+                size for _, size, path in self.entries() if path not in removed
+            )
+            for _, size, path in entries:
+                if total <= self.max_size:
+                    break
+                removed.append(path)
+                total -= size
+        for path in removed:
+            log.debug('Evicting %s from build cache', path)
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+        return removed
+
+
+def read_requirements(requirements, base_path):
+    """
+    Read requirements into a flat list of requirement specifiers.
+
+    Args:
+        requirements: Path to a requirements file, or a list of
+            requirements files and/or requirement specifiers.
+        base_path (str): Directory relative paths are resolved from.
+
+    Returns:
+        list: Requirement lines with comments, blank lines, and nested
+            ``-r`` files expanded.
+    """
+    if isinstance(requirements, string_types):
+        requirements = [requirements]
+    lines = []
+    for entry in requirements:
+        path = os.path.join(base_path, entry)
+        if not os.path.isfile(path):
+            lines.append(entry.strip())
+            continue
+        with io.open(path, encoding='UTF-8') as stream:
+            for line in stream:
+                line = line.split(' #')[0].strip()
+                if not line or line.startswith('#'):
+                    continue
+                if line.startswith(('-r ', '--requirement ')):
+                    lines.extend(read_requirements(
+                        line.split(None, 1)[1], os.path.dirname(path)
+                    ))
+                else:
+                    lines.append(line)
+    return lines
+
+
+def write_requirements(lines, path):
+    """
+    Write requirement lines out as a requirements file.
+
+    Returns:
+        str: The path written to.
+    """
+    with io.open(path, 'w', encoding='UTF-8') as stream:
+        stream.write(text_type(''.join(line + '\n' for line in lines)))
+    return path
+
+
+def requirement_name(line):
+    """
+    Get the distribution name from a requirement specifier.
+
+    Returns:
+        str: Name of the distribution, or ``None`` for lines such as
+            options or URLs that don't start with one.
+    """
+    if line.startswith('-') or '://' in line:
+        return None
+    match = REQUIREMENT_NAME_RE.match(line)
+    return match.group(1) if match else None
+
+
+def distribution_modules(name):
+    """
+    Find the top level modules an installed distribution provides.
+
+    Args:
+        name (str): Distribution name such as ``PyYAML``.
+
+    Returns:
+        set: Top level module names, or ``None`` if the distribution is
+            not installed so its modules can't be known.
+    """
+    if metadata is None:  # pragma: no cover
+        return None
+    try:
+        distribution = metadata.distribution(name)
+    except metadata.PackageNotFoundError:
+        return None
+    top_level = distribution.read_text('top_level.txt')
+    if top_level:
+        return set(top_level.split())
+    modules = set()
+    for path in distribution.files or []:
+        parts = str(path).replace('\\', '/').split('/')
+        if len(parts) == 1 and parts[0].endswith('.py'):
+            modules.add(parts[0][:-3])
+        elif len(parts) > 1 and not (
+                parts[0].endswith(('.dist-info', '.egg-info', '.data')) or
+                parts[0] in ('..', '__pycache__')
+        ):
+            modules.add(parts[0])
+    return modules
+
+
+def canonical_name(name):
+    """
+    Normalize a distribution name so different spellings compare equal,
+    like ``PyYAML`` and ``pyyaml`` or ``lambda_uploader`` and
+    ``lambda-uploader``.
+    """
+    return re.sub(r'[-_.]+', '-', name).lower()
+
+
+def distribution_requires(name):
+    """
+    Find the distributions an installed distribution depends on,
+    leaving out those only needed for its extras.
+
+    Args:
+        name (str): Distribution name.
+
+    Returns:
+        set: Canonical names of the dependencies, empty if the
+            distribution is not installed.
+    """
+    if metadata is None:  # pragma: no cover
+        return set()
+    try:
+        requires = metadata.requires(name) or []
+    except metadata.PackageNotFoundError:
+        return set()
+    names = set()
+    for requirement in requires:
+        specifier, _, marker = requirement.partition(';')
+        if 'extra' in marker:
+            continue
+        dependency = requirement_name(specifier)
+        if dependency:
+            names.add(canonical_name(dependency))
+    return names
+
+
+def module_files(module_name, project_dir, package_dir=None):
+    """
+    Find the files in a project making up a dotted module name.
+
+    Args:
+        module_name (str): Dotted module name.
+        project_dir (str): Root of the project.
+        package_dir (str): Directory to resolve the name from instead
+            of the project root, for relative imports.
+
+    Returns:
+        list: Paths of the package ``__init__.py`` files and module
+            file found along the dotted name, empty if the module is not
+            part of the project.
+    """
+    files = []
+    current = package_dir or project_dir
+    for part in module_name.split('.'):
+        package = os.path.join(current, part, '__init__.py')
+        module = os.path.join(current, part + '.py')
+        if os.path.isfile(package):
+            files.append(package)
+            current = os.path.join(current, part)
+        elif os.path.isfile(module):
+            files.append(module)
+            break
+        else:
+            break
+    return files
+
+
+def find_imports(module_file, project_dir, seen=None):
+    """
+    Statically find the modules outside of the project that a module
+    imports, following imports of other modules in the project.
+
+    Args:
+        module_file (str): Python file to scan.
+        project_dir (str): Root of the project.
+        seen (set): Files already scanned.
+
+    Returns:
+        set: Top level names of imported modules outside the project.
+    """
+    seen = set() if seen is None else seen
+    if module_file in seen:
+        return set()
+    seen.add(module_file)
+    with io.open(module_file, 'rb') as stream:
+        tree = ast.parse(stream.read(), module_file)
+
+    imports = set()
+    package_dir = os.path.dirname(module_file)
+    for node in ast.walk(tree):
+        names = []
+        if isinstance(node, ast.Import):
+            names = [(alias.name, project_dir) for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            base_dir = project_dir
+            if node.level:
+                base_dir = package_dir
+                for _ in range(node.level - 1):
+                    base_dir = os.path.dirname(base_dir)
+            module = node.module or ''
+            names = [
+                ('.'.join(part for part in (module, alias.name) if part),
+                 base_dir)
+                for alias in node.names
+            ]
+            if module:
+                names.append((module, base_dir))
+        for name, base_dir in names:
+            local_files = module_files(name, project_dir, base_dir)
+            if local_files:
+                for local_file in local_files:
+                    imports.update(
+                        find_imports(local_file, project_dir, seen)
+                    )
+            elif base_dir == project_dir:
+                imports.add(name.split('.')[0])
+    return imports
+
+
+def prune_requirements(lines, imports):
+    """
+    Remove requirements whose modules are never imported.  Requirements
+    that aren't installed locally are kept since what they provide
+    can't be known, and so are those that a kept requirement depends
+    on, so their pins still apply.
+
+    Args:
+        lines (list): Requirement specifiers.
+        imports (set): Top level module names that are imported.
+
+    Returns:
+        list: Requirement specifiers that are needed.
+    """
+    names = dict((line, requirement_name(line)) for line in lines)
+    kept = set()
+    for line in lines:
+        name = names[line]
+        modules = distribution_modules(name) if name else None
+        if modules is None or modules & imports:
+            kept.add(line)
+    # Keep the dependencies of what is kept, and theirs in turn
+    pending = [names[line] for line in kept if names[line]]
+    required = set()
+    while pending:
+        for dependency in distribution_requires(pending.pop()):
+            if dependency not in required:
+                required.add(dependency)
+                pending.append(dependency)
+    for line in lines:
+        if names[line] and canonical_name(names[line]) in required:
+            kept.add(line)
+        elif line not in kept:
+            log.debug('Pruning unused requirement %s', line)
+    return [line for line in lines if line in kept]
+
+
+def dancer_modules(tune, dancer, project_dir):
+    """
+    Find the project files that get imported to run a dancer, which is
+    the handler module plus the module the dancer's function is in.
+
+    Returns:
+        list: Paths of python files.
+    """
+    handler_module = tune.config['handler'].rpartition('.')[0]
+    files = module_files(handler_module, project_dir)
+    if isinstance(dancer, LazyDancer):
+        files.extend(
+            module_files(dancer.path.rpartition('.')[0], project_dir)
+        )
+    else:
+        module = sys.modules.get(getattr(dancer.function, '__module__', ''))
+        module_file = getattr(module, '__file__', None)
+        if module_file:
+            module_file = os.path.splitext(module_file)[0] + '.py'
+            if os.path.isfile(module_file):
+                files.append(module_file)
+    return files
+
+
+def dancer_requirements(tune, dancer, project_dir, requirements, prune=False):
+    """
+    Work out the requirements to package for a dancer.  A dancer's own
+    ``requirements`` configuration wins over its tune's, which wins over
+    the given requirements file.
+
+    Args:
+        tune (Lambada): Lambada object the dancer belongs to.
+        dancer (Dancer): Dancer to get the requirements of.
+        project_dir (str): Root of the project.
+        requirements (str): Path to the default requirements file.
+        prune (bool): Leave out requirements that the dancer's modules
+            don't import.
+
+    Returns:
+        list: Requirement specifiers, or ``None`` if the default
+            requirements should be used as is.
+    """
+    override = (
+        dancer.config.get('requirements') or tune.config.get('requirements')
+    )
+    if not override and not prune:
+        return None
+    if override:
+        lines = read_requirements(override, project_dir)
+    else:
+        requirements = os.path.abspath(
+            requirements or os.path.join(project_dir, 'requirements.txt')
+        )
+        lines = []
+        if os.path.isfile(requirements):
+            lines = read_requirements(requirements, project_dir)
+    if prune:
+        imports = set()
+        seen = set()
+        for module_file in dancer_modules(tune, dancer, project_dir):
+            imports.update(find_imports(module_file, project_dir, seen))
+        lines = prune_requirements(lines, imports)
+    return lines
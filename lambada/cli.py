@@ -3,42 +3,300 @@
 Command line interface for running, packaging,
 and uploading commands to AWS.
 """
+from collections import OrderedDict
 import io
+import json
+from multiprocessing.pool import ThreadPool
 import os
+import shutil
+from tempfile import mkdtemp
 
 import click
-from lambda_uploader.package import build_package
+from lambda_uploader.package import build_package, Package
 from lambda_uploader.uploader import PackageUploader
 from six import iteritems
 
+from lambada import BudgetExceeded
+from lambada.build import (
+    dancer_requirements,
+    exclude_patterns,
+    has_requirements,
+    hash_dependencies,
+    hash_file,
+    hash_package_inputs,
+    install_dependencies,
+    manifest_path,
+    normalize_zip,
+    write_manifest,
+    write_requirements,
+)
+from lambada.commands.bench import bench
+from lambada.commands.common import (
+    cache_options, get_build_cache, select_dancers
+)
+from lambada.commands.deploy import sync_config
+from lambada.commands.layer import layer_group
+from lambada.commands.replay import run_events
+from lambada.commands.serve import serve
+from lambada.commands.sizing import tune_memory
+from lambada.commands.startup import profile_startup
 from lambada.common import get_lambada_class, LambadaConfig, LambdaContext
+from lambada.deploy import (
+    dancer_config,
+    DeployState,
+    DEFAULT_STATE_FILE,
+    hash_dancer,
+    uses_bootstrap,
+)
+from lambada.layer import LayerUploader
+from lambada.replay import add_project_path
+from lambada.report import format_report, package_report
+from lambada.routing import write_routes
 
 ZIPFILE_UPLOAD_NAME = 'lambada.zip'
 
 
-def create_package(path, tune, requirements, destination=ZIPFILE_UPLOAD_NAME):
+def create_package(
+        path,
+        tune,
+        requirements,
+        destination=ZIPFILE_UPLOAD_NAME,
+        cache=None,
+        reproducible=False,
+        layer=None
+):
     """
     Creates and returns the package using :py:mod:`lambda_uploader`.
+
+    If a :class:`lambada.build.BuildCache` is given, a package built
+    from the same sources, requirements, and bouncer configuration is
+    reused instead of building it again, and otherwise the requirements
+    are only installed if they changed, see :func:`get_dependencies`.
+    If ``reproducible`` is set the zip is normalized so identical
+    inputs give identical bytes and a manifest of file hashes is
+    written next to it.  If a ``layer`` is named, the requirements are
+    left out since the layer provides them, see :mod:`lambada.layer`.
+    Packages for dancers with ``bootstrap`` enabled also get the routing
+    manifest written into them, see :mod:`lambada.routing`.
     """
+    # pylint: disable=too-many-arguments,too-many-locals
 
     if os.path.isfile(path):
         path = os.path.dirname(path)
     path = os.path.abspath(path)
-    # Write out bouncer configuration for package
-    bouncer_config = os.path.join(path, '_lambada.yml')
-    with io.open(bouncer_config, 'w', encoding='UTF-8') as bouncer_yaml:
-        tune.bouncer.export(bouncer_yaml)
-    pkg = build_package(
+    # Load the bouncer before writing its compiled configuration, which
+    # it would otherwise find half written in the working directory
+    bouncer = tune.bouncer
+    bouncer_config = os.path.join(path, '_lambada.json')
+    routes = None
+    try:
+        with io.open(bouncer_config, 'w', encoding='UTF-8') as bouncer_json:
+            bouncer.compile(bouncer_json)
+        if uses_bootstrap(tune):
+            routes = write_routes(tune, path)
+        key = None
+        cached = False
+        # Earlier builds and their manifests are not part of the package
+        exclude = [destination, manifest_path(destination)]
+        if cache is not None:
+            key = hash_package_inputs(
+                path,
+                requirements,
+                ignore_files=tune.config['ignore_files'],
+                extra_files=tune.config['extra_files'],
+                exclude=exclude,
+                layer=layer
+            )
+            pkg = Package(path, destination)
+            cached = cache.get(key, pkg.zip_file)
+        if cached:
+            click.echo('Using cached package {}'.format(key))
+        else:
+            virtualenv = None
+            if layer:
+                # Skips installing anything into the package
+                virtualenv = True
+            elif cache is not None and has_requirements(path, requirements):
+                virtualenv = get_dependencies(cache, path, requirements)
+            # Copies, since lambda_uploader adds to the lists it is given
+            pkg = build_package(
+                path,
+                requirements,
+                virtualenv=virtualenv,
+                ignore=(
+                    list(tune.config['ignore_files']) +
+                    exclude_patterns(exclude)
+                ),
+                extra_files=list(tune.config['extra_files']),
+                zipfile_name=destination
+            )
+            pkg.clean_workspace()
+        if reproducible:
+            normalize_zip(pkg.zip_file)
+            write_manifest(pkg.zip_file)
+        if key is not None and not cached:
+            cache.put(key, pkg.zip_file)
+    finally:
+        os.remove(bouncer_config)
+        if routes is not None:
+            os.remove(routes)
+    return pkg
+
+
+def get_dependencies(cache, path, requirements):
+    """
+    Get a virtualenv with the requirements installed from the
+    :class:`lambada.build.BuildCache`, installing them on a miss, so
+    that source only changes don't install everything again.
+
+    Returns:
+        str: Path to the virtualenv.
+    """
+    key = hash_dependencies(path, requirements)
+    virtualenv, cached = cache.dependencies(
+        key, lambda venv_dir: install_dependencies(
+            path, requirements, venv_dir
+        )
+    )
+    if cached:
+        click.echo('Using cached dependencies {}'.format(key))
+    else:
+        click.echo('Installed dependencies {}'.format(key))
+    return virtualenv
+
+
+def create_dancer_packages(
         path,
+        tune,
+        dancers,
         requirements,
-        virtualenv=None,
-        ignore=tune.config['ignore_files'],
-        extra_files=tune.config['extra_files'],
-        zipfile_name=destination
-    )
-    pkg.clean_workspace()
-    os.remove(bouncer_config)
-    return pkg
+        build_dir,
+        prune=False,
+        **kwargs
+):
+    """
+    Creates the packages needed to upload the given dancers, one for
+    each distinct set of requirements (see
+    :func:`lambada.build.dancer_requirements`), and one without any
+    for each ``layer`` that provides them instead.
+
+    Args:
+        path (str): Path to the lambada project.
+        tune (Lambada): Lambada object the dancers belong to.
+        dancers (list): :class:`lambada.Dancer` objects to package.
+        requirements (str): Path to the default requirements file.
+        build_dir (str): Directory to write the packages to.
+        prune (bool): Leave out requirements the dancers don't import.
+        kwargs: Passed on to :func:`create_package`.
+
+    Returns:
+        dict: Dancer names to a tuple of their package and its hash.
+    """
+    # pylint: disable=too-many-arguments,too-many-locals
+    project_dir = os.path.abspath(path)
+    if os.path.isfile(project_dir):
+        project_dir = os.path.dirname(project_dir)
+    groups = OrderedDict()
+    for dancer in dancers:
+        layer = dancer_config(tune, dancer).get('layer')
+        if layer:
+            groups.setdefault(('layer', layer), []).append(dancer)
+            continue
+        lines = dancer_requirements(
+            tune, dancer, project_dir, requirements, prune
+        )
+        groups.setdefault(
+            ('requirements', None if lines is None else tuple(lines)), []
+        ).append(dancer)
+
+    packages = {}
+    for index, ((kind, lines), group) in enumerate(iteritems(groups)):
+        group_requirements = requirements
+        layer = None
+        if kind == 'layer':
+            layer = lines
+            click.echo('Creating package for {} using layer {}'.format(
+                ', '.join(dancer.name for dancer in group), layer
+            ))
+        elif lines is None:
+            click.echo('Creating package')
+        else:
+            click.echo(
+                'Creating package for {} with {} requirement(s)'.format(
+                    ', '.join(dancer.name for dancer in group), len(lines)
+                )
+            )
+            group_requirements = write_requirements(
+                lines,
+                os.path.join(build_dir, 'requirements{}.txt'.format(index))
+            )
+        pkg = create_package(
+            path,
+            tune,
+            group_requirements,
+            os.path.join(build_dir, 'lambada{}.zip'.format(index)),
+            layer=layer,
+            **kwargs
+        )
+        package_hash = hash_file(pkg.zip_file).hexdigest()
+        for dancer in group:
+            packages[dancer.name] = (pkg, package_hash)
+    return packages
+
+
+def upload_dancers(path, tune, dancers, pkg, jobs=1, uploader=None):
+    """
+    Uploads an already built package to each of the given dancers using
+    a pool of at most ``jobs`` worker threads.  Every dancer shares the
+    same package, and a failure of one dancer doesn't stop the others.
+
+    Args:
+        path (str): Path to the lambada project.
+        tune (Lambada): Lambada object the dancers belong to.
+        dancers (list): :class:`lambada.Dancer` objects to upload.
+        pkg (lambda_uploader.package.Package): Built package to upload,
+            or a dictionary of dancer names to the package for each.
+        jobs (int): Maximum number of concurrent uploads.
+        uploader (class): Uploader class to use, defaults to
+            :class:`lambda_uploader.uploader.PackageUploader`.
+
+    Returns:
+        list: Names of the dancers that failed to upload.
+    """
+    # pylint: disable=too-many-arguments
+    uploader = uploader or PackageUploader
+
+    def upload_dancer(dancer):
+        """
+        Uploads the given dancer, returning its name on failure.
+        """
+        # Need to report every error without stopping the other uploads
+        # pylint: disable=broad-except
+        config_dict = dancer_config(tune, dancer)
+        click.echo('Uploading Package for {}'.format(dancer.name))
+        try:
+            config = LambadaConfig(path, config_dict)
+            uploader(config, None).upload(
+                pkg[dancer.name] if isinstance(pkg, dict) else pkg
+            )
+        except Exception as error:
+            click.echo(
+                'Failed to upload {}: {}'.format(dancer.name, error),
+                err=True
+            )
+            return dancer.name
+        click.echo('Finished uploading {}'.format(dancer.name))
+        return None
+
+    if not dancers:
+        return []
+    pool = ThreadPool(max(1, min(jobs, len(dancers))))
+    try:
+        results = pool.map(upload_dancer, dancers)
+    finally:
+        pool.close()
+        pool.join()
+    return [name for name in results if name]
 
 
 @click.group()
@@ -85,14 +343,74 @@ def list_dancers(obj):
     default='test',
     help='Event string to pass to your dancer.'
 )
+@click.option(
+    '--event-file',
+    help='File with a JSON event to pass to your dancer instead.',
+    type=click.File('r')
+)
+@click.option(
+    '--events-file',
+    help='File of newline delimited JSON events to run one at a time.',
+    type=click.File('r')
+)
+@click.option(
+    '--workers',
+    default=1,
+    help='Number of processes to run events from --events-file with.',
+    type=click.IntRange(min=1)
+)
+@click.option(
+    '--output',
+    default='-',
+    help='File to write a JSON result per event in --events-file to.',
+    type=click.File('w')
+)
+@click.option(
+    '--timeout',
+    help='Seconds the simulated context allows, enforcing dancer budgets.',
+    type=click.IntRange(min=1)
+)
 @click.argument('dancer')
 @click.pass_obj
-def run(obj, dancer, event):
+def run(
+        obj,
+        dancer,
+        event,
+        event_file,
+        events_file,
+        workers,
+        output,
+        timeout
+):
     """
     Runs a given function with a given event and a simulated context.
     """
-    context = LambdaContext(function_name=dancer)
-    obj['tune'](event, context)
+    # pylint: disable=too-many-arguments
+    # Lambda runs with the package root importable, so lazy dancers
+    # should be able to import their modules from there too.
+    add_project_path(obj['path'])
+    if events_file is not None:
+        run_events(
+            obj['path'],
+            obj['tune'],
+            dancer,
+            events_file,
+            workers,
+            output,
+            timeout
+        )
+        return
+    if event_file is not None:
+        event = json.load(event_file)
+    context = LambdaContext(function_name=dancer, timeout=timeout)
+    try:
+        result = obj['tune'](event, context)
+    except BudgetExceeded:
+        raise click.ClickException(
+            'Dancer {} ran out of budget'.format(dancer)
+        )
+    if result is not None:
+        click.echo(json.dumps(result, default=repr, sort_keys=True))
 
 
 @cli.command()
@@ -110,13 +428,37 @@ def run(obj, dancer, event):
     help='Path to requirements.txt to include in package',
     type=click.Path(exists=True, dir_okay=False)
 )
+@click.option(
+    '--reproducible',
+    is_flag=True,
+    help='Normalize the zip so identical sources give identical bytes',
+)
+@click.option(
+    '--report',
+    is_flag=True,
+    help='Show the size and import time of each package in the zip',
+)
+@cache_options
 @click.pass_obj
-def package(obj, requirements, destination):
+def package(obj, requirements, destination, reproducible, report,
+            **cache_kwargs):
     """
     Creates a zip file with everything needed to upload to AWS Lambda
     manually.  Useful for checking everything out before uploading.
     """
-    create_package(obj['path'], obj['tune'], requirements, destination)
+    # pylint: disable=too-many-arguments
+    pkg = create_package(
+        obj['path'],
+        obj['tune'],
+        requirements,
+        destination,
+        cache=get_build_cache(**cache_kwargs),
+        reproducible=reproducible,
+        layer=obj['tune'].config.get('layer')
+    )
+    if report:
+        for line in format_report(package_report(pkg.zip_file)):
+            click.echo(line)
 
 
 @cli.command()
@@ -128,36 +470,121 @@ def package(obj, requirements, destination):
     help='Path to requirements.txt to include in package',
     type=click.Path(exists=True, dir_okay=False)
 )
+@click.option(
+    '--jobs', '-j',
+    default=1,
+    envvar='LAMBADA_JOBS',
+    help='Number of dancers to upload concurrently',
+    type=click.IntRange(min=1)
+)
+@click.option(
+    '--changed-only',
+    is_flag=True,
+    help=(
+        'Only upload dancers whose package or configuration changed, '
+        'implies --reproducible'
+    ),
+)
+@click.option(
+    '--reproducible',
+    is_flag=True,
+    help='Normalize the zip so identical sources give identical bytes',
+)
+@click.option(
+    '--prune-requirements',
+    is_flag=True,
+    help=(
+        "Leave out requirements that a dancer's modules never import, "
+        'building a package per set of requirements'
+    ),
+)
+@click.option(
+    '--state-file',
+    default=DEFAULT_STATE_FILE,
+    envvar='LAMBADA_STATE_FILE',
+    help='File recording what was last uploaded for each dancer',
+    type=click.Path(dir_okay=False)
+)
+@cache_options
 @click.pass_obj
-def upload(obj, requirements, dancer):
+def upload(obj, requirements, dancer, jobs, changed_only, reproducible,
+           prune_requirements, state_file, **cache_kwargs):
     """
     Upload all lambda functions.
     """
+    # pylint: disable=too-many-arguments,too-many-locals
     tune = obj['tune']
-    click.echo('Creating package')
-    pkg = create_package(
-        obj['path'], obj['tune'], requirements
-    )
+    dancers = select_dancers(tune, dancer)
 
-    def upload_dancer(dancer):
-        """
-        Uploads the given dancer.
-        """
-        config_dict = tune.config.copy()
-        config_dict.update(dancer.config)
-        config = LambadaConfig(obj['path'], config_dict)
-        click.echo('Uploading Package for {}'.format(dancer.name))
-        uploader = PackageUploader(config, None)
-        uploader.upload(pkg)
-
-    if dancer:
-        dancer_obj = tune.dancers.get(dancer, None)
-        if dancer_obj is None:
-            raise click.ClickException(
-                "Dancer {} doesn't exist".format(dancer)
+    reproducible = reproducible or changed_only
+    build_dir = mkdtemp()
+    packages = {}
+    state = DeployState(state_file)
+    try:
+        packages = create_dancer_packages(
+            obj['path'],
+            tune,
+            dancers,
+            requirements,
+            build_dir,
+            prune=prune_requirements,
+            cache=get_build_cache(**cache_kwargs),
+            reproducible=reproducible
+        )
+        hashes = {
+            dancer_obj.name: hash_dancer(
+                packages[dancer_obj.name][1], dancer_config(tune, dancer_obj)
             )
-        upload_dancer(dancer_obj)
-    else:
-        for _, dancer in iteritems(tune.dancers):
-            upload_dancer(dancer)
-    pkg.clean_zipfile()
+            for dancer_obj in dancers
+        }
+        if changed_only:
+            unchanged = [
+                dancer_obj for dancer_obj in dancers
+                if state.is_current(
+                    dancer_config(tune, dancer_obj), hashes[dancer_obj.name]
+                )
+            ]
+            for dancer_obj in unchanged:
+                click.echo('Skipping unchanged {}'.format(dancer_obj.name))
+            dancers = [
+                dancer_obj for dancer_obj in dancers
+                if dancer_obj not in unchanged
+            ]
+            click.echo('Skipped {} unchanged dancer(s)'.format(len(unchanged)))
+        uploader = None
+        if any(dancer_config(tune, dancer_obj).get('layer')
+               for dancer_obj in dancers):
+            uploader = LayerUploader
+        failed = upload_dancers(
+            obj['path'],
+            tune,
+            dancers,
+            {name: pkg for name, (pkg, _) in iteritems(packages)},
+            jobs,
+            uploader
+        )
+    finally:
+        for pkg, _ in packages.values():
+            pkg.clean_zipfile()
+        shutil.rmtree(build_dir)
+
+    for dancer_obj in dancers:
+        if dancer_obj.name not in failed:
+            state.record(
+                dancer_config(tune, dancer_obj),
+                hashes[dancer_obj.name],
+                packages[dancer_obj.name][1]
+            )
+    state.save()
+    if failed:
+        raise click.ClickException(
+            'Failed to upload dancers: {}'.format(', '.join(sorted(failed)))
+        )
+
+
+cli.add_command(bench)
+cli.add_command(layer_group)
+cli.add_command(profile_startup)
+cli.add_command(serve)
+cli.add_command(sync_config)
+cli.add_command(tune_memory)
@@ -0,0 +1,5 @@
+# -*- coding: utf-8 -*-
+"""
+Commands of the command line interface that live outside of
+:mod:`lambada.cli`, which registers them on its group.
+"""
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+The ``bench`` command, see :mod:`lambada.bench`.
+"""
+import io
+import json
+
+import click
+from six import text_type
+
+from lambada.bench import benchmark, compare, load_events
+from lambada.commands.common import select_dancers
+
+
+@click.command()
+@click.option(
+    '--events',
+    help='File of newline delimited JSON events to replay.',
+    type=click.Path(exists=True, dir_okay=False)
+)
+@click.option(
+    '--event',
+    default='test',
+    help='Event string to use when no events file is given.'
+)
+@click.option(
+    '--iterations',
+    default=100,
+    help='Number of timed calls.',
+    type=click.IntRange(min=1)
+)
+@click.option(
+    '--warmup',
+    default=10,
+    help='Number of untimed calls to make first.',
+    type=click.IntRange(min=0)
+)
+@click.option(
+    '--compare', 'baseline',
+    help='Earlier benchmark JSON to check for regressions against.',
+    type=click.Path(exists=True, dir_okay=False)
+)
+@click.option(
+    '--threshold',
+    default=10.0,
+    help='Percent slower or bigger than the baseline that is a regression.',
+    type=float
+)
+@click.option(
+    '--output',
+    help='File to also write the benchmark JSON to.',
+    type=click.Path(dir_okay=False)
+)
+@click.argument('dancer')
+@click.pass_obj
+def bench(
+        obj,
+        dancer,
+        events,
+        event,
+        iterations,
+        warmup,
+        baseline,
+        threshold,
+        output
+):
+    """
+    Benchmarks a dancer by replaying events through it in process and
+    reports latency percentiles, throughput, and memory use as JSON.
+    """
+    # pylint: disable=too-many-arguments
+    select_dancers(obj['tune'], dancer)
+    result = benchmark(
+        obj['tune'],
+        dancer,
+        load_events(events) if events else [event],
+        iterations,
+        warmup
+    )
+    result_json = json.dumps(result, indent=2, sort_keys=True)
+    click.echo(result_json)
+    if output:
+        with io.open(output, 'w', encoding='UTF-8') as stream:
+            stream.write(text_type(result_json))
+    if baseline:
+        with io.open(baseline, encoding='UTF-8') as stream:
+            regressions = compare(result, json.load(stream), threshold)
+        for regression in regressions:
+            click.echo('Regression: {}'.format(regression), err=True)
+        if regressions:
+            raise click.ClickException(
+                '{} regression(s) against {}'.format(
+                    len(regressions), baseline
+                )
+            )
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+Helpers shared by the command line commands.
+"""
+import click
+from six import iteritems
+
+from lambada.build import BuildCache
+
+
+def cache_options(command):
+    """
+    Adds the build cache options to a packaging command.
+    """
+    options = [
+        click.option(
+            '--cache-dir',
+            default=None,
+            envvar='LAMBADA_CACHE_DIR',
+            help='Directory to cache built packages in, disabled if unset',
+            type=click.Path(file_okay=False)
+        ),
+        click.option(
+            '--cache-max-size',
+            default=None,
+            envvar='LAMBADA_CACHE_MAX_SIZE',
+            help='Maximum size of the build cache in megabytes',
+            type=click.IntRange(min=0)
+        ),
+        click.option(
+            '--cache-max-age',
+            default=None,
+            envvar='LAMBADA_CACHE_MAX_AGE',
+            help='Maximum days since a cached package was last used',
+            type=click.IntRange(min=0)
+        ),
+    ]
+    for option in reversed(options):
+        command = option(command)
+    return command
+
+
+def get_build_cache(cache_dir, cache_max_size, cache_max_age):
+    """
+    Creates the build cache from the command line options, or returns
+    ``None`` if caching is disabled.
+    """
+    if not cache_dir:
+        return None
+    return BuildCache(
+        cache_dir,
+        max_size=(
+            None if cache_max_size is None else cache_max_size * 1024 * 1024
+        ),
+        max_age=(
+            None if cache_max_age is None else cache_max_age * 24 * 60 * 60
+        )
+    )
+
+
+def select_dancers(tune, dancer=None):
+    """
+    Gets the named dancer, or all of the tune's dancers without a name.
+
+    Returns:
+        list: :class:`lambada.Dancer` objects.
+    """
+    if not dancer:
+        return [dancer_obj for _, dancer_obj in iteritems(tune.dancers)]
+    if dancer not in tune.dancers:
+        raise click.ClickException("Dancer {} doesn't exist".format(dancer))
+    return [tune.dancers[dancer]]
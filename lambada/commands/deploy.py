@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+The ``sync-config`` command, see :func:`lambada.deploy.sync_dancers`.
+"""
+import click
+
+from lambada.commands.common import select_dancers
+from lambada.deploy import (
+    DeployState,
+    DEFAULT_STATE_FILE,
+    lambda_client,
+    sync_dancers,
+)
+
+
+@click.command(name='sync-config')
+@click.argument('dancer', required=False)
+@click.option(
+    '--jobs', '-j',
+    default=4,
+    envvar='LAMBADA_JOBS',
+    help='Number of dancers to update concurrently',
+    type=click.IntRange(min=1)
+)
+@click.option(
+    '--dry-run',
+    is_flag=True,
+    help='Only show the configuration that would be updated',
+)
+@click.option(
+    '--state-file',
+    default=DEFAULT_STATE_FILE,
+    envvar='LAMBADA_STATE_FILE',
+    help='File recording what was last uploaded for each dancer',
+    type=click.Path(dir_okay=False)
+)
+@click.option(
+    '--endpoint-url',
+    default=None,
+    envvar='LAMBADA_ENDPOINT_URL',
+    help='Lambda endpoint to use instead of AWS, such as a local stub',
+)
+@click.pass_obj
+def sync_config(obj, dancer, jobs, dry_run, state_file, endpoint_url):
+    """
+    Update the configuration of deployed functions without uploading.
+    """
+    # pylint: disable=too-many-arguments
+    tune = obj['tune']
+    dancers = select_dancers(tune, dancer)
+
+    state = DeployState(state_file)
+    failed = sync_dancers(
+        obj['path'],
+        tune,
+        dancers,
+        state,
+        jobs,
+        lambda region: lambda_client(region, endpoint_url),
+        dry_run
+    )
+    if not dry_run:
+        state.save()
+    if failed:
+        raise click.ClickException(
+            'Failed to update dancers: {}'.format(', '.join(sorted(failed)))
+        )
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+The ``layer`` commands, see :mod:`lambada.layer`.
+"""
+import os
+
+import click
+
+from lambada.build import read_requirements
+from lambada.commands.common import cache_options, get_build_cache
+from lambada.deploy import lambda_client
+from lambada.layer import build_layer, layer_runtimes, publish_layer
+
+
+@click.group(name='layer')
+def layer_group():
+    """
+    Build and publish the Lambda layer with your requirements.
+    """
+
+
+def create_layer(path, tune, requirements, destination, cache=None):
+    """
+    Builds the layer zip with :func:`lambada.layer.build_layer`, the
+    tune's own ``requirements`` configuration winning over the
+    requirements file.
+    """
+    project_dir = os.path.abspath(path)
+    if os.path.isfile(project_dir):
+        project_dir = os.path.dirname(project_dir)
+    if tune.config.get('requirements'):
+        requirements = read_requirements(
+            tune.config['requirements'], project_dir
+        )
+    build_layer(project_dir, requirements, destination, cache=cache)
+    click.echo('Built layer {}'.format(destination))
+
+
+def layer_options(command):
+    """
+    Adds the options shared by the layer commands.
+    """
+    options = [
+        click.option(
+            '--requirements',
+            default='./requirements.txt',
+            envvar='LAMBADA_REQUIREMENTS',
+            help='Path to requirements.txt to include in the layer',
+            type=click.Path(exists=True, dir_okay=False)
+        ),
+        click.option(
+            '--destination',
+            default='layer.zip',
+            envvar='LAMBADA_LAYER_DESTINATION',
+            help='name of the layer zip file to create',
+            type=click.Path(exists=False, dir_okay=False)
+        ),
+    ]
+    for option in reversed(options):
+        command = option(command)
+    return cache_options(command)
+
+
+@layer_group.command(name='build')
+@layer_options
+@click.pass_obj
+def build_layer_command(obj, requirements, destination, **cache_kwargs):
+    """
+    Creates a zip file of the requirements laid out as a Lambda layer.
+    """
+    create_layer(
+        obj['path'],
+        obj['tune'],
+        requirements,
+        destination,
+        cache=get_build_cache(**cache_kwargs)
+    )
+
+
+@layer_group.command(name='publish')
+@layer_options
+@click.pass_obj
+def publish_layer_command(obj, requirements, destination, **cache_kwargs):
+    """
+    Builds the layer and publishes it as the tune's ``layer``, unless
+    the latest published version is identical.
+    """
+    tune = obj['tune']
+    name = tune.config.get('layer')
+    if not name:
+        raise click.ClickException(
+            'Set layer in the Lambada configuration to publish one'
+        )
+    create_layer(
+        obj['path'],
+        tune,
+        requirements,
+        destination,
+        cache=get_build_cache(**cache_kwargs)
+    )
+    arn, published = publish_layer(
+        lambda_client(tune.config['region']),
+        name,
+        destination,
+        runtimes=layer_runtimes(tune, name),
+        description='Requirements of {}'.format(name)
+    )
+    if published:
+        click.echo('Published layer {}'.format(arn))
+    else:
+        click.echo('Layer {} is unchanged'.format(arn))
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""
+Running a file of events with the ``run`` command, see
+:mod:`lambada.replay`.
+"""
+import click
+
+from lambada.commands.common import select_dancers
+from lambada.replay import format_result, replay
+
+
+def run_events(path, tune, dancer, events_file, workers, output, timeout):
+    """
+    Runs each event of ``events_file`` through the dancer with a pool of
+    ``workers`` processes, writing a JSON result per event to
+    ``output``, and fails if any of them raised.
+    """
+    # pylint: disable=too-many-arguments
+    select_dancers(tune, dancer)
+    count = errors = 0
+    for result in replay(
+            path, tune, dancer, events_file, workers, timeout=timeout
+    ):
+        count += 1
+        if 'error' in result:
+            errors += 1
+        output.write(format_result(result))
+        output.flush()
+    click.echo(
+        'Ran {} event(s) with {} error(s)'.format(count, errors), err=True
+    )
+    if errors:
+        raise click.ClickException('{} event(s) failed'.format(errors))
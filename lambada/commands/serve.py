@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""
+The ``serve`` command, see :mod:`lambada.serve`.
+"""
+import click
+
+from lambada.serve import InvokeServer
+
+
+@click.command()
+@click.option(
+    '--host',
+    default='127.0.0.1',
+    help='Address to listen on.'
+)
+@click.option(
+    '--port',
+    default=9001,
+    help='Port to listen on.',
+    type=click.IntRange(min=0)
+)
+@click.option(
+    '--workers',
+    default=1,
+    envvar='LAMBADA_WORKERS',
+    help='Number of warm worker processes handling invocations.',
+    type=click.IntRange(min=1)
+)
+@click.pass_obj
+def serve(obj, host, port, workers):
+    """
+    Serves the dancers locally with the AWS Lambda Invoke API, i.e.
+    POST /2015-03-31/functions/DANCER/invocations with the event as the
+    body.  Each worker process keeps its tune loaded between requests
+    like a warm Lambda container.
+    """
+    server = InvokeServer(obj['path'], (host, port), workers)
+    click.echo('Serving {} dancer(s) on http://{}:{} with {} worker(s)'.format(
+        len(obj['tune'].dancers), host, server.server_address[1], workers
+    ))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        click.echo('Stopping')
+    finally:
+        server.server_close()
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+The ``tune-memory`` command, see :mod:`lambada.sizing`.
+"""
+import io
+import json
+
+import click
+from six import text_type
+
+from lambada.bench import load_events
+from lambada.commands.common import select_dancers
+from lambada.sizing import decorator_patch, DEFAULT_HEADROOM, size_dancer
+
+
+@click.command(name='tune-memory')
+@click.option(
+    '--events',
+    required=True,
+    help='File of newline delimited JSON events to replay.',
+    type=click.Path(exists=True, dir_okay=False)
+)
+@click.option(
+    '--iterations',
+    default=None,
+    help='Number of measured calls, one per event by default.',
+    type=click.IntRange(min=1)
+)
+@click.option(
+    '--headroom',
+    default=DEFAULT_HEADROOM,
+    help='Extra share of the measured memory and time to allow for.',
+    type=float
+)
+@click.option(
+    '--output',
+    help='File to also write the report JSON to.',
+    type=click.Path(dir_okay=False)
+)
+@click.option(
+    '--patch',
+    help='File to write a patch of the dancer decorator to.',
+    type=click.Path(dir_okay=False)
+)
+@click.argument('dancer')
+@click.pass_obj
+def tune_memory(obj, dancer, events, iterations, headroom, output, patch):
+    """
+    Replays events through a dancer to measure its memory and CPU use,
+    and recommends memory and timeout settings for it.
+    """
+    # pylint: disable=too-many-arguments
+    dancer_obj = select_dancers(obj['tune'], dancer)[0]
+    report = size_dancer(
+        obj['tune'], dancer_obj, load_events(events), iterations, headroom
+    )
+    report_json = json.dumps(report, indent=2, sort_keys=True)
+    click.echo(report_json)
+    if output:
+        with io.open(output, 'w', encoding='UTF-8') as stream:
+            stream.write(text_type(report_json))
+    if patch:
+        try:
+            diff = decorator_patch(
+                dancer_obj, obj['path'], report['recommended']
+            )
+        except ValueError as error:
+            raise click.ClickException(str(error))
+        with io.open(patch, 'w', encoding='UTF-8') as stream:
+            stream.write(text_type(diff))
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+The ``profile-startup`` command, see :mod:`lambada.startup`.
+"""
+import json
+import subprocess
+
+import click
+
+from lambada.commands.common import select_dancers
+from lambada.startup import format_profile, run_profile
+
+
+@click.command(name='profile-startup')
+@click.option(
+    '--event',
+    default='test',
+    help='Event string to pass to your dancer.'
+)
+@click.option(
+    '--warm-calls',
+    default=5,
+    help='Number of calls to time after the first one.',
+    type=click.IntRange(min=0)
+)
+@click.option(
+    '--limit',
+    default=20,
+    help='Number of the slowest imports to show.',
+    type=click.IntRange(min=0)
+)
+@click.option(
+    '--json', 'as_json',
+    is_flag=True,
+    help='Output the full profile as JSON.'
+)
+@click.argument('dancer')
+@click.pass_obj
+def profile_startup(obj, dancer, event, warm_calls, limit, as_json):
+    """
+    Profiles the cold start of a dancer in a new python process, timing
+    the import of the handler module and every module it imports, the
+    first call of the dancer, and the warm calls after it.
+    """
+    # pylint: disable=too-many-arguments
+    select_dancers(obj['tune'], dancer)
+    try:
+        profile = run_profile(obj['path'], dancer, event, warm_calls)
+    except subprocess.CalledProcessError:
+        raise click.ClickException('Unable to profile {}'.format(dancer))
+    if as_json:
+        click.echo(json.dumps(profile, indent=2, sort_keys=True))
+    else:
+        for line in format_profile(profile, limit):
+            click.echo(line)
@@ -2,8 +2,11 @@
 """
 Common classes, functions, etc.
 """
+import ast
 import imp
 from glob import glob
+import io
+import json
 import os
 import sys
 import time
@@ -12,8 +15,118 @@ from uuid import uuid4
 
 import click
 from lambda_uploader.config import Config, REQUIRED_PARAMS
+from six import text_type
 
 from lambada import Lambada
+from lambada.build import DEFAULT_CACHE_DIR
+
+# Results of :func:`declares_lambada` by absolute path, with the
+# modification time and size they hold for, shared between processes
+# through :data:`DISCOVERY_CACHE_FILE`
+DISCOVERY_CACHE_FILE = os.path.join(DEFAULT_CACHE_DIR, 'discovery.json')
+_DISCOVERY_CACHE = {}
+
+
+def _scan_for_lambada(python_file):
+    """
+    Parse a python file, without running it, looking for a call to
+    :class:`lambada.Lambada`, including through ``import ... as``.
+    """
+    with io.open(python_file, 'rb') as stream:
+        source = stream.read()
+    # Skip parsing files that can't possibly construct one
+    if b'Lambada' not in source:
+        return False
+    try:
+        tree = ast.parse(source, python_file)
+    except (SyntaxError, TypeError, ValueError):
+        return False
+    names = set(['Lambada'])
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ImportFrom):
+            names.update(
+                alias.asname for alias in node.names
+                if alias.name == 'Lambada' and alias.asname
+            )
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Call):
+            continue
+        func = node.func
+        if isinstance(func, ast.Name) and func.id in names:
+            return True
+        if isinstance(func, ast.Attribute) and func.attr == 'Lambada':
+            return True
+    return False
+
+
+def _load_discovery_cache():
+    """
+    Read the results other processes saved to
+    :data:`DISCOVERY_CACHE_FILE`, ignoring a missing or broken file,
+    and drop the results for files that no longer exist.
+
+    Returns:
+        dict: Results as they were saved, to tell if they changed.
+    """
+    try:
+        with io.open(DISCOVERY_CACHE_FILE, encoding='UTF-8') as stream:
+            saved = json.load(stream)
+    except (IOError, OSError, ValueError):
+        saved = {}
+    if not isinstance(saved, dict):
+        saved = {}
+    for path, entry in saved.items():
+        _DISCOVERY_CACHE.setdefault(path, entry)
+    for path in list(_DISCOVERY_CACHE):
+        if not os.path.exists(path):
+            del _DISCOVERY_CACHE[path]
+    return saved
+
+
+def _save_discovery_cache():
+    """
+    Write the cached results to :data:`DISCOVERY_CACHE_FILE` for other
+    processes.  The cache is only an optimization, so failing to write
+    it is ignored.
+    """
+    temp_path = '{}.{}.tmp'.format(DISCOVERY_CACHE_FILE, os.getpid())
+    try:
+        cache_dir = os.path.dirname(DISCOVERY_CACHE_FILE)
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        with io.open(temp_path, 'w', encoding='UTF-8') as stream:
+            stream.write(text_type(json.dumps(_DISCOVERY_CACHE)))
+        # Rename so concurrent processes never read partial files
+        os.rename(temp_path, DISCOVERY_CACHE_FILE)
+    except (IOError, OSError):
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def declares_lambada(python_file):
+    """
+    Check whether a python file constructs a :class:`lambada.Lambada`
+    without importing it.  Results are cached in memory until the
+    file's modification time or size changes, and
+    :func:`get_lambada_class` shares them with other processes through
+    :data:`DISCOVERY_CACHE_FILE`.
+
+    Args:
+        python_file (str): Path to the python file.
+
+    Returns:
+        bool: ``True`` if the file appears to create a tune.
+    """
+    try:
+        stat = os.stat(python_file)
+    except OSError:
+        return False
+    path = os.path.abspath(python_file)
+    key = [stat.st_mtime, stat.st_size]
+    cached = _DISCOVERY_CACHE.get(path)
+    if cached is None or list(cached[0]) != key:
+        cached = _DISCOVERY_CACHE[path] = [key, _scan_for_lambada(path)]
+    return cached[1]
 
 
 def get_lambada_class(path):
@@ -21,6 +134,11 @@ def get_lambada_class(path):
     Given the path, find the lambada
     class label by :func:`dir` ing for that type.
 
+    For a folder, files that construct a :class:`lambada.Lambada`
+    according to :func:`declares_lambada` are imported first, and the
+    rest only if none of those produce a tune.  The results of the scan
+    are read from and saved to :data:`DISCOVERY_CACHE_FILE` once.
+
     Args:
         path (click.Path): Path to folder or file
     """
@@ -51,31 +169,33 @@ def get_lambada_class(path):
             sys.path = original_sys_path[:]
         return mod
 
-    tune = None
-    module_list = []
     if os.path.isdir(path):
         if path[-1] != os.sep:
             path += os.sep
-        for python_file in glob(path + '*.py'):
-            mod = load_module(python_file)
-            if mod is not None:
-                module_list.append(mod)
+        python_files = sorted(glob(path + '*.py'))
+        saved = _load_discovery_cache()
+        declared = [
+            python_file for python_file in python_files
+            if declares_lambada(python_file)
+        ]
+        if _DISCOVERY_CACHE != saved:
+            _save_discovery_cache()
+        python_files = declared + [
+            python_file for python_file in python_files
+            if python_file not in declared
+        ]
     elif os.path.isfile(path):
-        mod = load_module(path)
-        if mod is not None:
-            module_list.append(mod)
+        python_files = [path]
     else:
         raise click.ClickException('Path does not exist')
 
-    for module in module_list:
-        for name in dir(module):
+    for python_file in python_files:
+        module = load_module(python_file)
+        for name in dir(module) if module is not None else []:
             item = getattr(module, name, None)
             if isinstance(item, Lambada):
-                tune = item
-                break
-        if tune:
-            break
-    return tune
+                return item
+    return None
 
 
 def get_time_millis():
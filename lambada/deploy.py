@@ -0,0 +1,367 @@
+# -*- coding: utf-8 -*-
+"""
+Tracking of what has been deployed for each dancer so unchanged
+dancers can be skipped, and updating the configuration of deployed
+functions without uploading their code again.
+"""
+import hashlib
+import io
+import json
+import logging
+from multiprocessing.pool import ThreadPool
+import os
+
+import click
+from six import text_type
+
+from lambada.build import DEFAULT_CACHE_DIR
+from lambada.common import LambadaConfig
+from lambada.routing import BOOTSTRAP_HANDLER
+
+log = logging.getLogger(__name__)
+
+DEFAULT_STATE_FILE = os.path.join(DEFAULT_CACHE_DIR, 'deployed.json')
+# Configuration that can be updated without uploading the package
+FUNCTION_CONFIG_KEYS = (
+    'description',
+    'handler',
+    'memory',
+    'role',
+    'runtime',
+    'security_groups',
+    'subnets',
+    'timeout',
+    'tracing',
+    'variables',
+    'vpc',
+)
+# Configuration that only changes the package, which uploads compare
+BUILD_CONFIG_KEYS = (
+    'bootstrap',
+    'extra_files',
+    'ignore_files',
+    'requirements',
+)
+
+
+def dancer_config(tune, dancer):
+    """
+    Merge the configuration of a dancer over that of its tune.  Dancers
+    with ``bootstrap`` enabled are deployed with the handler from
+    :mod:`lambada.routing`.
+
+    Args:
+        tune (Lambada): Lambada object the dancer belongs to.
+        dancer (Dancer): Dancer to get the configuration of.
+
+    Returns:
+        dict: Effective configuration of the dancer.
+    """
+    config = tune.config.copy()
+    config.update(dancer.config)
+    if config.get('bootstrap'):
+        config['handler'] = BOOTSTRAP_HANDLER
+    return config
+
+
+def uses_bootstrap(tune):
+    """
+    Whether any dancer of a tune is deployed with the bootstrap
+    handler, and so needs the routing manifest in its package.
+    """
+    return any(
+        dancer_config(tune, dancer).get('bootstrap')
+        for dancer in tune.dancers.values()
+    )
+
+
+def hash_dancer(package_hash, config):
+    """
+    Create a deterministic hash of a dancer deployment.
+
+    Args:
+        package_hash (str): Hex digest of the package zip file.
+        config (dict): Effective configuration of the dancer.
+
+    Returns:
+        str: Hex digest of the package and configuration.
+    """
+    digest = hashlib.sha256(package_hash.encode('UTF-8'))
+    digest.update(
+        json.dumps(config, sort_keys=True, default=str).encode('UTF-8')
+    )
+    return digest.hexdigest()
+
+
+class DeployState(object):
+    """
+    Local record of the last deployed hash and configuration of each
+    dancer, kept by region and function name in a JSON file.
+    """
+    def __init__(self, state_file=DEFAULT_STATE_FILE):
+        """
+        Loads the existing state file if there is one.
+
+        Args:
+            state_file (str): Path to the JSON state file.
+        """
+        self.state_file = state_file
+        self.state = {}
+        if os.path.isfile(state_file):
+            with io.open(state_file, encoding='UTF-8') as stream:
+                self.state = json.load(stream)
+
+    def get(self, config):
+        """
+        Get the recorded deployment for the given dancer configuration.
+
+        Returns:
+            dict: With ``hash`` and ``config`` keys, or ``None`` if the
+                dancer has not been deployed.
+        """
+        return self.state.get(config['region'], {}).get(config['name'])
+
+    def is_current(self, config, dancer_hash):
+        """
+        Check whether the dancer was last deployed with the given hash.
+        """
+        deployed = self.get(config)
+        return deployed is not None and deployed['hash'] == dancer_hash
+
+    def record(self, config, dancer_hash, package_hash=None):
+        """
+        Record a deployment of a dancer, along with the hash of its
+        package so that its configuration can be updated on its own.
+        """
+        deployed = dict(
+            hash=dancer_hash,
+            config=json.loads(json.dumps(config, default=str)),
+        )
+        if package_hash is not None:
+            deployed['package_hash'] = package_hash
+        self.state.setdefault(config['region'], {})[config['name']] = deployed
+
+    def save(self):
+        """
+        Write the state back out to :attr:`state_file`.
+        """
+        directory = os.path.dirname(os.path.abspath(self.state_file))
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        temp_path = '{}.{}.tmp'.format(self.state_file, os.getpid())
+        with io.open(temp_path, 'w', encoding='UTF-8') as stream:
+            stream.write(
+                text_type(json.dumps(self.state, indent=2, sort_keys=True))
+            )
+        os.rename(temp_path, self.state_file)
+        log.debug('Saved deploy state to %s', self.state_file)
+
+
+def lambda_client(region, endpoint_url=None):
+    """
+    Create a Lambda client for the given region.
+
+    Args:
+        region (str): AWS region of the functions.
+        endpoint_url (str): Endpoint to use instead of AWS, such as a
+            local stub.
+    """
+    # Only commands talking to AWS pay for importing boto3
+    import boto3
+    return boto3.session.Session(region_name=region).client(
+        'lambda', endpoint_url=endpoint_url
+    )
+
+
+def config_changes(deployed, config):
+    """
+    Compare the configuration of a dancer with what was deployed.
+
+    Args:
+        deployed (dict): Recorded configuration from :class:`DeployState`.
+        config (dict): Effective configuration of the dancer.
+
+    Returns:
+        tuple: Sorted names of the changed :data:`FUNCTION_CONFIG_KEYS`,
+            and of other changed keys, which need a new upload.  Changes
+            to :data:`BUILD_CONFIG_KEYS` are left out, since they only
+            matter if they change the package.
+    """
+    config = json.loads(json.dumps(config, default=str))
+    changed = sorted(
+        key for key in set(deployed) | set(config)
+        if deployed.get(key) != config.get(key) and
+        key not in BUILD_CONFIG_KEYS
+    )
+    return (
+        [key for key in changed if key in FUNCTION_CONFIG_KEYS],
+        [key for key in changed if key not in FUNCTION_CONFIG_KEYS],
+    )
+
+
+def function_configuration(config):
+    """
+    Build the arguments of ``UpdateFunctionConfiguration`` the same way
+    :class:`lambda_uploader.uploader.PackageUploader` does.
+
+    Args:
+        config (lambada.common.LambadaConfig): Configuration of the
+            dancer with defaults filled in.
+
+    Returns:
+        dict: Keyword arguments for the Lambda client.
+    """
+    vpc = config.raw['vpc']
+    return dict(
+        FunctionName=config.name,
+        Handler=config.handler,
+        Role=config.role,
+        Description=config.description,
+        Timeout=config.timeout,
+        MemorySize=config.memory,
+        VpcConfig=dict(
+            SubnetIds=vpc['subnets'] if vpc else [],
+            SecurityGroupIds=vpc['security_groups'] if vpc else [],
+        ),
+        Environment=dict(Variables=config.variables),
+        TracingConfig=config.tracing,
+        Runtime=config.runtime,
+    )
+
+
+def plan_config_sync(tune, dancers, state, dry_run=False):
+    """
+    Work out which deployed dancers have configuration to update,
+    reporting each dancer's changes.
+
+    Args:
+        tune (Lambada): Lambada object the dancers belong to.
+        dancers (list): :class:`lambada.Dancer` objects to check.
+        state (DeployState): What was last deployed.
+        dry_run (bool): Report changes as what would be updated.
+
+    Returns:
+        list: Tuples of the dancer, its effective configuration, its
+            recorded deployment, and the changed keys.
+    """
+    updates = []
+    for dancer in dancers:
+        config = dancer_config(tune, dancer)
+        deployed = state.get(config)
+        if deployed is None:
+            click.echo(
+                'Skipping {}, it has not been uploaded'.format(dancer.name)
+            )
+            continue
+        changes, others = config_changes(deployed['config'], config)
+        if others:
+            click.echo('{} needs an upload for changes to {}'.format(
+                dancer.name, ', '.join(others)
+            ))
+        if not changes:
+            click.echo('{} is up to date'.format(dancer.name))
+            continue
+        click.echo('{} {}: {}'.format(
+            'Would update' if dry_run else 'Updating',
+            dancer.name,
+            ', '.join(
+                '{} {!r} -> {!r}'.format(
+                    key, deployed['config'].get(key), config.get(key)
+                )
+                for key in changes
+            )
+        ))
+        updates.append((dancer, config, deployed, changes))
+    return updates
+
+
+def record_config_sync(state, config, deployed, changes):
+    """
+    Record the updated configuration of a deployed dancer.  Its hash
+    is only brought up to date when the hash of its package is known.
+    """
+    recorded = dict(deployed['config'])
+    recorded.update((key, config.get(key)) for key in changes)
+    package_hash = deployed.get('package_hash')
+    state.record(
+        recorded,
+        hash_dancer(package_hash, recorded) if package_hash
+        else deployed['hash'],
+        package_hash
+    )
+
+
+def sync_dancers(
+        path,
+        tune,
+        dancers,
+        state,
+        jobs=1,
+        client_factory=lambda_client,
+        dry_run=False
+):
+    """
+    Updates the configuration of deployed dancers that changed since
+    they were uploaded, without building or uploading their packages,
+    using a pool of at most ``jobs`` worker threads.
+
+    Args:
+        path (str): Path to the lambada project.
+        tune (Lambada): Lambada object the dancers belong to.
+        dancers (list): :class:`lambada.Dancer` objects to update.
+        state (DeployState): What was last deployed, updated with the
+            new configuration of each dancer.
+        jobs (int): Maximum number of concurrent updates.
+        client_factory (callable): Creates a Lambda client from a
+            region, defaults to :func:`lambda_client`.
+        dry_run (bool): Only report what would be updated.
+
+    Returns:
+        list: Names of the dancers that failed to update.
+    """
+    # pylint: disable=too-many-arguments
+    updates = plan_config_sync(tune, dancers, state, dry_run)
+    if dry_run or not updates:
+        return []
+
+    # Clients are thread safe, but creating them isn't
+    clients = {
+        region: client_factory(region)
+        for region in set(update[1]['region'] for update in updates)
+    }
+
+    def update_dancer(update):
+        """
+        Updates the configuration of a dancer, returning its name on
+        failure.
+        """
+        # Need to report every error without stopping the other updates
+        # pylint: disable=broad-except
+        dancer, config, _, _ = update
+        try:
+            # A copy, since LambadaConfig fills in its defaults on it
+            arguments = function_configuration(
+                LambadaConfig(path, dict(config))
+            )
+            clients[config['region']].update_function_configuration(
+                **arguments
+            )
+        except Exception as error:
+            click.echo(
+                'Failed to update {}: {}'.format(dancer.name, error),
+                err=True
+            )
+            return dancer.name
+        return None
+
+    pool = ThreadPool(max(1, min(jobs, len(updates))))
+    try:
+        results = pool.map(update_dancer, updates)
+    finally:
+        pool.close()
+        pool.join()
+
+    for update, failed in zip(updates, results):
+        if not failed:
+            record_config_sync(state, *update[1:])
+    return [name for name in results if name]
@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+"""
+Event adapters that give dancers a view of their event which decodes
+JSON payloads once, on first use, with the fastest JSON library
+installed.  Views still act like the raw event dictionary, so code
+reading ``event['body']`` keeps working.
+"""
+import base64
+import json
+
+from six import binary_type
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # pylint: disable=invalid-name
+try:
+    import ujson
+except ImportError:  # pragma: no cover
+    ujson = None  # pylint: disable=invalid-name
+
+if orjson is not None:
+    JSON_BACKEND = 'orjson'
+    json_loads = orjson.loads  # pylint: disable=invalid-name,no-member
+elif ujson is not None:  # pragma: no cover
+    JSON_BACKEND = 'ujson'
+    json_loads = ujson.loads  # pylint: disable=invalid-name,no-member
+else:  # pragma: no cover
+    JSON_BACKEND = 'json'
+    json_loads = json.loads  # pylint: disable=invalid-name
+
+
+def loads(payload):
+    """
+    Decode JSON with :data:`json_loads`, from the fastest library
+    available (:data:`JSON_BACKEND`).
+
+    Args:
+        payload (str): JSON text or UTF-8 bytes.
+
+    Returns:
+        Decoded object, or ``None`` for an empty payload.
+    """
+    if not payload:
+        return None
+    if isinstance(payload, binary_type) and JSON_BACKEND == 'json':
+        payload = payload.decode('UTF-8')
+    return json_loads(payload)
+
+
+class memoized_property(property):  # pylint: disable=invalid-name
+    """
+    Property that is only computed once per instance, after which the
+    value is kept in the instance dictionary.
+    """
+    def __get__(self, instance, owner=None):
+        """
+        Compute and keep the value.
+        """
+        if instance is None:
+            return self
+        name = self.fget.__name__
+        try:
+            return instance.__dict__[name]
+        except KeyError:
+            value = instance.__dict__[name] = self.fget(instance)
+            return value
+
+
+class EventView(object):
+    """
+    Read only view of a raw event or record that otherwise behaves like
+    the dictionary it wraps.
+    """
+    def __init__(self, raw):
+        """
+        Args:
+            raw (dict): The event or record as Lambda passes it.
+        """
+        self.raw = raw
+
+    def __getitem__(self, key):
+        """Get an item of the raw event."""
+        return self.raw[key]
+
+    def __contains__(self, key):
+        """Check for an item in the raw event."""
+        return key in self.raw
+
+    def __iter__(self):
+        """Iterate over the keys of the raw event."""
+        return iter(self.raw)
+
+    def __len__(self):
+        """Number of items in the raw event."""
+        return len(self.raw)
+
+    def get(self, key, default=None):
+        """Get an item of the raw event with a default."""
+        return self.raw.get(key, default)
+
+    def __repr__(self):
+        """Show the view type and raw event."""
+        return '{}({!r})'.format(type(self).__name__, self.raw)
+
+
+class ApiGatewayEvent(EventView):
+    """
+    API Gateway proxy integration request.
+    """
+    @memoized_property
+    def text(self):
+        """
+        The request body as text, decoded from base64 if needed.
+        """
+        body = self.raw.get('body') or ''
+        if self.raw.get('isBase64Encoded'):
+            body = base64.b64decode(body).decode('UTF-8')
+        return body
+
+    @memoized_property
+    def body(self):
+        """
+        The request body decoded from JSON, ``None`` if it is empty.
+        """
+        return loads(self.text)
+
+    @property
+    def headers(self):
+        """Request headers."""
+        return self.raw.get('headers') or {}
+
+    @property
+    def query(self):
+        """Query string parameters."""
+        return self.raw.get('queryStringParameters') or {}
+
+    @property
+    def path_parameters(self):
+        """Path parameters matched by the resource."""
+        return self.raw.get('pathParameters') or {}
+
+    @property
+    def method(self):
+        """HTTP method of the request."""
+        return self.raw.get('httpMethod')
+
+    @property
+    def path(self):
+        """Path of the request."""
+        return self.raw.get('path')
+
+
+class SQSRecord(EventView):
+    """
+    One message of an SQS event.
+    """
+    @property
+    def message_id(self):
+        """Identifier of the message."""
+        return self.raw['messageId']
+
+    @memoized_property
+    def body(self):
+        """
+        Message body decoded from JSON.
+        """
+        return loads(self.raw['body'])
+
+
+class SNSRecord(EventView):
+    """
+    One notification of an SNS event.
+    """
+    @property
+    def subject(self):
+        """Subject of the notification."""
+        return self.raw['Sns'].get('Subject')
+
+    @memoized_property
+    def message(self):
+        """
+        Notification message decoded from JSON.
+        """
+        return loads(self.raw['Sns']['Message'])
+
+
+class RecordsEvent(EventView):
+    """
+    Event with a list of ``Records`` viewed as :attr:`record_type`.
+    """
+    record_type = EventView
+
+    @memoized_property
+    def records(self):
+        """
+        Views of each record.
+        """
+        return [self.record_type(record) for record in self.raw['Records']]
+
+
+class SQSEvent(RecordsEvent):
+    """
+    Batch of SQS messages.
+    """
+    record_type = SQSRecord
+
+
+class SNSEvent(RecordsEvent):
+    """
+    SNS notifications.
+    """
+    record_type = SNSRecord
+
+
+# Event types dancers can declare, and the view of whole events and of
+# single records (for batch dancers) of each
+EVENT_TYPES = dict(
+    raw=(None, None),
+    api_gateway=(ApiGatewayEvent, None),
+    sqs=(SQSEvent, SQSRecord),
+    sns=(SNSEvent, SNSRecord),
+)
+
+
+def adapter(event_type, record=False):
+    """
+    Get the view class of an event type.
+
+    Args:
+        event_type (str): One of :data:`EVENT_TYPES`.
+        record (bool): Get the view of single records instead.
+
+    Raises:
+        ValueError: for unknown event types, or ones without records.
+
+    Returns:
+        type: View class, or ``None`` to pass events through as is.
+    """
+    if event_type not in EVENT_TYPES:
+        raise ValueError('Unknown event type {}, expected one of {}'.format(
+            event_type, ', '.join(sorted(EVENT_TYPES))
+        ))
+    view = EVENT_TYPES[event_type][1 if record else 0]
+    if record and view is None and event_type != 'raw':
+        raise ValueError('{} events have no records'.format(event_type))
+    return view
@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+"""
+Lambda layers holding the requirements of a tune, so that they are
+built and uploaded once instead of inside the package of every dancer.
+Dancers with a ``layer`` configured are packaged with only the project
+and have the latest published version of the layer attached.
+"""
+import base64
+import glob
+import hashlib
+import logging
+import os
+import shutil
+from tempfile import mkdtemp
+import zipfile
+
+from lambda_uploader.config import DEFAULT_PARAMS
+from lambda_uploader.uploader import PackageUploader
+
+from lambada.build import (
+    hash_dependencies,
+    hash_file,
+    install_dependencies,
+    normalize_zip,
+)
+from lambada.deploy import dancer_config
+
+log = logging.getLogger(__name__)
+
+# Directory of a layer that Lambda adds to the path of python runtimes
+LAYER_PREFIX = 'python'
+
+
+def site_packages(venv_dir):
+    """
+    Find the site packages of a virtualenv, the same way
+    :mod:`lambda_uploader` does when copying them into a package.
+
+    Args:
+        venv_dir (str): Path to the virtualenv.
+
+    Returns:
+        list: Site packages directories, each only once even if linked.
+    """
+    directories = []
+    seen = set()
+    patterns = ('lib/python*/site-packages', 'lib64/python*/site-packages')
+    for pattern in patterns:
+        for directory in sorted(glob.glob(os.path.join(venv_dir, pattern))):
+            # lib64 is often a link to lib
+            real_path = os.path.realpath(directory)
+            if real_path not in seen:
+                seen.add(real_path)
+                directories.append(directory)
+    return directories
+
+
+def zip_layer(venv_dir, destination):
+    """
+    Zip the site packages of a virtualenv under :data:`LAYER_PREFIX`,
+    normalized so the same dependencies always give the same zip.
+
+    Args:
+        venv_dir (str): Path to the virtualenv.
+        destination (str): Path of the layer zip to write.
+
+    Returns:
+        str: Path to the layer zip.
+    """
+    with zipfile.ZipFile(destination, 'w', zipfile.ZIP_DEFLATED) as layer:
+        for directory in site_packages(venv_dir):
+            for root, _, files in os.walk(directory):
+                for name in files:
+                    absolute_path = os.path.join(root, name)
+                    relative_path = os.path.relpath(absolute_path, directory)
+                    layer.write(
+                        absolute_path,
+                        '/'.join(
+                            [LAYER_PREFIX] + relative_path.split(os.sep)
+                        )
+                    )
+    normalize_zip(destination)
+    return destination
+
+
+def build_layer(path, requirements, destination, cache=None):
+    """
+    Install the requirements and zip them into a layer.
+
+    Args:
+        path (str): Project directory, used to find the default
+            ``requirements.txt``.
+        requirements: Path to a requirements file, a list of
+            requirements, or ``None``.
+        destination (str): Path of the layer zip to write.
+        cache (lambada.build.BuildCache): Cache to reuse installed
+            dependencies from, if any.
+
+    Returns:
+        str: Path to the layer zip.
+    """
+    if cache is not None:
+        venv_dir, _ = cache.dependencies(
+            hash_dependencies(path, requirements),
+            lambda venv_dir: install_dependencies(
+                path, requirements, venv_dir
+            )
+        )
+        return zip_layer(venv_dir, destination)
+    temp_dir = mkdtemp()
+    try:
+        venv_dir = os.path.join(temp_dir, 'venv')
+        install_dependencies(path, requirements, venv_dir)
+        return zip_layer(venv_dir, destination)
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def code_sha256(zip_file):
+    """
+    Hash a zip file the way Lambda reports ``CodeSha256``.
+    """
+    return base64.b64encode(
+        hash_file(zip_file, hashlib.sha256()).digest()
+    ).decode('ascii')
+
+
+def latest_layer_version(client, name):
+    """
+    Get the latest published version of a layer.
+
+    Args:
+        client: Lambda client.
+        name (str): Name of the layer.
+
+    Returns:
+        dict: Description of the version from ``ListLayerVersions``, or
+            ``None`` if no version has been published.
+    """
+    versions = client.list_layer_versions(
+        LayerName=name, MaxItems=1
+    ).get('LayerVersions')
+    return versions[0] if versions else None
+
+
+def layer_runtimes(tune, name):
+    """
+    Get the runtimes of the dancers using a layer, with the
+    :mod:`lambda_uploader` default for dancers that don't set one, just
+    like they are deployed.
+
+    Args:
+        tune (Lambada): Lambada object with the dancers.
+        name (str): Name of the layer.
+
+    Returns:
+        list: Sorted runtime names.
+    """
+    runtimes = set()
+    for dancer in tune.dancers.values():
+        config = dancer_config(tune, dancer)
+        if config.get('layer') == name:
+            runtimes.add(config.get('runtime') or DEFAULT_PARAMS['runtime'])
+    return sorted(runtimes)
+
+
+def publish_layer(client, name, zip_file, runtimes=None, description=''):
+    """
+    Publish a layer zip as a new version of the layer, unless the latest
+    version already has the same contents.
+
+    Args:
+        client: Lambda client.
+        name (str): Name of the layer.
+        zip_file (str): Path to the layer zip from :func:`build_layer`.
+        runtimes (list): Runtimes the layer is compatible with, if known.
+        description (str): Description of the layer version.
+
+    Returns:
+        tuple: ARN of the layer version and ``True`` if it was published.
+    """
+    latest = latest_layer_version(client, name)
+    if latest is not None:
+        content = client.get_layer_version(
+            LayerName=name, VersionNumber=latest['Version']
+        )['Content']
+        if content.get('CodeSha256') == code_sha256(zip_file):
+            log.debug('Layer %s is unchanged', name)
+            return latest['LayerVersionArn'], False
+    with open(zip_file, 'rb') as stream:
+        arguments = dict(
+            LayerName=name,
+            Description=description,
+            Content=dict(ZipFile=stream.read()),
+        )
+    if runtimes:
+        arguments['CompatibleRuntimes'] = list(runtimes)
+    response = client.publish_layer_version(**arguments)
+    return response['LayerVersionArn'], True
+
+
+def merge_layers(arns, layer_arn):
+    """
+    Put a layer version among the layers of a function, in place of any
+    other version of the same layer so the function keeps its order.
+
+    Args:
+        arns (list): Layer version ARNs the function has.
+        layer_arn (str): Layer version ARN to attach.
+
+    Returns:
+        list: The updated layer version ARNs.
+    """
+    # Layer version ARNs end with the version number
+    layer = layer_arn.rsplit(':', 1)[0]
+    merged = []
+    for arn in arns:
+        if arn.rsplit(':', 1)[0] != layer:
+            merged.append(arn)
+        elif layer_arn not in merged:
+            merged.append(layer_arn)
+    if layer_arn not in merged:
+        merged.append(layer_arn)
+    return merged
+
+
+class LayerUploader(PackageUploader):
+    """
+    Package uploader that attaches the latest version of the dancer's
+    ``layer`` to the function after uploading it, keeping any other
+    layers the function has.
+    """
+    def upload(self, pkg):
+        """
+        Upload the package and attach the layer.
+
+        Raises:
+            Exception: if the layer has never been published.
+        """
+        # pylint: disable=protected-access
+        name = self._config.config.get('layer')
+        latest = None
+        if name:
+            latest = latest_layer_version(self._lambda_client, name)
+            if latest is None:
+                raise Exception(
+                    'Layer {} has not been published, '
+                    'run lambada layer publish first'.format(name)
+                )
+        super(LayerUploader, self).upload(pkg)
+        if latest is not None:
+            client = self._lambda_client
+            # Lambda rejects configuration updates until the function
+            # is created and the upload has been applied
+            for waiter in ('function_active', 'function_updated'):
+                client.get_waiter(waiter).wait(FunctionName=self._config.name)
+            current = client.get_function_configuration(
+                FunctionName=self._config.name
+            ).get('Layers') or []
+            client.update_function_configuration(
+                FunctionName=self._config.name,
+                Layers=merge_layers(
+                    [item['Arn'] for item in current],
+                    latest['LayerVersionArn']
+                ),
+            )
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+Low overhead logging of dancer calls.  Events are only ever logged as
+previews whose cost is bounded no matter how big the event is, and
+:class:`LogSink` writes one JSON line per (sampled) invocation instead
+of the whole event and context.
+"""
+import json
+import logging
+import random
+
+from six.moves import reprlib
+
+from lambada.metrics import MetricsSink
+
+# Most characters of an event kept in a preview
+PREVIEW_CHARS = 256
+# Keys of an invocation written by LogSink, in addition to the event
+LOGGED_KEYS = (
+    'dancer',
+    'request_id',
+    'duration_ms',
+    'cpu_ms',
+    'cold_start',
+    'error',
+    'remaining_ms',
+    'timestamp',
+)
+
+
+class BoundedRepr(reprlib.Repr):
+    """
+    :class:`reprlib.Repr` that also bounds the event views of
+    :mod:`lambada.events` by looking into their raw event.
+    """
+    # pylint: disable=too-many-instance-attributes
+    def repr_instance(self, x, level):  # pylint: disable=invalid-name
+        """
+        Represent the raw event of views, and other objects as usual.
+        """
+        raw = getattr(x, 'raw', None)
+        if isinstance(raw, dict):
+            return '{}({})'.format(type(x).__name__, self.repr1(raw, level))
+        return reprlib.Repr.repr_instance(self, x, level)
+
+
+def _make_repr(limit):
+    """
+    Build a :class:`BoundedRepr` that only looks at as much of an
+    object as can fit in ``limit`` characters.
+    """
+    bounded = BoundedRepr()
+    bounded.maxlevel = 4
+    bounded.maxstring = bounded.maxother = bounded.maxlong = limit
+    bounded.maxdict = bounded.maxlist = bounded.maxtuple = 10
+    bounded.maxset = bounded.maxfrozenset = bounded.maxdeque = 10
+    bounded.maxarray = 10
+    return bounded
+
+
+_REPR = _make_repr(PREVIEW_CHARS)
+
+
+def preview(value, limit=PREVIEW_CHARS):
+    """
+    Represent a value in at most ``limit`` characters, without building
+    the full representation of big strings, lists, or dictionaries.
+
+    Args:
+        value: Event or other value to preview.
+        limit (int): Most characters to return.
+
+    Returns:
+        str: Representation, with ``...`` wherever it was cut short.
+    """
+    bounded = _REPR if limit == PREVIEW_CHARS else _make_repr(limit)
+    text = bounded.repr(value)
+    if len(text) > limit:
+        text = text[:max(0, limit - 3)] + '...'
+    return text
+
+
+class LogSink(MetricsSink):
+    """
+    Metrics sink that logs each invocation as a line of JSON, with the
+    request id, timings, and a preview of the event.  Invocations can
+    be sampled, overall or by dancer, though ones that raised are
+    always logged.
+    """
+    # Have :class:`lambada.Lambada` add the ``event`` to invocations
+    include_event = True
+
+    def __init__(
+            self,
+            logger=None,
+            level=logging.INFO,
+            sample_rate=1.0,
+            sample_rates=None,
+            preview_chars=PREVIEW_CHARS
+    ):
+        """
+        Args:
+            logger (logging.Logger): Logger to write to, by default the
+                ``lambada.invocations`` logger.
+            level (int): Level to log invocations at.
+            sample_rate (float): Fraction of invocations to log.
+            sample_rates (dict): Sample rates of specific dancers.
+            preview_chars (int): Most characters of the event to log,
+                ``0`` to leave it out.
+        """
+        # pylint: disable=too-many-arguments
+        self.logger = logger or logging.getLogger('lambada.invocations')
+        self.level = level
+        self.sample_rate = sample_rate
+        self.sample_rates = sample_rates or {}
+        self.preview_chars = preview_chars
+
+    def sampled(self, invocation):
+        """
+        Decide whether to log an invocation.
+        """
+        if invocation.get('error'):
+            return True
+        rate = self.sample_rates.get(invocation['dancer'], self.sample_rate)
+        return rate >= 1 or random.random() < rate
+
+    def format(self, invocation):
+        """
+        Build the document logged for an invocation.
+
+        Returns:
+            dict: The :data:`LOGGED_KEYS` of the invocation, and an
+                ``event`` preview unless disabled.
+        """
+        document = {
+            key: invocation.get(key) for key in LOGGED_KEYS
+        }
+        if self.preview_chars:
+            document['event'] = preview(
+                invocation.get('event'), self.preview_chars
+            )
+        return document
+
+    def emit(self, invocation):
+        """
+        Log the invocation if the logger is enabled and it is sampled.
+        """
+        if not self.logger.isEnabledFor(self.level):
+            return
+        if not self.sampled(invocation):
+            return
+        self.logger.log(
+            self.level,
+            '%s',
+            json.dumps(self.format(invocation), sort_keys=True, default=repr)
+        )
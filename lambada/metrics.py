@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+Sinks for the invocation metrics :class:`lambada.Lambada` records around
+every dancer call when given a ``metrics_sink``.
+
+Each invocation is a dictionary with the ``dancer`` name, wall time
+(``duration_ms``), CPU time (``cpu_ms``), whether it was the first call
+in the container (``cold_start``), the milliseconds the context had left
+when the call started (``remaining_ms``, ``None`` without a timeout),
+whether it raised (``error``), a ``timestamp`` in milliseconds, and
+the ``request_id`` of the context.  Sinks with a true ``include_event``
+attribute also get the ``event`` itself.  :class:`MultiSink` sends
+invocations to several sinks, such as an :class:`EMFSink` for metrics
+and a :class:`lambada.logs.LogSink` for logs.
+"""
+import json
+import logging
+import sys
+
+log = logging.getLogger(__name__)
+
+# Metric names and units as reported to CloudWatch
+EMF_METRICS = (
+    ('duration_ms', 'Duration', 'Milliseconds'),
+    ('cpu_ms', 'CPUTime', 'Milliseconds'),
+    ('cold_start', 'ColdStart', 'Count'),
+    ('error', 'Errors', 'Count'),
+    ('remaining_ms', 'RemainingTimeAtStart', 'Milliseconds'),
+)
+
+
+class MetricsSink(object):
+    """
+    Base class for somewhere to send invocation metrics.
+    """
+    # pylint: disable=too-few-public-methods
+    def emit(self, invocation):
+        """
+        Record the metrics of one invocation.
+
+        Args:
+            invocation (dict): Metrics described in :mod:`lambada.metrics`.
+        """
+        raise NotImplementedError
+
+
+class EMFSink(MetricsSink):
+    """
+    Writes each invocation as a CloudWatch Embedded Metric Format log
+    line, which CloudWatch turns into metrics by dancer without any API
+    calls from the function.
+    """
+    # pylint: disable=too-few-public-methods
+    def __init__(self, namespace='Lambada', stream=None):
+        """
+        Args:
+            namespace (str): CloudWatch namespace of the metrics.
+            stream: File like object to write to, stdout by default.
+        """
+        self.namespace = namespace
+        self.stream = stream
+
+    def format(self, invocation):
+        """
+        Build the Embedded Metric Format document of an invocation.
+
+        Returns:
+            dict: Document with the metrics and a ``Dancer`` dimension.
+        """
+        document = dict(
+            _aws=dict(
+                Timestamp=invocation['timestamp'],
+                CloudWatchMetrics=[dict(
+                    Namespace=self.namespace,
+                    Dimensions=[['Dancer']],
+                    Metrics=[
+                        dict(Name=name, Unit=unit)
+                        for key, name, unit in EMF_METRICS
+                        if invocation.get(key) is not None
+                    ],
+                )],
+            ),
+            Dancer=invocation['dancer'],
+        )
+        for key, name, _ in EMF_METRICS:
+            if invocation.get(key) is not None:
+                document[name] = int(invocation[key]) \
+                    if isinstance(invocation[key], bool) else invocation[key]
+        return document
+
+    def emit(self, invocation):
+        """
+        Write the invocation as a line of JSON.
+        """
+        stream = self.stream or sys.stdout
+        stream.write(json.dumps(self.format(invocation)) + '\n')
+
+
+class MemorySink(MetricsSink):
+    """
+    Keeps invocations in :attr:`invocations`, for tests and local runs.
+    """
+    def __init__(self):
+        """Start without any invocations."""
+        self.invocations = []
+
+    def emit(self, invocation):
+        """
+        Add the invocation to the list.
+        """
+        self.invocations.append(invocation)
+
+    def for_dancer(self, dancer):
+        """
+        Get the recorded invocations of one dancer.
+        """
+        return [
+            invocation for invocation in self.invocations
+            if invocation['dancer'] == dancer
+        ]
+
+    def clear(self):
+        """
+        Forget the recorded invocations.
+        """
+        del self.invocations[:]
+
+
+class MultiSink(MetricsSink):
+    """
+    Sends every invocation to each of several sinks, passing the
+    ``event`` only to the sinks that ask for it.
+    """
+    # pylint: disable=too-few-public-methods
+    def __init__(self, *sinks):
+        """
+        Args:
+            sinks: :class:`MetricsSink` objects to send invocations to.
+        """
+        self.sinks = sinks
+        self.include_event = any(
+            getattr(sink, 'include_event', False) for sink in sinks
+        )
+
+    def emit(self, invocation):
+        """
+        Emit the invocation to each sink, even if an earlier one fails.
+        """
+        without_event = dict(invocation)
+        without_event.pop('event', None)
+        # One broken sink must not cost the others their invocation
+        # pylint: disable=broad-except
+        for sink in self.sinks:
+            try:
+                sink.emit(
+                    invocation if getattr(sink, 'include_event', False)
+                    else without_event
+                )
+            except Exception:
+                log.warning('Unable to emit to %r', sink, exc_info=True)
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+Replaying many recorded events through a dancer, optionally spread
+across a pool of worker processes that each import the tune once.
+"""
+import json
+import multiprocessing
+import os
+import sys
+import traceback
+
+from six import text_type
+
+from lambada.common import get_lambada_class, LambdaContext
+
+# Tune loaded by each worker process, see :func:`init_worker`
+_worker_tune = None  # pylint: disable=invalid-name
+
+
+def add_project_path(path):
+    """
+    Make the project directory importable like it is in Lambda.
+
+    Args:
+        path (str): Path to the lambada project file or directory.
+    """
+    path = os.path.abspath(path)
+    if os.path.isfile(path):
+        path = os.path.dirname(path)
+    if path not in sys.path:
+        sys.path.append(path)
+
+
+def init_worker(path):
+    """
+    Load the tune once in a worker process.
+
+    Args:
+        path (str): Path to the lambada project.
+    """
+    global _worker_tune  # pylint: disable=global-statement,invalid-name
+    add_project_path(path)
+    _worker_tune = get_lambada_class(path)
+
+
+def replay_event(tune, dancer, index, line, timeout=None):
+    """
+    Decode one event and call the dancer with it.
+
+    Args:
+        tune (Lambada): Lambada object with the dancer.
+        dancer (str): Name of the dancer to call.
+        index (int): Position of the event in the input.
+        line (str): JSON encoded event.
+        timeout (int): Seconds the simulated context allows.
+
+    Returns:
+        dict: The ``index`` with either the ``result`` of the dancer, made
+            safe to encode as JSON, or the ``error`` and ``traceback`` it
+            raised.
+    """
+    # Every event reports its own error instead of stopping the replay
+    # pylint: disable=broad-except
+    try:
+        result = tune(
+            json.loads(line),
+            LambdaContext(function_name=dancer, timeout=timeout)
+        )
+        # Results have to cross processes and end up as JSON anyway
+        result = json.loads(json.dumps(result, default=repr))
+    except Exception as error:
+        return dict(
+            index=index,
+            error=repr(error),
+            traceback=traceback.format_exc(),
+        )
+    return dict(index=index, result=result)
+
+
+def _replay_in_worker(args):
+    """
+    Replay an event with the tune loaded by :func:`init_worker`.
+    """
+    return replay_event(_worker_tune, *args)
+
+
+def read_events(stream):
+    """
+    Read newline delimited events from a stream, one at a time.
+
+    Returns:
+        generator: ``(index, line)`` tuples, skipping blank lines.
+    """
+    index = 0
+    for line in stream:
+        if line.strip():
+            yield index, line
+            index += 1
+
+
+def replay(
+        path,
+        tune,
+        dancer,
+        stream,
+        workers=1,
+        chunksize=10,
+        timeout=None
+):
+    """
+    Replay newline delimited JSON events through a dancer.
+
+    Args:
+        path (str): Path to the lambada project, loaded by each worker.
+        tune (Lambada): Already loaded tune, used when there is only
+            one worker.
+        dancer (str): Name of the dancer to call.
+        stream: File like object of newline delimited JSON events.
+        workers (int): Number of worker processes.
+        chunksize (int): Number of events sent to a worker at a time.
+        timeout (int): Seconds the simulated context of each event allows.
+
+    Returns:
+        generator: Results from :func:`replay_event` in input order.
+    """
+    # pylint: disable=too-many-arguments
+    events = read_events(stream)
+    if workers <= 1:
+        add_project_path(path)
+        for index, line in events:
+            yield replay_event(tune, dancer, index, line, timeout)
+        return
+    pool = multiprocessing.Pool(workers, init_worker, (path,))
+    try:
+        for result in pool.imap(
+                _replay_in_worker,
+                (
+                    (dancer, index, line, timeout)
+                    for index, line in events
+                ),
+                chunksize
+        ):
+            yield result
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def format_result(result):
+    """
+    Encode a replay result as a line of JSON.
+    """
+    return text_type(json.dumps(result, sort_keys=True)) + '\n'
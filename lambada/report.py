@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+"""
+Reports on the contents of built packages: where the compressed and
+uncompressed bytes go by top-level package, which files could be
+stripped, and how long each top-level module takes to import in a
+fresh interpreter, to keep packages within the Lambda size limits and
+cold starts short.
+"""
+from __future__ import division
+from collections import OrderedDict
+import os
+import posixpath
+import shutil
+import subprocess
+import sys
+from tempfile import mkdtemp
+import zipfile
+
+# Lambda limits on the zip uploaded directly and on the unzipped code
+ZIP_LIMIT = 50 * 1024 * 1024
+UNZIPPED_LIMIT = 250 * 1024 * 1024
+# Names of directories holding tests and documentation
+TEST_DIRS = ('test', 'tests', 'testing')
+DOC_DIRS = ('doc', 'docs', 'examples')
+DOC_EXTENSIONS = ('.md', '.rst')
+BINARY_EXTENSIONS = ('.so', '.pyd', '.dylib', '.dll')
+# Kinds of files that usually aren't needed at run time, in the order
+# they are checked
+STRIPPABLE = ('pycache', 'dist-info', 'tests', 'docs', 'binaries')
+# Imports a module given on the command line and writes the seconds it
+# took as the last line of output
+IMPORT_SCRIPT = '\n'.join([
+    'import importlib, json, sys',
+    'from timeit import default_timer',
+    'start = default_timer()',
+    'importlib.import_module(sys.argv[1])',
+    "sys.stdout.write('\\n' + json.dumps(default_timer() - start))",
+])
+
+
+def classify(name):
+    """
+    Work out whether a file in a package could be stripped.
+
+    Binaries are flagged since their debug symbols can usually be
+    stripped, though the binaries themselves are needed.
+
+    Args:
+        name (str): Path of the file in the zip.
+
+    Returns:
+        str: One of :data:`STRIPPABLE`, or ``None`` for files that are
+            needed.
+    """
+    parts = name.split('/')
+    directories, filename = parts[:-1], parts[-1]
+    extension = posixpath.splitext(filename)[1]
+    if '__pycache__' in directories or extension in ('.pyc', '.pyo'):
+        return 'pycache'
+    if any(part.endswith(('.dist-info', '.egg-info')) for part in parts):
+        return 'dist-info'
+    if (any(part in TEST_DIRS for part in directories) or
+            filename == 'conftest.py' or
+            filename.startswith('test_') or filename.endswith('_test.py')):
+        return 'tests'
+    if (any(part in DOC_DIRS for part in directories) or
+            extension in DOC_EXTENSIONS):
+        return 'docs'
+    if extension in BINARY_EXTENSIONS or '.so.' in filename:
+        return 'binaries'
+    return None
+
+
+def top_level(name):
+    """
+    Get the top-level package or module a file in a package belongs to.
+    """
+    first = name.split('/')[0]
+    if '/' in name or first.endswith(('.dist-info', '.egg-info')):
+        return first
+    # Modules and extensions, such as six.py or _cffi.abi3.so
+    return first.split('.')[0] or first
+
+
+def _add_size(totals, info):
+    """
+    Add the size of a zip entry to a dictionary of totals.
+    """
+    totals['files'] = totals.get('files', 0) + 1
+    totals['compressed_bytes'] = (
+        totals.get('compressed_bytes', 0) + info.compress_size
+    )
+    totals['uncompressed_bytes'] = (
+        totals.get('uncompressed_bytes', 0) + info.file_size
+    )
+
+
+def importable_modules(names):
+    """
+    Find the top-level modules of a package that can be imported.
+
+    Args:
+        names (list): Paths of the files in the zip.
+
+    Returns:
+        list: Sorted module names.
+    """
+    modules = set()
+    for name in names:
+        parts = name.split('/')
+        if len(parts) == 2 and parts[1] == '__init__.py':
+            modules.add(parts[0])
+        elif len(parts) == 1 and (
+                posixpath.splitext(name)[1] in ('.py', '.so', '.pyd')
+        ):
+            modules.add(top_level(name))
+    return sorted(module for module in modules if module)
+
+
+def import_time(directory, module):
+    """
+    Time importing a module from an unpacked package in a new python
+    process, so nothing is imported already.  The time includes
+    everything the module imports.
+
+    Args:
+        directory (str): Unpacked package to import from.
+        module (str): Name of the module.
+
+    Returns:
+        tuple: Seconds taken, or ``None`` with the last line of the
+            error if the import failed.
+    """
+    env = os.environ.copy()
+    env['PYTHONPATH'] = directory
+    process = subprocess.Popen(
+        [sys.executable, '-c', IMPORT_SCRIPT, module],
+        cwd=directory,
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE
+    )
+    stdout, stderr = process.communicate()
+    if process.returncode:
+        lines = stderr.decode('UTF-8', 'replace').strip().splitlines()
+        return None, lines[-1] if lines else 'Import failed'
+    return float(stdout.decode('UTF-8').strip().splitlines()[-1]), None
+
+
+def import_times(zip_file, modules):
+    """
+    Unpack a package and time importing each of the given modules.
+
+    Returns:
+        dict: Module names to their :func:`import_time`.
+    """
+    directory = mkdtemp()
+    try:
+        with zipfile.ZipFile(zip_file) as archive:
+            archive.extractall(directory)
+        return {module: import_time(directory, module) for module in modules}
+    finally:
+        shutil.rmtree(directory)
+
+
+def package_report(zip_file, imports=True):
+    """
+    Break down what is in a built package.
+
+    Args:
+        zip_file (str): Path to the package.
+        imports (bool): Also time the import of each top-level module.
+
+    Returns:
+        dict: Sizes of the zip on disk (``zip_bytes``) and unpacked
+            (``uncompressed_bytes``), the sizes of each top-level entry
+            in ``packages`` from biggest to smallest, with the bytes
+            that could be removed (``strippable_bytes``) and its
+            ``import_ms``, and the sizes of each kind of
+            :data:`STRIPPABLE` files in ``strippable``.
+    """
+    packages = {}
+    strippable = OrderedDict((kind, {}) for kind in STRIPPABLE)
+    with zipfile.ZipFile(zip_file) as archive:
+        infos = [info for info in archive.infolist()
+                 if not info.filename.endswith('/')]
+    for info in infos:
+        package = packages.setdefault(
+            top_level(info.filename),
+            dict(name=top_level(info.filename), strippable_bytes=0)
+        )
+        _add_size(package, info)
+        kind = classify(info.filename)
+        if kind is not None:
+            _add_size(strippable[kind], info)
+        # Binaries are needed, only their debug symbols aren't
+        if kind not in (None, 'binaries'):
+            package['strippable_bytes'] += info.file_size
+
+    if imports:
+        names = [info.filename for info in infos]
+        timings = import_times(zip_file, importable_modules(names))
+        for module, (seconds, error) in timings.items():
+            packages[module]['import_ms'] = (
+                None if seconds is None else seconds * 1000
+            )
+            if error:
+                packages[module]['import_error'] = error
+    uncompressed = sum(info.file_size for info in infos)
+    return dict(
+        zip_file=zip_file,
+        zip_bytes=os.path.getsize(zip_file),
+        uncompressed_bytes=uncompressed,
+        zip_limit_percent=os.path.getsize(zip_file) / ZIP_LIMIT * 100,
+        uncompressed_limit_percent=uncompressed / UNZIPPED_LIMIT * 100,
+        packages=sorted(
+            packages.values(),
+            key=lambda package: (-package['compressed_bytes'], package['name'])
+        ),
+        strippable=strippable,
+    )
+
+
+def format_size(size):
+    """
+    Format a number of bytes for people.
+    """
+    if size < 1024:
+        return '{} B'.format(size)
+    if size < 1024 * 1024:
+        return '{:.1f} KB'.format(size / 1024)
+    return '{:.1f} MB'.format(size / 1024 / 1024)
+
+
+def format_report(report, limit=20):
+    """
+    Format a package report as a human readable table.
+
+    Args:
+        report (dict): Report from :func:`package_report`.
+        limit (int): Number of the biggest packages to show.
+
+    Returns:
+        list: Lines of the table.
+    """
+    lines = [
+        '{}: {} zipped ({:.1f}% of the {} limit), {} unzipped '
+        '({:.1f}% of the {} limit)'.format(
+            report['zip_file'],
+            format_size(report['zip_bytes']),
+            report['zip_limit_percent'],
+            format_size(ZIP_LIMIT),
+            format_size(report['uncompressed_bytes']),
+            report['uncompressed_limit_percent'],
+            format_size(UNZIPPED_LIMIT),
+        ),
+        '',
+        '{:>12}  {:>12}  {:>12}  {:>10}  {}'.format(
+            'compressed', 'unzipped', 'strippable', 'import ms', 'package'
+        ),
+    ]
+    for package in report['packages'][:limit]:
+        import_ms = package.get('import_ms')
+        lines.append('{:>12}  {:>12}  {:>12}  {:>10}  {}{}'.format(
+            format_size(package['compressed_bytes']),
+            format_size(package['uncompressed_bytes']),
+            format_size(package['strippable_bytes']),
+            '' if import_ms is None else '{:.2f}'.format(import_ms),
+            package['name'],
+            ' ({})'.format(package['import_error'])
+            if package.get('import_error') else '',
+        ))
+    hidden = report['packages'][limit:]
+    if hidden:
+        lines.append('{:>12}  {:>12}  {:>12}  {:>10}  {} more'.format(
+            format_size(sum(item['compressed_bytes'] for item in hidden)),
+            format_size(sum(item['uncompressed_bytes'] for item in hidden)),
+            format_size(sum(item['strippable_bytes'] for item in hidden)),
+            '',
+            len(hidden),
+        ))
+
+    lines.extend(['', 'Could be stripped:'])
+    for kind, totals in report['strippable'].items():
+        if totals:
+            lines.append('{:>12}  {:>12}  {:>6} files  {}{}'.format(
+                format_size(totals['compressed_bytes']),
+                format_size(totals['uncompressed_bytes']),
+                totals['files'],
+                kind,
+                ' (debug symbols)' if kind == 'binaries' else '',
+            ))
+    return lines
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+Routing of Lambda functions to dancers.  Deployed function names can
+carry a stage suffix (``hello-prod``) or come as a qualified name or
+ARN, which are normalized back to the dancer name.  Packages built
+for a tune with ``bootstrap`` enabled include a routing manifest,
+precompiled from the dancers, so that :func:`handler` only imports
+the module of the dancer being called instead of the whole tune.
+"""
+from importlib import import_module
+import io
+import json
+import logging
+import os
+import sys
+
+from six import iteritems, text_type
+
+log = logging.getLogger(__name__)
+
+# Handler to deploy functions with to route through the manifest
+BOOTSTRAP_HANDLER = 'lambada.routing.handler'
+# Name of the manifest in the package, next to the bouncer configuration
+ROUTES_FILE = '_lambada_routes.json'
+# Characters that can join a dancer name and a stage
+STAGE_SEPARATORS = ('-', '_')
+
+# Loaded manifest and the targets resolved for each function name
+_routes = {}  # pylint: disable=invalid-name
+_targets = {}  # pylint: disable=invalid-name
+
+
+def function_name(name):
+    """
+    Get the plain function name from a qualified name or ARN.
+
+    Args:
+        name (str): Function name, qualified name, or ARN.
+
+    Returns:
+        str: The name of the function.
+    """
+    parts = name.split(':')
+    if name.startswith('arn:') and len(parts) >= 7:
+        return parts[6]
+    return parts[0]
+
+
+def normalize_function_name(name, stages=()):
+    """
+    Get the dancer name of a deployed function, removing any qualifier
+    and the first matching stage suffix.
+
+    Args:
+        name (str): Function name, qualified name, or ARN.
+        stages (list): Stage names that may be appended to the dancer
+            name with one of :data:`STAGE_SEPARATORS`.
+
+    Returns:
+        str: The normalized name.
+    """
+    name = function_name(name)
+    for stage in stages:
+        for separator in STAGE_SEPARATORS:
+            suffix = separator + stage
+            if name.endswith(suffix) and len(name) > len(suffix):
+                return name[:-len(suffix)]
+    return name
+
+
+def _handler_target(tune):
+    """
+    Get the ``module:attribute`` target of the tune itself.
+    """
+    module_name, _, attribute = tune.config['handler'].rpartition('.')
+    return '{}:{}'.format(module_name, attribute)
+
+
+def package_module_name(module, project_dir):
+    """
+    Get the name a module is imported by in the package, which differs
+    from ``__name__`` for the tune module loaded by
+    :func:`lambada.common.get_lambada_class`.
+
+    Args:
+        module: Loaded module.
+        project_dir (str): Root of the package.
+
+    Returns:
+        str: Dotted module name, or ``None`` if the module isn't part
+            of the project.
+    """
+    filename = getattr(module, '__file__', None)
+    if not filename:
+        return None
+    relative_path = os.path.relpath(os.path.abspath(filename), project_dir)
+    if relative_path.startswith(os.pardir):
+        return None
+    parts = os.path.splitext(relative_path)[0].split(os.sep)
+    if parts[-1] == '__init__':
+        parts.pop()
+    return '.'.join(parts)
+
+
+def dancer_target(tune, dancer, project_dir):
+    """
+    Work out what the bootstrap handler should import to call a dancer.
+
+    Dancers are called directly when they are a module level attribute
+    of the project (or a lazy dancer's path), and through the tune when
+    they need it to enforce a budget, send metrics, or adapt the event
+    of a lazy dancer.
+
+    Args:
+        tune (Lambada): Lambada object the dancer belongs to.
+        dancer (Dancer): Dancer to route to.
+        project_dir (str): Root of the package.
+
+    Returns:
+        str: Target as ``module:attribute``.
+    """
+    if tune.metrics_sink is not None or dancer.budget_ms is not None:
+        return _handler_target(tune)
+    # Lazy dancers have the path of their function instead
+    if getattr(dancer, 'path', None):
+        if dancer.event_type is not None:
+            return _handler_target(tune)
+        module_name, _, attribute = dancer.path.rpartition('.')
+        return '{}:{}'.format(module_name, attribute)
+    module = sys.modules.get(getattr(dancer.function, '__module__', None))
+    attribute = getattr(dancer.function, '__name__', None)
+    name = package_module_name(module, project_dir) if module else None
+    if name is None or getattr(module, attribute, None) is not dancer:
+        return _handler_target(tune)
+    return '{}:{}'.format(name, attribute)
+
+
+def build_routes(tune, project_dir):
+    """
+    Precompile the routing manifest of a tune.
+
+    Args:
+        tune (Lambada): Lambada object to route to.
+        project_dir (str): Root of the package.
+
+    Returns:
+        dict: The tune's ``handler`` target, the ``stages`` stripped
+            from function names, and the target of each dancer by name
+            in ``routes``.
+    """
+    return dict(
+        handler=_handler_target(tune),
+        stages=list(tune.config.get('stages') or []),
+        routes={
+            name: dancer_target(tune, dancer, project_dir)
+            for name, dancer in iteritems(tune.dancers)
+        },
+    )
+
+
+def write_routes(tune, project_dir):
+    """
+    Write the routing manifest of a tune to :data:`ROUTES_FILE` in the
+    project.
+
+    Returns:
+        str: Path to the manifest.
+    """
+    path = os.path.join(project_dir, ROUTES_FILE)
+    with io.open(path, 'w', encoding='UTF-8') as stream:
+        stream.write(text_type(json.dumps(
+            build_routes(tune, project_dir), indent=2, sort_keys=True
+        )))
+    return path
+
+
+def load_routes(path=None):
+    """
+    Load a routing manifest, by default the one in the working
+    directory, which is the package root in Lambda.
+    """
+    if path is None:
+        path = os.environ.get(
+            'LAMBADA_ROUTES', os.path.join(os.getcwd(), ROUTES_FILE)
+        )
+    with io.open(path, encoding='UTF-8') as stream:
+        return json.load(stream)
+
+
+def resolve(routes, name):
+    """
+    Find the target for a function name in a routing manifest, falling
+    back to the tune itself for names it doesn't know.
+
+    Args:
+        routes (dict): Manifest from :func:`build_routes`.
+        name (str): Function name from the Lambda context.
+
+    Returns:
+        str: Target as ``module:attribute``.
+    """
+    targets = routes['routes']
+    if name in targets:
+        return targets[name]
+    return targets.get(
+        normalize_function_name(name, routes['stages']), routes['handler']
+    )
+
+
+def load_target(target):
+    """
+    Import a ``module:attribute`` target.
+    """
+    module_name, _, attribute = target.partition(':')
+    return getattr(import_module(module_name), attribute)
+
+
+def handler(event, context):
+    """
+    Lambda handler that routes each function to its dancer using the
+    manifest, importing only the dancer's module the first time.
+
+    Args:
+        event: Amazon event passed in
+        context: AWS Lambda context object passed in.
+    """
+    name = context.function_name
+    target = _targets.get(name)
+    if target is None:
+        if not _routes:
+            _routes.update(load_routes())
+        path = resolve(_routes, name)
+        log.debug('Routing %s to %s', name, path)
+        target = _targets[name] = load_target(path)
+    return target(event, context)
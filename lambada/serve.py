@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+Local HTTP server that invokes dancers through the same path as the
+AWS Lambda Invoke API, so load generators and SDKs pointed at it with
+a custom endpoint can exercise a tune before it is deployed.  Requests
+are handled by a pool of worker processes that each load the tune
+once and stay warm, like Lambda containers.
+"""
+import json
+import logging
+import multiprocessing
+import re
+import traceback
+
+from six.moves import BaseHTTPServer, socketserver
+
+from lambada import replay
+from lambada.common import LambdaContext
+from lambada.deploy import dancer_config
+from lambada.routing import function_name, normalize_function_name
+
+log = logging.getLogger(__name__)
+
+# Invoke API path, the function may be a name, name:qualifier, or ARN
+INVOKE_PATH_RE = re.compile(r'^/2015-03-31/functions/([^/?]+)/invocations')
+
+
+def invoke(tune, dancer, payload):
+    """
+    Call a dancer the way Lambda would with a request payload.
+
+    Args:
+        tune (Lambada): Lambada object with the dancer.
+        dancer (str): Name of the dancer to call.
+        payload (bytes): JSON encoded event, ``None`` if empty.
+
+    Returns:
+        tuple: HTTP status, ``True`` if the dancer raised, and the JSON
+            encoded response body.
+    """
+    name = dancer
+    if name not in tune.dancers:
+        # Deployed names may carry a stage suffix, like they do in Lambda
+        name = normalize_function_name(dancer, tune.config['stages'])
+    if name not in tune.dancers:
+        return 404, False, json.dumps(dict(
+            Type='User',
+            message='Function not found: {}'.format(dancer),
+        ))
+    # Errors are reported to the caller like Lambda does
+    # pylint: disable=broad-except
+    try:
+        event = json.loads(payload.decode('UTF-8')) if payload else None
+        context = LambdaContext(
+            function_name=dancer,
+            timeout=dancer_config(tune, tune.dancers[name])['timeout'],
+        )
+        result = tune(event, context)
+        return 200, False, json.dumps(result, default=repr)
+    except Exception as error:
+        return 200, True, json.dumps(dict(
+            errorMessage=str(error),
+            errorType=type(error).__name__,
+            stackTrace=traceback.format_exc().splitlines(),
+        ))
+
+
+def _invoke_in_worker(dancer, payload):
+    """
+    Invoke a dancer with the tune loaded by
+    :func:`lambada.replay.init_worker`.
+    """
+    # pylint: disable=protected-access
+    return invoke(replay._worker_tune, dancer, payload)
+
+
+class InvokeHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """
+    Handles Invoke API requests by passing them to the server's pool.
+    """
+    def do_POST(self):  # pylint: disable=invalid-name
+        """
+        Invoke the dancer named in the path with the request body.
+        """
+        match = INVOKE_PATH_RE.match(self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+        payload = self.rfile.read(length) if length else None
+        if match is None:
+            self.respond(404, json.dumps(dict(
+                Type='User', message='Unknown path {}'.format(self.path)
+            )))
+            return
+        dancer = function_name(match.group(1))
+        invocation_type = self.headers.get(
+            'X-Amz-Invocation-Type', 'RequestResponse'
+        )
+        if invocation_type == 'DryRun':
+            self.respond(204, '')
+            return
+        if invocation_type == 'Event':
+            self.server.pool.apply_async(
+                _invoke_in_worker, (dancer, payload)
+            )
+            self.respond(202, '')
+            return
+        status, failed, body = self.server.pool.apply(
+            _invoke_in_worker, (dancer, payload)
+        )
+        self.respond(status, body, failed)
+
+    def respond(self, status, body, failed=False):
+        """
+        Send a JSON response.
+
+        Args:
+            status (int): HTTP status code.
+            body (str): JSON encoded body.
+            failed (bool): Whether the dancer raised, which Lambda
+                reports with the ``X-Amz-Function-Error`` header.
+        """
+        body = body.encode('UTF-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if failed:
+            self.send_header('X-Amz-Function-Error', 'Unhandled')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # pylint: disable=W0622
+        """
+        Log requests at debug level instead of writing each to stderr.
+        """
+        log.debug(format, *args)
+
+
+class InvokeServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """
+    HTTP server handling each request in a thread, with the worker
+    processes in :attr:`pool`.
+    """
+    daemon_threads = True
+
+    def __init__(self, path, address, workers=1):
+        """
+        Starts the worker processes and binds the server.
+
+        Args:
+            path (str): Path to the lambada project.
+            address (tuple): Host and port to listen on, port ``0``
+                picks a free one.
+            workers (int): Number of worker processes.
+        """
+        self.pool = multiprocessing.Pool(
+            workers, replay.init_worker, (path,)
+        )
+        try:
+            BaseHTTPServer.HTTPServer.__init__(self, address, InvokeHandler)
+        except Exception:
+            self.pool.terminate()
+            raise
+
+    def server_close(self):
+        """
+        Stop the worker processes along with the server.
+        """
+        BaseHTTPServer.HTTPServer.server_close(self)
+        self.pool.terminate()
+        self.pool.join()
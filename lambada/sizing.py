@@ -0,0 +1,296 @@
+# -*- coding: utf-8 -*-
+"""
+Right-sizing of dancer ``memory`` and ``timeout`` settings from local
+runs.  Sample events are replayed through a dancer in process, timing
+the wall and CPU time of each call and tracking peak memory, and the
+measurements are turned into recommended settings with headroom.
+
+Lambda gives a function CPU in proportion to its memory, a full vCPU
+at :data:`FULL_CPU_MEMORY` megabytes, so the recommended timeout of a
+CPU-bound dancer allows for the slower CPU of a smaller function.
+"""
+from __future__ import division
+import difflib
+import inspect
+import io
+import math
+import os
+import re
+from timeit import default_timer
+
+from lambada.bench import (
+    invoke,
+    peak_rss,
+    QuietOutput,
+    summarize,
+    trace_call,
+)
+from lambada.deploy import dancer_config
+
+try:
+    from time import process_time
+except ImportError:  # pragma: no cover
+    # Python 2 only has clock for CPU time
+    from time import clock as process_time
+
+# Memory limits of a Lambda function in megabytes, and the step to
+# round recommendations up to
+MIN_MEMORY = 128
+MAX_MEMORY = 10240
+MEMORY_STEP = 64
+# Memory at which a function gets a whole vCPU
+FULL_CPU_MEMORY = 1769
+# Longest timeout of a Lambda function in seconds
+MAX_TIMEOUT = 900
+# Share of wall time spent on CPU for a dancer to count as CPU-bound
+CPU_BOUND_RATIO = 0.8
+# Extra share of the measured values to allow for by default
+DEFAULT_HEADROOM = 0.3
+
+MEGABYTE = 1024 * 1024
+
+
+def measure(tune, dancer, events, iterations=None, warmup=1):
+    """
+    Replay events through a dancer, measuring the wall and CPU time of
+    every call, then the peak allocations of one traced call per event
+    so that tracing doesn't skew the timings.
+
+    Args:
+        tune (Lambada): Lambada object with the dancer.
+        dancer (str): Name of the dancer to measure.
+        events (list): Events to replay, cycled through as needed.
+        iterations (int): Number of measured calls, by default one per
+            event.
+        warmup (int): Number of unmeasured calls before measuring.
+
+    Returns:
+        dict: ``calls``, ``errors``, ``wall_ms`` and ``cpu_ms``
+            summaries, ``cpu_ratio``, and ``memory`` with the peak RSS
+            before and after the calls and the peak bytes allocated by
+            a call.
+    """
+    events = events or [None]
+    iterations = iterations or len(events)
+    wall, cpu = [], []
+    errors = 0
+    baseline_rss = peak_rss()
+    with QuietOutput():
+        for index in range(warmup):
+            invoke(tune, dancer, events[index % len(events)])
+        for index in range(iterations):
+            start, cpu_start = default_timer(), process_time()
+            if not invoke(tune, dancer, events[index % len(events)]):
+                errors += 1
+            cpu.append((process_time() - cpu_start) * 1000)
+            wall.append((default_timer() - start) * 1000)
+        allocations = [
+            trace_call(tune, dancer, event)
+            for event in events[:iterations]
+        ]
+    allocations = [value for value in allocations if value is not None]
+    return dict(
+        calls=iterations,
+        errors=errors,
+        wall_ms=summarize(wall),
+        cpu_ms=summarize(cpu),
+        cpu_ratio=sum(cpu) / sum(wall) if sum(wall) else None,
+        memory=dict(
+            baseline_rss_bytes=baseline_rss,
+            peak_rss_bytes=peak_rss(),
+            peak_allocated_bytes=max(allocations) if allocations else None,
+        ),
+    )
+
+
+def round_up(value, step):
+    """
+    Round a number up to a multiple of ``step``.
+    """
+    return int(math.ceil(value / step)) * step
+
+
+def recommend(measurements, headroom=DEFAULT_HEADROOM):
+    """
+    Recommend settings for a dancer from its measurements.
+
+    Memory covers the peak RSS of the process, which like Lambda's max
+    memory used includes the interpreter and the loaded tune, or the
+    peak allocations on top of the starting RSS where RSS isn't known.
+    The timeout covers the slowest call, slowed down in proportion to
+    the recommended memory for CPU-bound dancers.
+
+    Args:
+        measurements (dict): Results of :func:`measure`.
+        headroom (float): Extra share of the measured values to allow.
+
+    Returns:
+        dict: ``memory`` in megabytes and ``timeout`` in seconds.
+    """
+    memory = measurements['memory']
+    used = memory['peak_rss_bytes'] or (
+        (memory['baseline_rss_bytes'] or 0) +
+        (memory['peak_allocated_bytes'] or 0)
+    )
+    memory_mb = min(MAX_MEMORY, max(
+        MIN_MEMORY, round_up(used * (1 + headroom) / MEGABYTE, MEMORY_STEP)
+    ))
+
+    slowest_ms = measurements['wall_ms']['max'] or 0
+    if cpu_bound(measurements) and memory_mb < FULL_CPU_MEMORY:
+        slowest_ms *= FULL_CPU_MEMORY / memory_mb
+    timeout = min(MAX_TIMEOUT, max(
+        1, int(math.ceil(slowest_ms * (1 + headroom) / 1000))
+    ))
+    return dict(memory=memory_mb, timeout=timeout)
+
+
+def cpu_bound(measurements):
+    """
+    Whether a dancer spent most of its measured wall time on CPU.
+    """
+    return (measurements['cpu_ratio'] or 0) >= CPU_BOUND_RATIO
+
+
+def size_dancer(tune, dancer, events, iterations=None, headroom=None):
+    """
+    Measure a dancer and report its current and recommended settings.
+
+    Args:
+        tune (Lambada): Lambada object with the dancer.
+        dancer (Dancer): Dancer to size.
+        events (list): Events to replay.
+        iterations (int): Number of measured calls, by default one per
+            event.
+        headroom (float): Extra share of the measured values to allow,
+            :data:`DEFAULT_HEADROOM` by default.
+
+    Returns:
+        dict: The ``current`` and ``recommended`` settings, whether the
+            dancer is ``cpu_bound``, and the ``measured`` values.
+    """
+    measured = measure(tune, dancer.name, events, iterations)
+    config = dancer_config(tune, dancer)
+    return dict(
+        dancer=dancer.name,
+        current=dict(memory=config['memory'], timeout=config['timeout']),
+        recommended=recommend(
+            measured, DEFAULT_HEADROOM if headroom is None else headroom
+        ),
+        cpu_bound=cpu_bound(measured),
+        measured=measured,
+    )
+
+
+def _unwrap(function):
+    """
+    Get the function a dancer decorated, past any :func:`functools.wraps`
+    wrappers.
+    """
+    while hasattr(function, '__wrapped__'):
+        function = function.__wrapped__
+    return function
+
+
+def _decorator_span(lines):
+    """
+    Find the lines of the ``dancer`` decorator in a function's source.
+
+    Returns:
+        tuple: Start and end index of the decorator in ``lines``.
+    """
+    for start, line in enumerate(lines):
+        if line.lstrip().startswith('@') and 'dancer' in line:
+            depth = 0
+            for end in range(start, len(lines)):
+                depth += lines[end].count('(') - lines[end].count(')')
+                if depth <= 0:
+                    return start, end + 1
+    raise ValueError('No dancer decorator found')
+
+
+def set_decorator_kwargs(decorator, settings):
+    """
+    Set keyword arguments in the source of a decorator, replacing any
+    existing values and adding the others to the call.
+
+    Args:
+        decorator (str): Source of the decorator, such as
+            ``@tune.dancer(name='hi')``.
+        settings (dict): Keyword arguments and their values.
+
+    Returns:
+        str: The updated source.
+    """
+    added = []
+    for key, value in sorted(settings.items()):
+        pattern = r'\b{}\s*=\s*[^,)\n]+'.format(key)
+        if re.search(pattern, decorator):
+            decorator = re.sub(
+                pattern, '{}={!r}'.format(key, value), decorator, count=1
+            )
+        else:
+            added.append('{}={!r}'.format(key, value))
+    if not added:
+        return decorator
+    if '(' not in decorator:
+        body = decorator.rstrip()
+        return '{}({}){}'.format(
+            body, ', '.join(added), decorator[len(body):]
+        )
+    head, _, tail = decorator.rpartition(')')
+    stripped = head.rstrip()
+    if stripped.endswith('('):
+        separator = ''
+    elif stripped.endswith(','):
+        separator = ' '
+    else:
+        separator = ', '
+    return '{}{}{}{}){}'.format(
+        stripped, separator, ', '.join(added), head[len(stripped):], tail
+    )
+
+
+def decorator_patch(dancer, project_dir, settings):
+    """
+    Build a patch of the dancer's decorator in its module setting the
+    given keyword arguments, which applies with ``patch -p1`` or
+    ``git apply`` from the project directory.
+
+    Args:
+        dancer (Dancer): Dancer defined with a decorator.
+        project_dir (str): Root of the project, or its handler module.
+        settings (dict): Keyword arguments and their values.
+
+    Returns:
+        str: Unified diff, empty if nothing changes.
+
+    Raises:
+        ValueError: If the dancer's decorator can't be found.
+    """
+    function = _unwrap(getattr(dancer, 'function', None))
+    try:
+        path = inspect.getsourcefile(function)
+        source, first_line = inspect.getsourcelines(function)
+    except (IOError, TypeError):
+        raise ValueError(
+            "Can't find the source of dancer {}".format(dancer.name)
+        )
+    start, end = _decorator_span(source)
+    with io.open(path, encoding='UTF-8') as stream:
+        original = stream.readlines()
+    # Source lines are numbered from one, and decorators come first
+    start, end = first_line - 1 + start, first_line - 1 + end
+    patched = original[:start] + set_decorator_kwargs(
+        ''.join(original[start:end]), settings
+    ).splitlines(True) + original[end:]
+    project_dir = os.path.abspath(project_dir)
+    if os.path.isfile(project_dir):
+        project_dir = os.path.dirname(project_dir)
+    relative_path = os.path.relpath(path, project_dir).replace(os.sep, '/')
+    return ''.join(difflib.unified_diff(
+        original,
+        patched,
+        'a/{}'.format(relative_path),
+        'b/{}'.format(relative_path),
+    ))
@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+"""
+Cold start profiling of a lambada project.  The profile is taken in a
+fresh interpreter by running this module so that nothing has already
+been imported by the command line interface.
+"""
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from timeit import default_timer
+
+from six import text_type
+from six.moves import builtins
+
+from lambada.common import get_lambada_class, LambdaContext
+
+
+class ImportTimer(object):
+    """
+    Context manager that records how long every new module import
+    takes as a tree of nested imports, similar to ``python -X
+    importtime``.
+    """
+    def __init__(self):
+        """
+        Sets up the root of the import tree.
+        """
+        self.root = dict(name='', time=0.0, children=[])
+        self._stack = [self.root]
+        self._original_import = None
+
+    def _import(self, name, *args, **kwargs):
+        """
+        Replacement for :func:`__import__` that times new imports.
+        """
+        if name in sys.modules:
+            return self._original_import(name, *args, **kwargs)
+        node = dict(name=name, time=0.0, children=[])
+        self._stack[-1]['children'].append(node)
+        self._stack.append(node)
+        start = default_timer()
+        try:
+            return self._original_import(name, *args, **kwargs)
+        finally:
+            node['time'] = default_timer() - start
+            self._stack.pop()
+
+    def __enter__(self):
+        """Start timing imports."""
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._import
+        return self
+
+    def __exit__(self, *_):
+        """Stop timing imports."""
+        builtins.__import__ = self._original_import
+        self.root['time'] = sum(
+            child['time'] for child in self.root['children']
+        )
+
+
+def self_time(node):
+    """
+    Time spent in an import excluding the imports nested in it.
+    """
+    return max(
+        0.0, node['time'] - sum(child['time'] for child in node['children'])
+    )
+
+
+def prune_imports(node, limit):
+    """
+    Reduce an import tree to the ``limit`` slowest imports by
+    cumulative time, keeping their parents so they still form a tree.
+
+    Args:
+        node (dict): Root of the import tree from :class:`ImportTimer`.
+        limit (int): Number of imports to keep.
+
+    Returns:
+        dict: Pruned copy of the tree.
+    """
+    times = []
+
+    def collect(current):
+        """Gather the cumulative times of every import."""
+        for child in current['children']:
+            times.append(child['time'])
+            collect(child)
+    collect(node)
+    if not times or limit <= 0:
+        return dict(node, children=[])
+    cutoff = sorted(times, reverse=True)[:limit][-1]
+
+    def prune(current):
+        """Copy the nodes at or above the cutoff."""
+        return dict(
+            current,
+            children=[
+                prune(child) for child in current['children']
+                if child['time'] >= cutoff
+            ]
+        )
+    return prune(node)
+
+
+def profile_startup(path, dancer, event, warm_calls=5):
+    """
+    Profile the cold start of a dancer in the current interpreter.
+
+    Args:
+        path (str): Path to the lambada project.
+        dancer (str): Name of the dancer to call.
+        event: Event to call the dancer with.
+        warm_calls (int): Number of calls to make after the first one.
+
+    Returns:
+        dict: Seconds taken to find and import the tune
+            (``import_time``), the tree of imports (``imports``), the
+            first call (``first_call``), and each warm call
+            (``warm_calls``).
+    """
+    with ImportTimer() as imports:
+        start = default_timer()
+        tune = get_lambada_class(path)
+        import_time = default_timer() - start
+    if tune is None:
+        raise Exception('Unable to find Lambada class declaration')
+
+    context = LambdaContext(function_name=dancer)
+    start = default_timer()
+    tune(event, context)
+    first_call = default_timer() - start
+    warm = []
+    for _ in range(warm_calls):
+        start = default_timer()
+        tune(event, context)
+        warm.append(default_timer() - start)
+    return dict(
+        dancer=dancer,
+        import_time=import_time,
+        imports=imports.root,
+        first_call=first_call,
+        warm_calls=warm,
+    )
+
+
+def run_profile(path, dancer, event, warm_calls=5):
+    """
+    Profile the cold start of a dancer in a new python process.
+
+    Args:
+        See :func:`profile_startup`.
+
+    Raises:
+        subprocess.CalledProcessError: if profiling fails.
+
+    Returns:
+        dict: The profile from :func:`profile_startup`.
+    """
+    handle, output = tempfile.mkstemp(suffix='.json')
+    os.close(handle)
+    # Make sure the new process imports this same lambada
+    env = os.environ.copy()
+    env['PYTHONPATH'] = os.pathsep.join(
+        [os.path.dirname(os.path.dirname(os.path.abspath(__file__)))] +
+        [entry for entry in [env.get('PYTHONPATH')] if entry]
+    )
+    try:
+        subprocess.check_call([
+            sys.executable, '-m', 'lambada.startup',
+            os.path.abspath(path), dancer, event, str(warm_calls), output
+        ], env=env)
+        with io.open(output, encoding='UTF-8') as stream:
+            return json.load(stream)
+    finally:
+        os.remove(output)
+
+
+def format_profile(profile, limit=20):
+    """
+    Format a startup profile as a human readable table.
+
+    Args:
+        profile (dict): Profile from :func:`profile_startup`.
+        limit (int): Number of the slowest imports to show.
+
+    Returns:
+        list: Lines of the table.
+    """
+    warm = profile['warm_calls']
+    lines = [
+        'Startup profile for {}'.format(profile['dancer']),
+        '',
+        '{:>10.2f} ms  import of handler module'.format(
+            profile['import_time'] * 1000
+        ),
+        '{:>10.2f} ms  first call'.format(profile['first_call'] * 1000),
+    ]
+    if warm:
+        lines.append('{:>10.2f} ms  warm call average of {}'.format(
+            sum(warm) / len(warm) * 1000, len(warm)
+        ))
+    lines.extend([
+        '',
+        'Slowest imports:',
+        '{:>10}  {:>10}  {}'.format('self ms', 'total ms', 'module'),
+    ])
+
+    def add_lines(node, depth):
+        """Add a line for each import indented by depth."""
+        for child in sorted(
+                node['children'], key=lambda c: c['time'], reverse=True
+        ):
+            lines.append('{:>10.2f}  {:>10.2f}  {}{}'.format(
+                self_time(child) * 1000,
+                child['time'] * 1000,
+                '  ' * depth,
+                child['name']
+            ))
+            add_lines(child, depth + 1)
+    add_lines(prune_imports(profile['imports'], limit), 0)
+    return lines
+
+
+def main(argv=None):
+    """
+    Profile the arguments given by :func:`run_profile` and write the
+    results as JSON.
+    """
+    argv = argv or sys.argv[1:]
+    path, dancer, event, warm_calls, output = argv
+    profile = profile_startup(path, dancer, event, int(warm_calls))
+    with io.open(output, 'w', encoding='UTF-8') as stream:
+        stream.write(text_type(json.dumps(profile)))
+
+
+if __name__ == '__main__':  # pragma: no cover
+    main()
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+Lambada module with coroutine dancers, only loaded on python 3.5+
+"""
+import asyncio
+
+from lambada import Lambada
+
+tune = Lambada(role='arn:aws:iam:xxxxxxx:role/lambda')
+
+
+@tune.resource
+async def session():
+    """Make something bound to the running loop"""
+    return dict(loop=asyncio.get_event_loop())
+
+
+async def step(steps, index):
+    """Record when waiting starts and ends"""
+    steps.append(('start', index))
+    await asyncio.sleep(0)
+    steps.append(('end', index))
+
+
+@tune.dancer
+async def fan_out(event, _):
+    """Wait on many things at once"""
+    steps = []
+    await asyncio.gather(*[step(steps, index) for index in range(event)])
+    return dict(loop=id(asyncio.get_event_loop()), steps=steps)
+
+
+@tune.dancer
+async def same_loop(*_):
+    """Check the session lives on the current loop"""
+    return (await session())['loop'] is asyncio.get_event_loop()
+
+
+@tune.batch_dancer
+async def records(record, _):
+    """Wait a while and fail records that ask for it"""
+    await step(record['steps'], record['messageId'])
+    if record.get('fail'):
+        raise ValueError(record)
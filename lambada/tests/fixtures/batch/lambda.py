@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+"""
+Lambada module with batch dancers
+"""
+import json
+
+from lambada import Lambada
+
+tune = Lambada(role='arn:aws:iam:xxxxxxx:role/lambda')
+
+
+def handle(record, _):
+    """Fail records that ask for it"""
+    body = json.loads(record['body'])
+    if body.get('fail'):
+        raise ValueError(body)
+
+
+tune.batch_dancer(handle)
+tune.batch_dancer('threaded', workers=4)(handle)
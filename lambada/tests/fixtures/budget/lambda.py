@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+"""
+Lambada module with a dancer that runs out of budget
+"""
+import time
+
+from lambada import Lambada
+
+tune = Lambada(role='arn:aws:iam:xxxxxxx:role/lambda')
+
+
+@tune.dancer(budget_ms=950)
+def slow(event, _):
+    """Sleep for as many seconds as the event says"""
+    time.sleep(float(event))
@@ -0,0 +1,5 @@
+"""
+Raises on import to show it is never imported during discovery.
+"""
+
+raise Exception('Imported helpers')
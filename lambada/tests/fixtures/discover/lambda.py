@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+"""
+Lambada module constructed through an alias
+"""
+from lambada import Lambada as Tune
+
+tune = Tune(role='arn:aws:iam:xxxxxxx:role/lambda')
+
+
+@tune.dancer
+def discovered(event, _):
+    """Return the event"""
+    return event
@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+"""
+Lambada module leaving some of its files out of the package
+"""
+from lambada import Lambada
+
+tune = Lambada(
+    role='arn:aws:iam:xxxxxxx:role/lambda',
+    ignore_files=[r'\.txt$'],
+)
+
+
+@tune.dancer
+def hello(event, _):
+    """Return the event"""
+    return event  # pragma: no cover
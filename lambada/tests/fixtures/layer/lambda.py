@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+"""
+Lambada module whose requirements are shipped in a layer
+"""
+from lambada import Lambada
+
+tune = Lambada(role='arn:aws:iam:xxxxxxx:role/lambda', layer='deps')
+
+
+@tune.dancer
+def shared(event, _):
+    """Return the event"""
+    return event  # pragma: no cover
+
+
+@tune.dancer
+def other(event, _):
+    """Return the event"""
+    return event  # pragma: no cover
+
+
+@tune.dancer(layer=None, requirements=['mock'])
+def bundled(event, _):
+    """Return the event"""
+    return event  # pragma: no cover
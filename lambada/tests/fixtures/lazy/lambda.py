@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+"""
+Lambada module with dancers that are only imported when called
+"""
+from __future__ import print_function
+from lambada import Lambada
+
+tune = Lambada(role='arn:aws:iam:xxxxxxx:role/lambda')
+tune.lazy_dancer('lazy_heavy.crunch', memory=1024)
+tune.lazy_dancer('lazy_heavy.decorated', name='light')
+
+
+@tune.dancer
+def eager(event, _):
+    """Print the event we created"""
+    print('Event: {}'.format(event))  # pragma: no cover
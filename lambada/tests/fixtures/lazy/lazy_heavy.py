@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+"""
+Stands in for a module with expensive imports.
+"""
+from __future__ import print_function
+from lambada import Lambada
+
+IMPORTS = []
+IMPORTS.append(__name__)
+OTHER_TUNE = Lambada()
+
+
+def crunch(event, _):
+    """Print and return the event we created"""
+    event = 'Crunched: {}'.format(event)
+    print(event)
+    return event
+
+
+@OTHER_TUNE.dancer
+def decorated(event, _):
+    """Return the event from a function decorated elsewhere"""
+    return 'Decorated: {}'.format(event)
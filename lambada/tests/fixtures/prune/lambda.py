@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""
+Lambada module whose dancers need different requirements
+"""
+from lambada import Lambada
+import prune_helpers
+
+tune = Lambada(role='arn:aws:iam:xxxxxxx:role/lambda')
+tune.lazy_dancer('prune_reporting.report')
+
+
+@tune.dancer
+def plain(event, _):
+    """Shout the event"""
+    return prune_helpers.shout(event)  # pragma: no cover
+
+
+@tune.dancer(requirements=['extra_requirements.txt', 'mock'])
+def custom(event, _):
+    """Return the event"""
+    return event  # pragma: no cover
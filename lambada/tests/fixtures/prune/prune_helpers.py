@@ -0,0 +1,9 @@
+"""
+Local helpers imported by the handler module.
+"""
+import yaml
+
+
+def shout(event):
+    """Dump the event in upper case"""
+    return yaml.dump(event).upper()  # pragma: no cover
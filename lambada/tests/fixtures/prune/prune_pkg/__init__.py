@@ -0,0 +1,3 @@
+"""
+Local package used by the lazy dancer.
+"""
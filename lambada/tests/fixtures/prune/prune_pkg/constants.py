@@ -0,0 +1,4 @@
+"""
+Constants for the local package.
+"""
+VALUE = 'value'
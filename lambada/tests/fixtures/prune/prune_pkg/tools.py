@@ -0,0 +1,8 @@
+"""
+Module in a local package that uses a relative import.
+"""
+from . import constants
+from .constants import VALUE  # noqa pylint: disable=unused-import
+import six  # noqa pylint: disable=unused-import
+
+COPY = constants.VALUE
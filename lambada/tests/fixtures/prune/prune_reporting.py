@@ -0,0 +1,11 @@
+"""
+Module for a lazy dancer with its own imports.
+"""
+from prune_pkg import tools
+
+
+def report(event, _):
+    """Import click only when reporting"""
+    import click  # pylint: disable=import-outside-toplevel
+    click.echo(tools.VALUE)  # pragma: no cover
+    return event  # pragma: no cover
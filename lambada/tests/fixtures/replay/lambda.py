@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""
+Lambada module for replaying events
+"""
+from lambada import Lambada
+
+tune = Lambada(role='arn:aws:iam:xxxxxxx:role/lambda')
+
+
+@tune.dancer
+def double(event, _):
+    """Double the event or blow up"""
+    if event == 'boom':
+        raise ValueError('boom')
+    return event * 2
+
+
+@tune.dancer
+def opaque(event, _):
+    """Return something JSON can't encode"""
+    return set([event])
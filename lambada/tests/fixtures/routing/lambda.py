@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""
+Lambada module deployed per stage through the bootstrap handler
+"""
+from lambada import Lambada
+
+tune = Lambada(
+    role='arn:aws:iam:xxxxxxx:role/lambda',
+    stages=['prod', 'dev'],
+    bootstrap=True,
+)
+tune.lazy_dancer('routing_reports.report')
+tune.lazy_dancer('routing_reports.report', name='parsed', event_type='sqs')
+
+
+@tune.dancer
+def hello(event, _):
+    """Greet the event"""
+    return 'Hello {}'.format(event)
+
+
+@tune.dancer(budget_ms=100)
+def timed(event, _):
+    """Return the event"""
+    return event
+
+
+@tune.dancer(name='renamed')
+def named(event, _):
+    """Return the event"""
+    return event  # pragma: no cover
@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+"""
+Stands in for a module only imported by the dancer that needs it.
+"""
+
+
+def report(event, _):
+    """Report on the event"""
+    return 'Report: {}'.format(event)
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+"""
+Lambada module that remembers calls across warm invocations
+"""
+import os
+
+from lambada import Lambada
+
+tune = Lambada(role='arn:aws:iam:xxxxxxx:role/lambda', timeout=5)
+CALLS = []
+
+
+@tune.dancer
+def counter(event, context):
+    """Count calls made in this process"""
+    CALLS.append(event)
+    return dict(
+        calls=len(CALLS),
+        pid=os.getpid(),
+        event=event,
+        remaining=context.get_remaining_time_in_millis() > 0,
+    )
+
+
+@tune.dancer
+def fail(*_):
+    """Always fail"""
+    raise ValueError('Nope')
@@ -0,0 +1,6 @@
+"""
+Innermost module of the import timing fixture.
+"""
+import time
+
+time.sleep(0.01)
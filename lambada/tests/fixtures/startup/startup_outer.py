@@ -0,0 +1,4 @@
+"""
+Imports another module so import timing has a tree to build.
+"""
+import startup_inner  # pylint: disable=import-error,unused-import
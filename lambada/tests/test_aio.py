@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the :mod::`lambada.aio` module.
+"""
+import sys
+from threading import Thread
+from unittest import skipIf, TestCase
+
+from lambada.common import get_lambada_class, LambdaContext
+from lambada.tests.common import make_fixture_path
+
+try:
+    from lambada import aio
+except ImportError:  # pragma: no cover
+    aio = None  # pylint: disable=invalid-name
+
+
+@skipIf(aio is None or sys.version_info < (3, 5), 'Needs async def')
+class TestAio(TestCase):
+    """
+    Test class for :mod::`lambada.aio` module and coroutine dancers.
+    """
+    def setUp(self):
+        """Load the coroutine fixture."""
+        self.tune = get_lambada_class(make_fixture_path('aio'))
+
+    def test_get_loop(self):
+        """Verify each thread keeps its own loop until it is closed."""
+        loop = aio.get_loop()
+        self.assertIs(loop, aio.get_loop())
+        loops = []
+        thread = Thread(target=lambda: loops.append(aio.get_loop()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(loop, loops[0])
+        loops[0].close()
+
+        loop.close()
+        self.assertIsNot(loop, aio.get_loop())
+
+    def test_run(self):
+        """Verify awaitables are run and failures are cancelled."""
+        future = aio.ensure_future(self.tune.get_resource('session'))
+        self.assertEqual(aio.get_loop(), aio.run(future)['loop'])
+        with self.assertRaises(ZeroDivisionError):
+            aio.run(self.tune.dancers['fan_out'].function(1 / 0, None))
+        results = aio.gather([
+            self.tune.dancers['fan_out'].function(1, None),
+            self.tune.dancers['fan_out'].function(None, None),
+        ])
+        self.assertEqual(id(aio.get_loop()), results[0]['loop'])
+        self.assertIsInstance(results[1], TypeError)
+
+    def test_dancer(self):
+        """Verify coroutine dancers run concurrently on one loop."""
+        result = self.tune(10, LambdaContext('fan_out'))
+        # Every wait started before any of them ended
+        self.assertEqual(
+            ['start'] * 10 + ['end'] * 10,
+            [kind for kind, _ in result['steps']]
+        )
+        self.assertEqual(
+            result['loop'], self.tune(1, LambdaContext('fan_out'))['loop']
+        )
+
+        # Async resources are shared futures on that same loop
+        self.assertTrue(self.tune(None, LambdaContext('same_loop')))
+        self.assertTrue(self.tune(None, LambdaContext('same_loop')))
+        self.assertEqual(
+            dict(hits=1, misses=1),
+            {
+                key: value for key, value in
+                self.tune.resource_stats()['session'].items()
+                if key != 'creation_time'
+            }
+        )
+
+    def test_batch_dancer(self):
+        """Verify async batch dancers await every record at once."""
+        steps = []
+        records = [
+            dict(messageId=str(index), fail=index == 3, steps=steps)
+            for index in range(10)
+        ]
+        self.assertEqual(
+            dict(batchItemFailures=[dict(itemIdentifier='3')]),
+            self.tune(dict(Records=records), LambdaContext('records'))
+        )
+        self.assertEqual(
+            ['start'] * 10 + ['end'] * 10, [kind for kind, _ in steps]
+        )
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the :mod::`lambada.batch` module.
+"""
+from multiprocessing.pool import ThreadPool
+from unittest import TestCase
+
+from mock import MagicMock
+from six import assertRaisesRegex
+
+from lambada import batch
+
+
+def handle(record, _):
+    """Fail records that ask for it."""
+    if record.get('fail'):
+        raise ValueError(record)
+
+
+class TestBatch(TestCase):
+    """
+    Test class for :mod::`lambada.batch` module.
+    """
+    def test_record_identifier(self):
+        """Verify identifiers are found for each event source."""
+        self.assertEqual('a', batch.record_identifier(dict(messageId='a')))
+        self.assertEqual('1', batch.record_identifier(
+            dict(kinesis=dict(sequenceNumber='1'))
+        ))
+        self.assertEqual('2', batch.record_identifier(
+            dict(dynamodb=dict(SequenceNumber='2'))
+        ))
+        self.assertIsNone(batch.record_identifier(dict(kinesis={})))
+
+    def test_process_batch(self):
+        """Verify failed records are collected in order."""
+        records = [
+            dict(messageId=str(index), fail=index % 3 == 0)
+            for index in range(10)
+        ]
+        self.assertEqual(
+            ['0', '3', '6', '9'], batch.process_batch(handle, records, None)
+        )
+        pool = ThreadPool(3)
+        self.addCleanup(pool.terminate)
+        self.assertEqual(
+            ['0', '3', '6', '9'],
+            batch.process_batch(handle, records, None, pool)
+        )
+
+        # Records left when the budget runs out count as failed
+        budget = MagicMock(expired=True)
+        self.assertEqual(
+            [record['messageId'] for record in records],
+            batch.process_batch(handle, records, None, budget=budget)
+        )
+
+        with assertRaisesRegex(self, Exception, 'without an identifier'):
+            batch.process_batch(handle, [dict(fail=True)], None)
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the :mod::`lambada.bench` module.
+"""
+from __future__ import print_function
+import sys
+from unittest import TestCase
+
+from mock import MagicMock, patch
+
+from lambada import bench, Lambada
+from lambada.tests.common import make_fixture_path
+
+
+class TestBench(TestCase):
+    """
+    Test class for :mod::`lambada.bench` module.
+    """
+    def test_load_events(self):
+        """Verify events are decoded a line at a time."""
+        self.assertEqual(
+            ['first', dict(second=2), [3]],
+            bench.load_events(make_fixture_path('events.jsonl', None))
+        )
+
+    def test_percentile(self):
+        """Verify interpolated percentiles."""
+        self.assertIsNone(bench.percentile([], 50))
+        self.assertEqual(5, bench.percentile([5], 99))
+        values = list(range(1, 101))
+        self.assertEqual(50.5, bench.percentile(values, 50))
+        self.assertAlmostEqual(99.01, bench.percentile(values, 99))
+        self.assertEqual(100, bench.percentile(values, 100))
+        self.assertEqual(1, bench.percentile(values, 0))
+
+    def test_summarize(self):
+        """Verify summary statistics."""
+        summary = bench.summarize([1, 2, 3, 4])
+        self.assertEqual(1, summary['min'])
+        self.assertEqual(2.5, summary['mean'])
+        self.assertEqual(2.5, summary['p50'])
+        self.assertEqual(4, summary['max'])
+        self.assertIsNone(bench.summarize([])['p99'])
+
+    def test_peak_rss(self):
+        """Verify peak RSS is reported in bytes."""
+        self.assertGreater(bench.peak_rss(), 1024 * 1024)
+
+    def test_quiet_output(self):
+        """Verify stdout is discarded and restored."""
+        stdout = sys.stdout
+        with bench.QuietOutput():
+            self.assertIsNot(stdout, sys.stdout)
+            print('Nobody hears this')
+        self.assertIs(stdout, sys.stdout)
+
+    def test_benchmark(self):
+        """Benchmark a dancer that sometimes fails."""
+        tune = Lambada()
+        calls = []
+
+        @tune.dancer
+        def flaky(event, _):  # pylint: disable=unused-variable
+            """Fail on odd events and allocate some memory."""
+            calls.append(event)
+            print('Event: {}'.format(event))
+            if event % 2:
+                raise ValueError('odd')
+            return [0] * 10000
+
+        result = bench.benchmark(tune, 'flaky', [0, 1, 2], 6, warmup=2)
+        # Warmup, timed, and one traced call per event
+        self.assertEqual(2 + 6 + 3, len(calls))
+        self.assertEqual([0, 1, 0, 1, 2, 0, 1, 2, 0, 1, 2], calls)
+        self.assertEqual(2, result['errors'])
+        self.assertEqual(6, result['iterations'])
+        self.assertEqual(3, result['events'])
+        latency = result['latency_ms']
+        self.assertLessEqual(latency['min'], latency['p50'])
+        self.assertLessEqual(latency['p50'], latency['p99'])
+        self.assertGreater(result['throughput_per_second'], 0)
+        self.assertGreater(result['memory']['peak_allocated_bytes'], 10000)
+        self.assertGreater(result['memory']['mean_allocated_bytes'], 0)
+        self.assertGreater(result['memory']['peak_rss_bytes'], 0)
+
+        # Default to a single None event
+        result = bench.benchmark(tune, 'flaky', [], 1, warmup=0)
+        self.assertEqual(1, result['errors'])
+
+    def test_compare(self):
+        """Verify regressions over the threshold are reported."""
+        baseline = dict(
+            latency_ms=dict(p50=10.0, p95=20.0, p99=30.0),
+            memory=dict(peak_allocated_bytes=1000, peak_rss_bytes=None),
+        )
+        result = dict(
+            latency_ms=dict(p50=10.5, p95=25.0, p99=None),
+            memory=dict(peak_allocated_bytes=2000, peak_rss_bytes=5),
+        )
+        regressions = bench.compare(result, baseline)
+        self.assertEqual(2, len(regressions))
+        self.assertIn('p95 latency went from 20.00 to 25.00', regressions[0])
+        self.assertIn('peak allocations', regressions[1])
+        self.assertEqual(
+            1, len(bench.compare(result, baseline, threshold=50))
+        )
+        self.assertEqual([], bench.compare(baseline, baseline))
+
+    @patch('lambada.bench.tracemalloc', None)
+    def test_no_tracemalloc(self):
+        """Allocations are left out without tracemalloc."""
+        tune = MagicMock()
+        self.assertIsNone(bench.trace_call(tune, 'hi', 'event'))
+        self.assertTrue(tune.called)
@@ -0,0 +1,472 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the :mod::`lambada.build` module.
+"""
+import io
+import json
+import os
+import shutil
+import struct
+import subprocess
+import sys
+from tempfile import mkdtemp
+import time
+from unittest import TestCase
+import zipfile
+
+from mock import patch
+
+from lambada import build
+from lambada.common import get_lambada_class
+from lambada.tests.common import make_fixture_path
+
+# Header of a python 3.7 compiled file checked by hash, then the hash
+HASHED_PYC = b'\x42\x0d\r\n' + struct.pack('<I', 1) + b'\x00' * 8
+
+
+class TestBuild(TestCase):
+    """
+    Test class for :mod::`lambada.build` module.
+    """
+    def setUp(self):
+        """Create a scratch copy of the basic fixture."""
+        self.temp_dir = mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.project = os.path.join(self.temp_dir, 'project')
+        shutil.copytree(
+            make_fixture_path('basic', None),
+            self.project,
+            ignore=shutil.ignore_patterns('*.pyc', '__pycache__')
+        )
+
+    def write(self, relative_path, contents):
+        """Write contents to a file in the scratch project."""
+        path = os.path.join(self.project, relative_path)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with io.open(path, 'w', encoding='UTF-8') as stream:
+            stream.write(contents)
+        return path
+
+    def test_iter_files(self):
+        """Verify walking is sorted and honors ignores."""
+        self.write('b/z.py', u'')
+        self.write('b/a.py', u'')
+        self.write('a.txt', u'')
+        files = [name for name, _ in build.iter_files(self.project)]
+        self.assertEqual(['a.txt', 'b/a.py', 'b/z.py', 'lambda.py'], files)
+        files = [
+            name for name, _ in build.iter_files(self.project, [r'^b/'])
+        ]
+        self.assertEqual(['a.txt', 'lambda.py'], files)
+
+    def test_hash_requirements(self):
+        """Verify requirements hash by content, list, or default."""
+        path = self.write('requirements.txt', u'six\n')
+        default = build.hash_requirements(self.project, None)
+        self.assertEqual(default, build.hash_requirements(self.project, path))
+        self.assertNotEqual(
+            default, build.hash_requirements(self.project, ['six'])
+        )
+        self.write('requirements.txt', u'six==1.10.0\n')
+        self.assertNotEqual(
+            default, build.hash_requirements(self.project, path)
+        )
+
+    def test_hash_dependencies(self):
+        """Verify dependencies hash by requirements and python version."""
+        key = build.hash_dependencies(self.project, ['six'])
+        self.assertEqual(key, build.hash_dependencies(self.project, ['six']))
+        self.assertNotEqual(
+            key, build.hash_dependencies(self.project, ['six', 'click'])
+        )
+        with patch('lambada.build.sys.version_info', (2, 7, 0)):
+            self.assertNotEqual(
+                key, build.hash_dependencies(self.project, ['six'])
+            )
+
+    def test_has_requirements(self):
+        """Verify the default requirements file counts."""
+        self.assertFalse(build.has_requirements(self.project, None))
+        self.assertTrue(build.has_requirements(self.project, ['six']))
+        self.write('requirements.txt', u'six\n')
+        self.assertTrue(build.has_requirements(self.project, []))
+
+    @patch('lambada.build.subprocess.check_call')
+    def test_install_dependencies(self, check_call):
+        """Verify a virtualenv is made and requirements installed."""
+        venv = os.path.join(self.temp_dir, 'venv')
+        pip = os.path.join(venv, 'bin', 'pip')
+        build.install_dependencies(self.project, ['six', 'click'], venv)
+        self.assertEqual(
+            ['virtualenv', '-p', sys.executable, venv],
+            check_call.call_args_list[0][0][0]
+        )
+        self.assertEqual(
+            [pip, 'install', 'six', 'click'], check_call.call_args[0][0]
+        )
+        self.assertEqual(
+            build.SOURCE_DATE_EPOCH,
+            check_call.call_args[1]['env']['SOURCE_DATE_EPOCH']
+        )
+        build.install_dependencies(self.project, None, venv)
+        self.assertEqual(
+            [
+                pip, 'install', '-r',
+                os.path.join(self.project, 'requirements.txt')
+            ],
+            check_call.call_args[0][0]
+        )
+
+    def test_hash_package_inputs(self):
+        """Verify the package key changes only with its inputs."""
+        key = build.hash_package_inputs(self.project, None)
+        self.assertEqual(key, build.hash_package_inputs(self.project, None))
+
+        # Excluded and ignored files don't matter
+        ignoring = build.hash_package_inputs(
+            self.project, None, ignore_files=[r'\.md$']
+        )
+        self.write('lambda.zip', u'old zip')
+        self.write('notes.md', u'notes')
+        self.assertEqual(
+            ignoring,
+            build.hash_package_inputs(
+                self.project, None, ignore_files=[r'\.md$'],
+                exclude=['lambda.zip']
+            )
+        )
+        os.remove(os.path.join(self.project, 'notes.md'))
+        self.assertEqual(
+            key,
+            build.hash_package_inputs(
+                self.project, None, exclude=['lambda.zip']
+            )
+        )
+
+        # Source, requirements, and extra files all change the key
+        self.write('lambda.py', u'# changed')
+        changed = build.hash_package_inputs(
+            self.project, None, exclude=['lambda.zip']
+        )
+        self.assertNotEqual(key, changed)
+        self.assertNotEqual(
+            changed,
+            build.hash_package_inputs(
+                self.project, ['six'], exclude=['lambda.zip']
+            )
+        )
+        extra = os.path.join(self.temp_dir, 'extra')
+        os.mkdir(extra)
+        with open(os.path.join(extra, 'data.txt'), 'w') as stream:
+            stream.write('data')
+        with_extra = build.hash_package_inputs(
+            self.project, None, extra_files=[extra], exclude=['lambda.zip']
+        )
+        self.assertNotEqual(changed, with_extra)
+        with open(os.path.join(extra, 'data.txt'), 'w') as stream:
+            stream.write('more data')
+        self.assertNotEqual(
+            with_extra,
+            build.hash_package_inputs(
+                self.project, None, extra_files=[extra],
+                exclude=['lambda.zip']
+            )
+        )
+
+    def test_build_cache(self):
+        """Exercise getting, putting, and evicting cache entries."""
+        cache = build.BuildCache(os.path.join(self.temp_dir, 'cache'))
+        self.assertEqual([], cache.entries())
+        destination = os.path.join(self.temp_dir, 'out.zip')
+        self.assertFalse(cache.get('abc', destination))
+
+        source = self.write('lambda.zip', u'0123456789')
+        cache.put('abc', source)
+        self.assertTrue(cache.get('abc', destination))
+        with open(destination) as stream:
+            self.assertEqual('0123456789', stream.read())
+
+        # Evict by size, oldest first
+        cache.put('def', source)
+        old = time.time() - 100
+        os.utime(cache.path('abc'), (old, old))
+        cache.max_size = 15
+        self.assertEqual([cache.path('abc')], cache.evict())
+        self.assertTrue(os.path.isfile(cache.path('def')))
+
+        # Evict by age
+        os.utime(cache.path('def'), (old, old))
+        cache.max_size = None
+        cache.max_age = 50
+        self.assertEqual([cache.path('def')], cache.evict())
+        self.assertEqual([], cache.entries())
+
+    def test_dependency_cache(self):
+        """Verify dependencies are installed once and can be evicted."""
+        cache = build.BuildCache(os.path.join(self.temp_dir, 'cache'))
+        installs = []
+
+        def install(venv_dir):
+            """Pretend to install into the virtualenv."""
+            installs.append(venv_dir)
+            site_packages = os.path.join(venv_dir, 'lib', 'site-packages')
+            os.makedirs(site_packages)
+            with open(os.path.join(site_packages, 'six.py'), 'w') as stream:
+                stream.write('0123456789')
+
+        venv, cached = cache.dependencies('abc', install)
+        self.assertFalse(cached)
+        self.assertEqual(cache.dependencies_path('abc'), venv)
+        self.assertTrue(os.path.isfile(
+            os.path.join(venv, 'lib', 'site-packages', 'six.py')
+        ))
+        self.assertEqual((venv, True), cache.dependencies('abc', install))
+        self.assertEqual(1, len(installs))
+        self.assertNotEqual(venv, installs[0])
+        self.assertEqual([(10, venv)], [
+            (size, path) for _, size, path in cache.entries()
+        ])
+
+        # Failed installs leave nothing behind
+        def fail(venv_dir):
+            """Fail half way through installing."""
+            install(venv_dir)
+            raise subprocess.CalledProcessError(1, 'pip')
+        with self.assertRaises(subprocess.CalledProcessError):
+            cache.dependencies('def', fail)
+        self.assertEqual(
+            ['abc'], os.listdir(os.path.join(self.temp_dir, 'cache',
+                                             'dependencies'))
+        )
+
+        old = time.time() - 100
+        os.utime(venv, (old, old))
+        cache.max_age = 50
+        self.assertEqual([venv], cache.evict())
+        self.assertFalse(os.path.exists(venv))
+
+        # New installs bigger than the cache are kept until next time
+        cache.max_age = None
+        cache.max_size = 5
+        venv, cached = cache.dependencies('abc', install)
+        self.assertFalse(cached)
+        self.assertTrue(os.path.isdir(venv))
+        other, _ = cache.dependencies('def', install)
+        self.assertTrue(os.path.isdir(other))
+        self.assertFalse(os.path.exists(venv))
+        self.assertEqual([other], cache.evict())
+
+    def make_zip(self, name, timestamp):
+        """Zip the scratch project with the given file timestamps."""
+        zip_path = os.path.join(self.temp_dir, name)
+        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_STORED) as package:
+            for relative_path, absolute_path in reversed(
+                    build.iter_files(self.project)
+            ):
+                os.utime(absolute_path, (timestamp, timestamp))
+                package.write(absolute_path, relative_path)
+        return zip_path
+
+    def test_normalize_zip(self):
+        """Verify identical contents produce identical zips."""
+        self.write('lib/tool.sh', u'echo hi')
+        os.chmod(os.path.join(self.project, 'lib/tool.sh'), 0o775)
+        first = self.make_zip('first.zip', time.time() - 1000)
+        second = self.make_zip('second.zip', time.time())
+        # Only compiled files checked by hash are kept
+        for zip_path in (first, second):
+            with zipfile.ZipFile(zip_path, 'a') as package:
+                package.writestr('__pycache__/hashed.pyc', HASHED_PYC)
+                package.writestr(
+                    '__pycache__/dated.pyc',
+                    b'\x42\x0d\r\n' + struct.pack('<II', 0, int(time.time()))
+                )
+        self.assertNotEqual(
+            build.hash_file(first).hexdigest(),
+            build.hash_file(second).hexdigest()
+        )
+        build.normalize_zip(first)
+        build.normalize_zip(second)
+        first_hash = build.hash_file(first).hexdigest()
+        self.assertEqual(first_hash, build.hash_file(second).hexdigest())
+        # Normalizing is idempotent
+        build.normalize_zip(first)
+        self.assertEqual(first_hash, build.hash_file(first).hexdigest())
+
+        with zipfile.ZipFile(first) as package:
+            infos = package.infolist()
+            names = [info.filename for info in infos]
+            self.assertEqual(sorted(names), names)
+            self.assertIn('__pycache__/hashed.pyc', names)
+            self.assertNotIn('__pycache__/dated.pyc', names)
+            modes = dict(
+                (info.filename, (info.external_attr >> 16) & 0o777)
+                for info in infos
+            )
+            self.assertEqual(0o755, modes['lib/tool.sh'])
+            self.assertEqual(0o644, modes['lambda.py'])
+            for info in infos:
+                self.assertEqual(build.ZIP_EPOCH, info.date_time)
+                self.assertEqual(zipfile.ZIP_DEFLATED, info.compress_type)
+
+    def test_is_timestamp_pyc(self):
+        """Verify compiled files are told apart by their header."""
+        self.assertFalse(build.is_timestamp_pyc('lambda.py', b''))
+        self.assertFalse(build.is_timestamp_pyc('lambda.pyc', HASHED_PYC))
+        self.assertTrue(build.is_timestamp_pyc(
+            'lambda.pyc', b'\x42\x0d\r\n' + struct.pack('<II', 0, 1)
+        ))
+        # Python 2 files have the compile time in place of the flags
+        self.assertTrue(build.is_timestamp_pyc(
+            'lambda.pyc', b'\x03\xf3\r\n' + struct.pack('<I', 1)
+        ))
+        self.assertTrue(build.is_timestamp_pyc('lambda.pyc', b'\x42'))
+
+    def test_write_manifest(self):
+        """Verify the manifest lists every file and the zip hash."""
+        zip_path = self.make_zip('lambda.zip', time.time())
+        path = build.write_manifest(zip_path)
+        self.assertEqual(
+            os.path.join(self.temp_dir, 'lambda.manifest.json'), path
+        )
+        with io.open(path, encoding='UTF-8') as stream:
+            manifest = json.load(stream)
+        self.assertEqual(
+            build.hash_file(zip_path).hexdigest(), manifest['sha256']
+        )
+        lambda_py = os.path.join(self.project, 'lambda.py')
+        self.assertEqual(
+            dict(
+                sha256=build.hash_file(lambda_py).hexdigest(),
+                size=os.path.getsize(lambda_py),
+            ),
+            manifest['files']['lambda.py']
+        )
+
+    def test_read_requirements(self):
+        """Verify requirements files are flattened into specifiers."""
+        prune = make_fixture_path('prune', None)
+        expected = [
+            'PyYAML>=3.12', 'click', 'six', 'mock',
+            'not-a-real-distribution==1.0'
+        ]
+        self.assertEqual(
+            expected, build.read_requirements('requirements.txt', prune)
+        )
+        self.assertEqual(
+            ['semantic_version', 'mock'],
+            build.read_requirements(['extra_requirements.txt', 'mock'], prune)
+        )
+        path = build.write_requirements(
+            expected, os.path.join(self.temp_dir, 'requirements.txt')
+        )
+        self.assertEqual(expected, build.read_requirements(path, prune))
+
+    def test_requirement_name(self):
+        """Verify distribution names are parsed from specifiers."""
+        self.assertEqual('PyYAML', build.requirement_name('PyYAML>=3.12'))
+        self.assertEqual(
+            'zope.interface', build.requirement_name('zope.interface')
+        )
+        self.assertEqual('a-b_c', build.requirement_name('a-b_c[extra]'))
+        self.assertIsNone(build.requirement_name('-e .'))
+        self.assertIsNone(
+            build.requirement_name('https://example.com/thing.zip')
+        )
+        self.assertIsNone(build.requirement_name('=='))
+
+    def test_distribution_modules(self):
+        """Verify installed distributions map to their modules."""
+        self.assertIn('yaml', build.distribution_modules('PyYAML'))
+        self.assertEqual(set(['six']), build.distribution_modules('six'))
+        self.assertIsNone(
+            build.distribution_modules('not-a-real-distribution')
+        )
+
+    def test_find_imports(self):
+        """Verify imports are found through local modules."""
+        prune = make_fixture_path('prune', None)
+        self.assertEqual(
+            [os.path.join(prune, 'prune_pkg', '__init__.py'),
+             os.path.join(prune, 'prune_pkg', 'tools.py')],
+            build.module_files('prune_pkg.tools.thing', prune)
+        )
+        self.assertEqual([], build.module_files('yaml', prune))
+        self.assertEqual(
+            set(['lambada', 'yaml']),
+            build.find_imports(os.path.join(prune, 'lambda.py'), prune)
+        )
+        self.assertEqual(
+            set(['click', 'six']),
+            build.find_imports(
+                os.path.join(prune, 'prune_reporting.py'), prune
+            )
+        )
+
+    def test_prune_requirements(self):
+        """Verify only unused, installed requirements are pruned."""
+        lines = ['PyYAML', 'six', 'not-a-real-distribution', '-e .']
+        self.assertEqual(
+            ['PyYAML', 'not-a-real-distribution', '-e .'],
+            build.prune_requirements(lines, set(['yaml', 'os']))
+        )
+
+        # Pinned dependencies of used requirements are kept, but not
+        # those only needed for their extras
+        lines = ['boto3', 'botocore==1.0', 'JMESPath', 'PyYAML', 'mock']
+        self.assertEqual(
+            ['boto3', 'botocore==1.0', 'JMESPath'],
+            build.prune_requirements(lines, set(['boto3']))
+        )
+        self.assertEqual(
+            ['lambda_uploader', 'botocore==1.0', 'JMESPath'],
+            build.prune_requirements(
+                ['lambda_uploader', 'botocore==1.0', 'JMESPath', 'mock'],
+                set(['lambda_uploader'])
+            )
+        )
+        self.assertEqual(set(), build.distribution_requires('not-a-real-one'))
+
+    def test_dancer_requirements(self):
+        """Verify each dancer gets the requirements it needs."""
+        prune = make_fixture_path('prune', None)
+        tune = get_lambada_class(prune)
+        requirements = os.path.join(prune, 'requirements.txt')
+        dancers = tune.dancers
+
+        # Nothing to do without overrides or pruning
+        self.assertIsNone(build.dancer_requirements(
+            tune, dancers['plain'], prune, requirements
+        ))
+        self.assertEqual(
+            ['semantic_version', 'mock'],
+            build.dancer_requirements(
+                tune, dancers['custom'], prune, requirements
+            )
+        )
+        self.assertEqual(
+            ['PyYAML>=3.12', 'not-a-real-distribution==1.0'],
+            build.dancer_requirements(
+                tune, dancers['plain'], prune, requirements, prune=True
+            )
+        )
+        self.assertEqual(
+            ['PyYAML>=3.12', 'click', 'six', 'not-a-real-distribution==1.0'],
+            build.dancer_requirements(
+                tune, dancers['report'], prune, requirements, prune=True
+            )
+        )
+        self.assertEqual([], build.dancer_requirements(
+            tune, dancers['custom'], prune, requirements, prune=True
+        ))
+        # The project's requirements.txt is the default
+        self.assertEqual(
+            ['PyYAML>=3.12', 'not-a-real-distribution==1.0'],
+            build.dancer_requirements(
+                tune, dancers['plain'], prune, None, prune=True
+            )
+        )
+        self.assertEqual([], build.dancer_requirements(
+            tune, dancers['plain'], self.project, None, prune=True
+        ))
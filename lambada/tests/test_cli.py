@@ -1,24 +1,69 @@
 """
 Tests for the :mod::`lambada.cli` module.
 """
+import json
 import os
+import shutil
+import sys
+from tempfile import mkdtemp
 from unittest import TestCase
+import zipfile
 
 import click
 from click.testing import CliRunner
 from mock import patch, MagicMock
 
-from lambada import cli
+from lambada import Bouncer, cli
+from lambada.build import BuildCache
 from lambada.tests.common import make_fixture_path
 
 BASIC_DANCERS = ('test_lambada', 'hi', 'test_argless', 'test_multiarg')
+# Files lambada writes into the project for the length of a build
+GENERATED_FILES = ('_lambada.json', '_lambada_routes.json')
+
+
+class FakeBuild(object):
+    """
+    Stand in for :func:`lambada.cli.build_package` that writes out a
+    small zip file, and keeps the generated files it would have packaged
+    in :attr:`packaged`.
+    """
+    # pylint: disable=too-few-public-methods
+    def __init__(self):
+        """Start without anything packaged."""
+        self.packaged = {}
+
+    def __call__(self, path, *_, **kwargs):
+        """Build the fake package."""
+        # Like lambda_uploader, add its workspace to the ignored files
+        kwargs.get('ignore', []).append(r'^\.lambda_uploader_temp/.*')
+        pkg = MagicMock()
+        pkg.zip_file = os.path.join(path, kwargs['zipfile_name'])
+        with zipfile.ZipFile(pkg.zip_file, 'w') as zip_file:
+            zip_file.writestr('lambda.py', 'zip')
+        self.packaged.clear()
+        for name in GENERATED_FILES:
+            if os.path.isfile(os.path.join(path, name)):
+                with open(os.path.join(path, name)) as stream:
+                    self.packaged[name] = json.load(stream)
+        return pkg
 
 
 class TestCLI(TestCase):
     """
     Test class for :mod::`lambada.cli` module.
     """
-    runner = CliRunner()
+    # pylint: disable=too-many-public-methods
+    def setUp(self):
+        """Keep deploy state and package hashing out of the real world."""
+        self.temp_dir = mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.state_file = os.path.join(self.temp_dir, 'state.json')
+        self.runner = CliRunner(env=dict(LAMBADA_STATE_FILE=self.state_file))
+        hash_patch = patch('lambada.cli.hash_file')
+        self.hash_file = hash_patch.start()
+        self.addCleanup(hash_patch.stop)
+        self.hash_file.return_value.hexdigest.return_value = 'zip-hash'
 
     def test_create_package(self):
         """Validate the packaging wrapper function."""
@@ -37,7 +82,9 @@ class TestCLI(TestCase):
                 path_dirname,
                 None,
                 virtualenv=None,
-                ignore=['foo'],
+                ignore=[
+                    'foo', r'^lambada\.zip$', r'^lambada\.manifest\.json$'
+                ],
                 extra_files=['bar'],
                 zipfile_name='lambada.zip'
             )
@@ -49,10 +96,10 @@ class TestCLI(TestCase):
                     # Make sure we called the underlying module correct
                     assert_build_call(build_package)
                     # Make sure we dumped the config
-                    self.assertTrue(tune.bouncer.export.called)
+                    self.assertTrue(tune.bouncer.compile.called)
                     # Make sure we opened the write path
                     patched_open.assert_called_with(
-                        os.path.join(path_dirname, '_lambada.yml'),
+                        os.path.join(path_dirname, '_lambada.json'),
                         'w',
                         encoding='UTF-8'
                     )
@@ -64,6 +111,157 @@ class TestCLI(TestCase):
             cli.create_package(path_dirname, tune, None, 'lambada.zip')
             assert_build_call(build_package)
 
+    @patch('lambada.cli.build_package')
+    def test_create_package_cache(self, build_package):
+        """Verify cached packages are reused instead of rebuilt."""
+        tune = MagicMock()
+        tune.config = dict(ignore_files=[], extra_files=[])
+        tune.bouncer.compile.side_effect = lambda stream: stream.write(
+            u'{"foo": "bar"}'
+        )
+        build_package.side_effect = FakeBuild()
+
+        temp_dir = mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        project = os.path.join(temp_dir, 'project')
+        shutil.copytree(make_fixture_path('basic', None), project)
+        cache = BuildCache(os.path.join(temp_dir, 'cache'))
+
+        pkg = cli.create_package(project, tune, None, 'out.zip', cache)
+        self.assertEqual(1, build_package.call_count)
+        self.assertEqual(1, len(cache.entries()))
+        os.remove(pkg.zip_file)
+
+        # Same inputs come straight from the cache
+        pkg = cli.create_package(project, tune, None, 'out.zip', cache)
+        self.assertEqual(1, build_package.call_count)
+        with zipfile.ZipFile(pkg.zip_file) as zip_file:
+            self.assertEqual(b'zip', zip_file.read('lambda.py'))
+        self.assertFalse(
+            os.path.exists(os.path.join(project, '_lambada.json'))
+        )
+
+        # Changing the bouncer configuration requires a rebuild
+        tune.bouncer.compile.side_effect = lambda stream: stream.write(
+            u'{"foo": "baz"}'
+        )
+        cli.create_package(project, tune, None, 'out.zip', cache)
+        self.assertEqual(2, build_package.call_count)
+        self.assertEqual(2, len(cache.entries()))
+
+    @patch.dict('lambada.Bouncer._instances', clear=True)
+    def test_create_package_reproducible(self):
+        """Verify building again gives the same bytes."""
+        project = os.path.join(self.temp_dir, 'project')
+        shutil.copytree(make_fixture_path('basic', None), project)
+        tune = cli.get_lambada_class(project)
+
+        def build():
+            """Build the project and return the bytes of its zip."""
+            pkg = cli.create_package(
+                project, tune, None, 'out.zip', reproducible=True
+            )
+            with open(pkg.zip_file, 'rb') as stream:
+                return stream.read()
+
+        first = build()
+        # The previous zip and its manifest are left out of the next one
+        self.assertEqual(first, build())
+        self.assertTrue(
+            os.path.isfile(os.path.join(project, 'out.manifest.json'))
+        )
+
+    @patch.dict('lambada.Bouncer._instances', clear=True)
+    @patch('lambada.cli.build_package')
+    def test_create_package_working_directory(self, build_package):
+        """Verify packaging works from the project directory."""
+        project = os.path.join(self.temp_dir, 'project')
+        shutil.copytree(make_fixture_path('basic', None), project)
+        bouncer_config = os.path.join(project, '_lambada.json')
+        original_dir = os.getcwd()
+        os.chdir(project)
+        self.addCleanup(os.chdir, original_dir)
+        tune = cli.get_lambada_class('./')
+        build = build_package.side_effect = FakeBuild()
+
+        # The compiled configuration comes first when looking in the
+        # working directory, like it does in Lambda
+        with patch('lambada.CONFIG_PATHS', [bouncer_config]), \
+                patch.dict(os.environ, dict(BOUNCER_THING='yes')):
+            cli.create_package('./', tune, None)
+            self.assertEqual('yes', build.packaged['_lambada.json']['thing'])
+            self.assertFalse(os.path.exists(bouncer_config))
+            # Later loads in the directory aren't broken either
+            Bouncer._instances.clear()  # pylint: disable=protected-access
+            self.assertEqual('yes', Bouncer.get().thing)
+
+    @patch('lambada.cli.build_package')
+    def test_create_package_routes(self, build_package):
+        """Verify bootstrapped tunes get their routing manifest packaged."""
+        project = os.path.join(self.temp_dir, 'project')
+        shutil.copytree(make_fixture_path('routing', None), project)
+        tune = cli.get_lambada_class(project)
+        build = build_package.side_effect = FakeBuild()
+
+        cli.create_package(project, tune, None)
+        routes = build.packaged['_lambada_routes.json']['routes']
+        self.assertEqual('lambda:hello', routes['hello'])
+        self.assertFalse(
+            os.path.exists(os.path.join(project, '_lambada_routes.json'))
+        )
+
+        # Bootstrapping a single dancer also needs the manifest
+        tune.config['bootstrap'] = False
+        tune.dancers['hello'].override_config['bootstrap'] = True
+        cli.create_package(project, tune, None)
+        routes = build.packaged['_lambada_routes.json']['routes']
+        self.assertEqual('lambda:hello', routes['hello'])
+
+        # Without the bootstrap handler there is nothing to route
+        del tune.dancers['hello'].override_config['bootstrap']
+        cli.create_package(project, tune, None)
+        self.assertNotIn('_lambada_routes.json', build.packaged)
+
+    @patch('lambada.cli.install_dependencies')
+    @patch('lambada.cli.build_package')
+    def test_create_package_dependencies(self, build_package, install):
+        """Verify installed requirements are reused across source changes."""
+        tune = MagicMock()
+        tune.config = dict(ignore_files=[], extra_files=[])
+        tune.bouncer.compile.side_effect = lambda stream: stream.write(u'{}')
+        build_package.side_effect = FakeBuild()
+        install.side_effect = lambda path, requirements, venv_dir: (
+            os.makedirs(os.path.join(venv_dir, 'bin'))
+        )
+
+        temp_dir = mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        project = os.path.join(temp_dir, 'project')
+        shutil.copytree(make_fixture_path('basic', None), project)
+        cache = BuildCache(os.path.join(temp_dir, 'cache'))
+
+        cli.create_package(project, tune, ['six'], 'out.zip', cache)
+        self.assertEqual(1, install.call_count)
+        virtualenv = build_package.call_args[1]['virtualenv']
+        self.assertTrue(os.path.isdir(virtualenv))
+
+        # A source change rebuilds the zip but not the dependencies
+        with open(os.path.join(project, 'extra.py'), 'w') as stream:
+            stream.write('VALUE = 1\n')
+        cli.create_package(project, tune, ['six'], 'out.zip', cache)
+        self.assertEqual(2, build_package.call_count)
+        self.assertEqual(1, install.call_count)
+        self.assertEqual(
+            virtualenv, build_package.call_args[1]['virtualenv']
+        )
+
+        # New requirements are installed again
+        cli.create_package(project, tune, ['six', 'click'], 'out.zip', cache)
+        self.assertEqual(2, install.call_count)
+        self.assertNotEqual(
+            virtualenv, build_package.call_args[1]['virtualenv']
+        )
+
     def test_cli(self):
         """Test out the tune finder."""
         path = make_fixture_path('basic')
@@ -110,10 +308,95 @@ class TestCLI(TestCase):
         self.assertEqual(0, result.exit_code)
         self.assertIn('Event: Everyone is the best!', result.output)
 
+    def test_run_event_file(self):
+        """Verify JSON events are loaded from a file and results shown."""
+        result = self.runner.invoke(cli.cli, [
+            '--path', make_fixture_path('batch'),
+            'run', 'threaded',
+            '--event-file', make_fixture_path('batch', 'sqs_event.json'),
+        ])
+        self.assertEqual(0, result.exit_code, result.output)
+        self.assertEqual(
+            dict(batchItemFailures=[
+                dict(itemIdentifier='2e1424d4-f796-459a-8184-9c92662be6da')
+            ]),
+            json.loads(result.output)
+        )
+
+    def test_run_timeout(self):
+        """Verify --timeout enforces dancer budgets."""
+        args = ['--path', make_fixture_path('budget'), 'run', 'slow']
+        result = self.runner.invoke(cli.cli, args + ['--event', '0.2'])
+        self.assertEqual(0, result.exit_code, result.output)
+        result = self.runner.invoke(
+            cli.cli, args + ['--event', '0.2', '--timeout', '1']
+        )
+        self.assertEqual(1, result.exit_code)
+        self.assertIn('Dancer slow ran out of budget', result.output)
+
+        events = os.path.join(self.temp_dir, 'events.jsonl')
+        with open(events, 'w') as stream:
+            stream.write('0\n0.2\n')
+        result = self.runner.invoke(cli.cli, args + [
+            '--events-file', events, '--timeout', '1'
+        ])
+        self.assertIn('Ran 2 event(s) with 1 error(s)', result.output)
+        self.assertIn('BudgetExceeded', result.output)
+
+    def test_run_events_file(self):
+        """Verify many events are run with results in order."""
+        output = os.path.join(self.temp_dir, 'results.jsonl')
+        args = [
+            '--path', make_fixture_path('replay'),
+            'run', 'double',
+            '--events-file', make_fixture_path('replay', 'events.jsonl'),
+            '--output', output,
+        ]
+        result = self.runner.invoke(cli.cli, args + ['--workers', '2'])
+        self.assertEqual(1, result.exit_code)
+        self.assertIn('Ran 5 event(s) with 2 error(s)', result.output)
+        self.assertIn('2 event(s) failed', result.output)
+        with open(output) as stream:
+            results = [json.loads(line) for line in stream]
+        self.assertEqual([0, 1, 2, 3, 4], [r['index'] for r in results])
+        self.assertEqual('abab', results[1]['result'])
+
+        # Results can go to stdout too
+        result = self.runner.invoke(cli.cli, args[:-2] + ['--workers', '1'])
+        self.assertIn('"result": "abab"', result.output)
+
+        result = self.runner.invoke(
+            cli.cli,
+            [
+                '--path', make_fixture_path('replay'),
+                'run', 'nope',
+                '--events-file', make_fixture_path('replay', 'events.jsonl'),
+            ]
+        )
+        self.assertEqual(1, result.exit_code)
+        self.assertIn("Dancer nope doesn't exist", result.output)
+
+    def test_run_lazy(self):
+        """Verify lazy dancers can import from the project when run."""
+        original_sys_path = sys.path[:]
+        self.addCleanup(setattr, sys, 'path', original_sys_path)
+        self.addCleanup(sys.modules.pop, 'lazy_heavy', None)
+        result = self.runner.invoke(
+            cli.cli,
+            [
+                '--path', make_fixture_path('lazy'),
+                'run', 'crunch',
+                '--event', 'numbers'
+            ]
+        )
+        self.assertEqual(0, result.exit_code)
+        self.assertIn('Crunched: numbers', result.output)
+
     @patch('lambada.cli.get_lambada_class')
     @patch('lambada.cli.create_package')
     def test_package(self, create_package, get_lambada_class):
         """Test out listing our dancers."""
+        get_lambada_class.return_value.config = {}
         # Run with defaults
         result = self.runner.invoke(
             cli.cli,
@@ -128,6 +411,9 @@ class TestCLI(TestCase):
             get_lambada_class(),
             './requirements.txt',
             'lambda.zip',
+            cache=None,
+            reproducible=False,
+            layer=None
         )
         # Invalid requirement handling
         result = self.runner.invoke(
@@ -145,7 +431,59 @@ class TestCLI(TestCase):
             get_lambada_class(),
             './test_requirements.txt',
             'blah.zip',
+            cache=None,
+            reproducible=False,
+            layer=None
+        )
+
+        # Enable the build cache
+        result = self.runner.invoke(
+            cli.cli,
+            [
+                '--path', make_fixture_path('basic'),
+                'package',
+                '--cache-dir', '/tmp/lambada-cache',
+                '--cache-max-size', '2',
+                '--cache-max-age', '1',
+            ]
         )
+        self.assertEqual(0, result.exit_code)
+        cache = create_package.call_args[1]['cache']
+        self.assertEqual('/tmp/lambada-cache', cache.cache_dir)
+        self.assertEqual(2 * 1024 * 1024, cache.max_size)
+        self.assertEqual(24 * 60 * 60, cache.max_age)
+
+    @patch('lambada.cli.package_report')
+    @patch('lambada.cli.create_package')
+    def test_package_report(self, create_package, package_report):
+        """Verify the report of the built package is shown."""
+        create_package.return_value.zip_file = 'lambda.zip'
+        package_report.return_value = dict(
+            zip_file='lambda.zip',
+            zip_bytes=2048,
+            uncompressed_bytes=4096,
+            zip_limit_percent=0.1,
+            uncompressed_limit_percent=0.1,
+            packages=[dict(
+                name='six',
+                files=1,
+                compressed_bytes=2048,
+                uncompressed_bytes=4096,
+                strippable_bytes=0,
+                import_ms=1.5,
+            )],
+            strippable=dict(tests={}),
+        )
+        args = ['--path', make_fixture_path('basic'), 'package']
+        result = self.runner.invoke(cli.cli, args)
+        self.assertEqual(0, result.exit_code, result.output)
+        self.assertFalse(package_report.called)
+
+        result = self.runner.invoke(cli.cli, args + ['--report'])
+        self.assertEqual(0, result.exit_code, result.output)
+        package_report.assert_called_once_with('lambda.zip')
+        self.assertIn('lambda.zip: 2.0 KB zipped', result.output)
+        self.assertIn('1.50  six', result.output)
 
     @patch('lambada.cli.PackageUploader')
     @patch('lambada.cli.create_package')
@@ -190,3 +528,271 @@ class TestCLI(TestCase):
         )
         self.assertNotEqual(0, result.exit_code)
         self.assertIn("Dancer fhqwhgads doesn't exist", result.output)
+
+    @patch('lambada.cli.PackageUploader')
+    @patch('lambada.cli.create_package')
+    def test_upload_jobs(self, create_package, uploader):
+        """Verify concurrent uploads report every dancer and failures."""
+        result = self.runner.invoke(
+            cli.cli,
+            [
+                '--path', make_fixture_path('basic'),
+                'upload', '--jobs', '4'
+            ]
+        )
+        self.assertEqual(0, result.exit_code)
+        self.assertEqual(len(BASIC_DANCERS), uploader.call_count)
+        for dancer in BASIC_DANCERS:
+            self.assertIn(
+                'Finished uploading {}'.format(dancer),
+                result.output
+            )
+        self.assertTrue(create_package().clean_zipfile.called)
+
+        # Fail one of the dancers and make sure the others still go
+        def fail_hi(pkg):
+            """Raise for the hi dancer only."""
+            if uploader.call_args[0][0].raw['name'] == 'hi':
+                raise Exception('Rate exceeded')
+            return pkg
+        uploader.reset_mock()
+        uploader.return_value.upload.side_effect = fail_hi
+        result = self.runner.invoke(
+            cli.cli,
+            [
+                '--path', make_fixture_path('basic'),
+                'upload', '--jobs', '1'
+            ]
+        )
+        self.assertEqual(1, result.exit_code)
+        self.assertEqual(len(BASIC_DANCERS), uploader.call_count)
+        self.assertIn('Failed to upload hi: Rate exceeded', result.output)
+        self.assertIn('Failed to upload dancers: hi', result.output)
+        self.assertIn('Finished uploading test_argless', result.output)
+
+        # Invalid job counts are rejected by click
+        uploader.reset_mock()
+        result = self.runner.invoke(
+            cli.cli,
+            [
+                '--path', make_fixture_path('basic'),
+                'upload', '--jobs', '0'
+            ]
+        )
+        self.assertNotEqual(0, result.exit_code)
+        self.assertFalse(uploader.called)
+
+    def test_upload_dancers(self):
+        """Exercise the upload pool directly with a stubbed uploader."""
+        uploaded = []
+
+        class StubUploader(object):
+            """Records the dancers it was asked to upload."""
+            # pylint: disable=too-few-public-methods
+            def __init__(self, config, _):
+                self.name = config.raw['name']
+
+            def upload(self, pkg):
+                """Record the upload."""
+                uploaded.append((self.name, pkg))
+
+        tune = MagicMock()
+        tune.config = dict(
+            region='us-east-1', role='arn', handler='lambda.tune',
+            timeout=30, memory=128, vpc=None, requirements=[],
+            ignore_files=[], extra_files=[], subnets=None,
+            security_groups=None,
+        )
+        dancers = []
+        for name in ('one', 'two', 'three'):
+            dancer = MagicMock()
+            dancer.name = name
+            dancer.config = dict(name=name, description='')
+            dancers.append(dancer)
+        with patch('lambada.cli.LambadaConfig') as config:
+            config.side_effect = lambda _, conf: MagicMock(raw=conf)
+            failed = cli.upload_dancers(
+                '.', tune, dancers, 'pkg', jobs=3, uploader=StubUploader
+            )
+        self.assertEqual([], failed)
+        self.assertEqual(
+            set([('one', 'pkg'), ('two', 'pkg'), ('three', 'pkg')]),
+            set(uploaded)
+        )
+        self.assertEqual([], cli.upload_dancers('.', tune, [], 'pkg'))
+
+    @patch('lambada.cli.PackageUploader')
+    @patch('lambada.cli.install_dependencies')
+    @patch('lambada.cli.build_package')
+    def test_upload_changed_only_cached(self, build_package, install,
+                                        uploader):
+        """Verify cached builds leave unchanged dancers unchanged."""
+        build_package.side_effect = FakeBuild()
+        install.side_effect = lambda path, requirements, venv_dir: (
+            os.makedirs(os.path.join(venv_dir, 'bin'))
+        )
+        project = os.path.join(self.temp_dir, 'project')
+        shutil.copytree(make_fixture_path('ignore', None), project)
+        args = [
+            '--path', project, 'upload', '--changed-only',
+            '--cache-dir', os.path.join(self.temp_dir, 'cache'),
+        ]
+        result = self.runner.invoke(cli.cli, args)
+        self.assertEqual(0, result.exit_code, result.output)
+        self.assertEqual(1, uploader.call_count)
+
+        # The second build comes from the cache and nothing changed
+        result = self.runner.invoke(cli.cli, args)
+        self.assertEqual(0, result.exit_code, result.output)
+        self.assertEqual(1, build_package.call_count)
+        self.assertEqual(1, uploader.call_count)
+        self.assertIn('Skipping unchanged hello', result.output)
+
+        # Nor is there configuration left to sync
+        result = self.runner.invoke(
+            cli.cli, ['--path', project, 'sync-config', '--dry-run']
+        )
+        self.assertEqual(0, result.exit_code, result.output)
+        self.assertEqual('hello is up to date\n', result.output)
+
+    @patch('lambada.cli.PackageUploader')
+    @patch('lambada.cli.install_dependencies')
+    @patch('lambada.cli.build_package')
+    def test_upload_cached_groups(self, build_package, install, _):
+        """Verify every package of an upload comes from the cache."""
+        build_package.side_effect = FakeBuild()
+        install.side_effect = lambda path, requirements, venv_dir: (
+            os.makedirs(os.path.join(venv_dir, 'bin'))
+        )
+        project = os.path.join(self.temp_dir, 'project')
+        shutil.copytree(make_fixture_path('prune', None), project)
+        args = [
+            '--path', project, 'upload',
+            '--requirements', os.path.join(project, 'requirements.txt'),
+            '--cache-dir', os.path.join(self.temp_dir, 'cache'),
+        ]
+        result = self.runner.invoke(cli.cli, args)
+        self.assertEqual(0, result.exit_code, result.output)
+        self.assertEqual(2, build_package.call_count)
+
+        # Later groups aren't thrown off by the builds before them
+        result = self.runner.invoke(cli.cli, args)
+        self.assertEqual(0, result.exit_code, result.output)
+        self.assertEqual(2, build_package.call_count)
+        self.assertEqual(2, result.output.count('Using cached package'))
+
+    @patch('lambada.cli.PackageUploader')
+    @patch('lambada.cli.create_package')
+    def test_upload_changed_only(self, create_package, uploader):
+        """Verify unchanged dancers are skipped with --changed-only."""
+        args = ['--path', make_fixture_path('basic'), 'upload']
+        result = self.runner.invoke(cli.cli, args + ['--changed-only'])
+        self.assertEqual(0, result.exit_code)
+        self.assertEqual(len(BASIC_DANCERS), uploader.call_count)
+        self.assertIn('Skipped 0 unchanged dancer(s)', result.output)
+        self.assertTrue(os.path.isfile(self.state_file))
+        self.assertTrue(create_package.call_args[1]['reproducible'])
+        # Packages are built somewhere temporary that is cleaned up
+        destination = create_package.call_args[0][3]
+        self.assertFalse(os.path.exists(os.path.dirname(destination)))
+
+        # Nothing changed so nothing is uploaded
+        uploader.reset_mock()
+        result = self.runner.invoke(cli.cli, args + ['--changed-only'])
+        self.assertEqual(0, result.exit_code)
+        self.assertFalse(uploader.called)
+        for dancer in BASIC_DANCERS:
+            self.assertIn(
+                'Skipping unchanged {}'.format(dancer),
+                result.output
+            )
+
+        # A new package uploads everything, failures are retried next time
+        self.hash_file.return_value.hexdigest.return_value = 'new-hash'
+        uploader.return_value.upload.side_effect = Exception('Nope')
+        result = self.runner.invoke(cli.cli, args + ['--changed-only', 'hi'])
+        self.assertEqual(1, result.exit_code)
+        uploader.reset_mock()
+        uploader.return_value.upload.side_effect = None
+        result = self.runner.invoke(cli.cli, args + ['--changed-only'])
+        self.assertEqual(0, result.exit_code)
+        self.assertEqual(len(BASIC_DANCERS), uploader.call_count)
+
+        # Without the flag everything is uploaded regardless
+        uploader.reset_mock()
+        result = self.runner.invoke(cli.cli, args)
+        self.assertEqual(0, result.exit_code)
+        self.assertEqual(len(BASIC_DANCERS), uploader.call_count)
+
+    @patch('lambada.cli.PackageUploader')
+    @patch('lambada.cli.create_package')
+    def test_upload_prune_requirements(self, create_package, uploader):
+        """Verify dancers get packages with their own requirements."""
+        built = {}
+
+        def fake_package(_, __, requirements, destination, **___):
+            """Remember the requirements of each package."""
+            pkg = MagicMock()
+            with open(requirements) as stream:
+                built[destination] = stream.read().split()
+            pkg.requirements = built[destination]
+            return pkg
+        create_package.side_effect = fake_package
+
+        prune = make_fixture_path('prune', None)
+        result = self.runner.invoke(
+            cli.cli,
+            [
+                '--path', prune,
+                'upload', '--prune-requirements',
+                '--requirements', os.path.join(prune, 'requirements.txt')
+            ]
+        )
+        self.assertEqual(0, result.exit_code, result.output)
+        self.assertEqual(3, len(built))
+        self.assertIn(
+            'Creating package for plain with 2 requirement(s)', result.output
+        )
+        uploaded = dict(
+            (call[0][0].raw['name'], upload_call[0][0].requirements)
+            for call, upload_call in zip(
+                uploader.call_args_list,
+                uploader.return_value.upload.call_args_list
+            )
+        )
+        self.assertEqual(
+            ['PyYAML>=3.12', 'click', 'six', 'not-a-real-distribution==1.0'],
+            uploaded['report']
+        )
+        self.assertEqual([], uploaded['custom'])
+
+        # Without pruning only the custom dancer gets its own package
+        create_package.reset_mock()
+        create_package.side_effect = None
+        result = self.runner.invoke(
+            cli.cli, ['--path', prune, 'upload']
+        )
+        self.assertEqual(0, result.exit_code, result.output)
+        self.assertEqual(2, create_package.call_count)
+        self.assertIn(
+            'Creating package for custom with 2 requirement(s)', result.output
+        )
+
+    @patch('lambada.cli.LayerUploader')
+    @patch('lambada.cli.PackageUploader')
+    @patch('lambada.cli.create_package')
+    def test_upload_layer(self, create_package, uploader, layer_uploader):
+        """Verify dancers using a layer are packaged without requirements."""
+        create_package.side_effect = lambda *_, **__: MagicMock()
+        result = self.runner.invoke(
+            cli.cli, ['--path', make_fixture_path('layer', None), 'upload']
+        )
+        self.assertEqual(0, result.exit_code, result.output)
+        self.assertEqual(2, create_package.call_count)
+        layers = [call[1]['layer'] for call in create_package.call_args_list]
+        self.assertEqual([None, 'deps'], sorted(layers, key=str))
+        self.assertIn('using layer deps', result.output)
+        self.assertIn('Creating package for bundled with 1 requirement(s)',
+                      result.output)
+        self.assertFalse(uploader.called)
+        self.assertEqual(3, layer_uploader.call_count)
@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the :mod::`lambada.commands` package.
+"""
+import json
+import os
+import shutil
+import subprocess
+from tempfile import mkdtemp
+from unittest import TestCase
+
+from click.testing import CliRunner
+from mock import patch
+
+from lambada import cli
+from lambada.deploy import dancer_config, DeployState
+from lambada.tests.common import make_fixture_path
+
+
+class TestCommands(TestCase):
+    """
+    Test class for :mod::`lambada.commands` package.
+    """
+    def setUp(self):
+        """Keep deploy state and written files out of the real world."""
+        self.temp_dir = mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.runner = CliRunner(env=dict(
+            LAMBADA_STATE_FILE=os.path.join(self.temp_dir, 'state.json')
+        ))
+
+    def test_tune_memory(self):
+        """Size a fixture dancer and write the report and patch."""
+        output = os.path.join(self.temp_dir, 'sizing.json')
+        patch_file = os.path.join(self.temp_dir, 'sizing.patch')
+        args = [
+            '--path', make_fixture_path('basic'), 'tune-memory', 'hi',
+            '--events', make_fixture_path('events.jsonl', None),
+        ]
+        result = self.runner.invoke(cli.cli, args + [
+            '--headroom', '0.5', '--output', output, '--patch', patch_file,
+        ])
+        self.assertEqual(0, result.exit_code, result.output)
+        self.assertNotIn('Event:', result.output)
+        report = json.loads(result.output)
+        self.assertEqual(dict(memory=128, timeout=30), report['current'])
+        self.assertEqual(3, report['measured']['calls'])
+        with open(output) as stream:
+            self.assertEqual(report, json.load(stream))
+        with open(patch_file) as stream:
+            patch_text = stream.read()
+        self.assertIn('--- a/lambda.py\n+++ b/lambda.py\n', patch_text)
+        self.assertIn(
+            "+@tune.dancer(name='hi', memory={}, timeout={})".format(
+                report['recommended']['memory'],
+                report['recommended']['timeout'],
+            ),
+            patch_text
+        )
+
+        result = self.runner.invoke(
+            cli.cli,
+            ['--path', make_fixture_path('basic'), 'tune-memory', 'nope',
+             '--events', make_fixture_path('events.jsonl', None)]
+        )
+        self.assertEqual(1, result.exit_code)
+        self.assertIn("Dancer nope doesn't exist", result.output)
+
+    def test_bench(self):
+        """Benchmark a fixture dancer and compare with baselines."""
+        output = os.path.join(self.temp_dir, 'bench.json')
+        args = [
+            '--path', make_fixture_path('basic'), 'bench', 'hi',
+            '--iterations', '5', '--warmup', '1'
+        ]
+        result = self.runner.invoke(cli.cli, args + [
+            '--events', make_fixture_path('events.jsonl', None),
+            '--output', output,
+        ])
+        self.assertEqual(0, result.exit_code, result.output)
+        self.assertNotIn('Event:', result.output)
+        bench_result = json.loads(result.output)
+        self.assertEqual(5, bench_result['iterations'])
+        self.assertEqual(3, bench_result['events'])
+        with open(output) as stream:
+            self.assertEqual(bench_result, json.load(stream))
+
+        # Compare with a much faster baseline, keeping the other values
+        # out of reach of timing noise
+        bench_result['latency_ms'].update(p95=1e9, p99=1e9)
+        bench_result['memory'].update(
+            peak_rss_bytes=1e18, peak_allocated_bytes=1e18
+        )
+        bench_result['latency_ms']['p50'] /= 1000.0
+        with open(output, 'w') as stream:
+            json.dump(bench_result, stream)
+        result = self.runner.invoke(cli.cli, args + ['--compare', output])
+        self.assertEqual(1, result.exit_code)
+        self.assertIn('Regression: p50 latency', result.output)
+        self.assertIn('1 regression(s) against', result.output)
+        result = self.runner.invoke(
+            cli.cli, args + ['--compare', output, '--threshold', '1e9']
+        )
+        self.assertEqual(0, result.exit_code, result.output)
+
+        result = self.runner.invoke(
+            cli.cli, ['--path', make_fixture_path('basic'), 'bench', 'nope']
+        )
+        self.assertEqual(1, result.exit_code)
+        self.assertIn("Dancer nope doesn't exist", result.output)
+
+    @patch('lambada.commands.startup.run_profile')
+    def test_profile_startup(self, run_profile):
+        """Verify the startup profile is shown as a table or JSON."""
+        run_profile.return_value = dict(
+            dancer='hi',
+            import_time=0.5,
+            first_call=0.25,
+            warm_calls=[0.001],
+            imports=dict(name='', time=0.5, children=[
+                dict(name='pandas', time=0.4, children=[])
+            ])
+        )
+        args = ['--path', make_fixture_path('basic'), 'profile-startup']
+        result = self.runner.invoke(cli.cli, args + ['hi'])
+        self.assertEqual(0, result.exit_code)
+        self.assertIn('500.00 ms  import of handler module', result.output)
+        self.assertIn('250.00 ms  first call', result.output)
+        self.assertIn('pandas', result.output)
+        run_profile.assert_called_with(
+            make_fixture_path('basic'), 'hi', 'test', 5
+        )
+
+        result = self.runner.invoke(cli.cli, args + ['hi', '--json'])
+        self.assertEqual(0, result.exit_code)
+        self.assertEqual(run_profile.return_value, json.loads(result.output))
+
+        result = self.runner.invoke(cli.cli, args + ['nope'])
+        self.assertEqual(1, result.exit_code)
+        self.assertIn("Dancer nope doesn't exist", result.output)
+
+        run_profile.side_effect = subprocess.CalledProcessError(1, 'python')
+        result = self.runner.invoke(cli.cli, args + ['hi'])
+        self.assertEqual(1, result.exit_code)
+        self.assertIn('Unable to profile hi', result.output)
+
+    @patch('lambada.commands.layer.build_layer')
+    def test_layer_build(self, build_layer):
+        """Verify the layer is built from the tune's requirements."""
+        fixture = make_fixture_path('layer', None)
+        result = self.runner.invoke(
+            cli.cli,
+            [
+                '--path', fixture, 'layer', 'build',
+                '--requirements', os.path.join(fixture, 'requirements.txt'),
+            ]
+        )
+        self.assertEqual(0, result.exit_code, result.output)
+        build_layer.assert_called_once_with(
+            os.path.abspath(fixture),
+            os.path.join(fixture, 'requirements.txt'),
+            'layer.zip',
+            cache=None
+        )
+        self.assertIn('Built layer layer.zip', result.output)
+
+        # Configured requirements win over the requirements file
+        result = self.runner.invoke(
+            cli.cli,
+            [
+                '--path', make_fixture_path('prune', None),
+                'layer', 'build', '--destination', 'deps.zip',
+                '--cache-dir', os.path.join(self.temp_dir, 'cache'),
+                '--requirements', os.path.join(fixture, 'requirements.txt'),
+            ]
+        )
+        self.assertEqual(0, result.exit_code, result.output)
+        self.assertEqual('deps.zip', build_layer.call_args[0][2])
+        self.assertIsNotNone(build_layer.call_args[1]['cache'])
+
+    @patch('lambada.commands.layer.publish_layer')
+    @patch('lambada.commands.layer.lambda_client')
+    @patch('lambada.commands.layer.build_layer')
+    def test_layer_publish(self, build_layer, lambda_client, publish_layer):
+        """Verify the layer is published under the configured name."""
+        fixture = make_fixture_path('layer', None)
+        args = [
+            '--path', fixture, 'layer', 'publish',
+            '--requirements', os.path.join(fixture, 'requirements.txt'),
+        ]
+        publish_layer.return_value = ('arn:deps:1', True)
+        result = self.runner.invoke(cli.cli, args)
+        self.assertEqual(0, result.exit_code, result.output)
+        self.assertTrue(build_layer.called)
+        lambda_client.assert_called_once_with('us-east-1')
+        publish_layer.assert_called_once_with(
+            lambda_client.return_value,
+            'deps',
+            'layer.zip',
+            runtimes=['python2.7'],
+            description='Requirements of deps'
+        )
+        self.assertIn('Published layer arn:deps:1', result.output)
+
+        publish_layer.return_value = ('arn:deps:1', False)
+        result = self.runner.invoke(cli.cli, args)
+        self.assertEqual(0, result.exit_code, result.output)
+        self.assertIn('Layer arn:deps:1 is unchanged', result.output)
+
+        # Tunes without a layer have nothing to publish
+        result = self.runner.invoke(
+            cli.cli,
+            [
+                '--path', make_fixture_path('basic'), 'layer', 'publish',
+                '--requirements', os.path.join(fixture, 'requirements.txt'),
+            ]
+        )
+        self.assertEqual(1, result.exit_code)
+        self.assertIn('Set layer in the Lambada configuration', result.output)
+
+    @patch('lambada.commands.deploy.lambda_client')
+    def test_sync_config(self, lambda_client):
+        """Verify only the configuration of uploaded dancers is updated."""
+        temp_dir = mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        state_file = os.path.join(temp_dir, 'state.json')
+        path = make_fixture_path('basic')
+        tune = cli.get_lambada_class(path)
+        state = DeployState(state_file)
+        config = dancer_config(tune, tune.dancers['hi'])
+        config['memory'] = 64
+        state.record(config, 'abc')
+        state.save()
+        args = ['--path', path, 'sync-config', '--state-file', state_file]
+
+        result = self.runner.invoke(cli.cli, args + ['--dry-run'])
+        self.assertEqual(0, result.exit_code, result.output)
+        self.assertIn('Would update hi: memory 64 -> 128', result.output)
+        self.assertIn('Skipping test_lambada', result.output)
+        self.assertFalse(lambda_client.called)
+
+        result = self.runner.invoke(
+            cli.cli, args + ['hi', '--endpoint-url', 'http://localhost:1']
+        )
+        self.assertEqual(0, result.exit_code, result.output)
+        self.assertIn('Updating hi: memory 64 -> 128', result.output)
+        lambda_client.assert_called_once_with(
+            'us-east-1', 'http://localhost:1'
+        )
+        update = lambda_client.return_value.update_function_configuration
+        self.assertEqual(128, update.call_args[1]['MemorySize'])
+        result = self.runner.invoke(cli.cli, args + ['hi'])
+        self.assertIn('hi is up to date', result.output)
+
+        update.side_effect = ValueError('nope')
+        state = DeployState(state_file)
+        state.record(config, 'abc')
+        state.save()
+        result = self.runner.invoke(cli.cli, args + ['hi'])
+        self.assertEqual(1, result.exit_code)
+        self.assertIn('Failed to update dancers: hi', result.output)
+
+        result = self.runner.invoke(cli.cli, args + ['fhqwhgads'])
+        self.assertEqual(1, result.exit_code)
+        self.assertIn("Dancer fhqwhgads doesn't exist", result.output)
@@ -2,8 +2,13 @@
 """
 Tests for the :mod::`lambada.common` module.
 """
+import ast
+import json
 import os
+import shutil
+import subprocess
 import sys
+from tempfile import mkdtemp
 from unittest import TestCase
 
 import click
@@ -18,6 +23,20 @@ class TestCommon(TestCase):
     """
     Test running class for :mod::`lambada.common` module.
     """
+    def setUp(self):
+        """Keep the discovery cache of the tests to themselves."""
+        self.temp_dir = mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.cache_file = os.path.join(
+            self.temp_dir, 'cache', 'discovery.json'
+        )
+        for patcher in (
+                patch('lambada.common.DISCOVERY_CACHE_FILE', self.cache_file),
+                patch.dict('lambada.common._DISCOVERY_CACHE', clear=True),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
     @patch('lambada.common.time')
     def test_get_time_millis(self, mock_time):
         """Verify we get the  time in milliseconds since epoch."""
@@ -74,6 +93,106 @@ class TestCommon(TestCase):
             tune = common.get_lambada_class(path)
             self.assertTrue('lambda0' in tune.dancers)
 
+    def test_get_lambada_class_discovery(self):
+        """Verify only the module declaring a tune gets imported."""
+        path = make_fixture_path('discover', None)
+        with patch('lambada.common.click.echo') as echo:
+            tune = common.get_lambada_class(path)
+        self.assertFalse(echo.called)
+        self.assertIn('discovered', tune.dancers)
+
+    def test_declares_lambada(self):
+        """Verify files are scanned without importing and cached."""
+        self.assertTrue(common.declares_lambada(make_fixture_path('basic')))
+        self.assertTrue(common.declares_lambada(
+            make_fixture_path('discover')
+        ))
+        self.assertFalse(common.declares_lambada(
+            make_fixture_path('discover', 'helpers.py')
+        ))
+        self.assertFalse(common.declares_lambada(
+            make_fixture_path('nodancers', 'nope.py')
+        ))
+
+        temp_dir = mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        python_file = os.path.join(temp_dir, 'app.py')
+        with open(python_file, 'w') as stream:
+            stream.write('import lambada\ntune = lambada.Lambada()\n')
+        with patch('lambada.common.ast.parse', wraps=ast.parse) as parse:
+            self.assertTrue(common.declares_lambada(python_file))
+            self.assertTrue(common.declares_lambada(python_file))
+            self.assertEqual(1, parse.call_count)
+
+            # Changing the file scans it again
+            with open(python_file, 'w') as stream:
+                stream.write('from lambada import Lambada\n')
+            os.utime(python_file, (0, 0))
+            self.assertFalse(common.declares_lambada(python_file))
+            self.assertEqual(2, parse.call_count)
+
+            # Broken files aren't candidates
+            with open(python_file, 'w') as stream:
+                stream.write('Lambada(\n')
+            self.assertFalse(common.declares_lambada(python_file))
+
+    def test_discovery_cache(self):
+        """Verify scans are saved once and shared between processes."""
+        project = os.path.join(self.temp_dir, 'project')
+        os.makedirs(project)
+        python_file = os.path.join(project, 'app.py')
+        with open(python_file, 'w') as stream:
+            stream.write('import lambada\ntune = lambada.Lambada()\n')
+        helper_file = os.path.join(project, 'helper.py')
+        with open(helper_file, 'w') as stream:
+            stream.write('Lambada = None\n')
+        # pylint: disable=protected-access
+        save_cache = common._save_discovery_cache
+        with patch(
+                'lambada.common._save_discovery_cache', wraps=save_cache
+        ) as save:
+            self.assertIsNotNone(common.get_lambada_class(project))
+            self.assertEqual(1, save.call_count)
+            # Nothing new to save
+            self.assertIsNotNone(common.get_lambada_class(project))
+            self.assertEqual(1, save.call_count)
+        with open(self.cache_file) as stream:
+            self.assertEqual(
+                set([python_file, helper_file]), set(json.load(stream))
+            )
+
+        script = '\n'.join([
+            'import ast, sys',
+            'from lambada import common',
+            'common.DISCOVERY_CACHE_FILE = sys.argv[1]',
+            'def parse(*args):',
+            '    raise AssertionError("parsed again")',
+            'ast.parse = parse',
+            'tune = common.get_lambada_class(sys.argv[2])',
+            'sys.stdout.write(repr(tune is not None))',
+        ])
+        env = os.environ.copy()
+        env['PYTHONPATH'] = os.path.dirname(os.path.dirname(common.__file__))
+        output = subprocess.check_output(
+            [sys.executable, '-c', script, self.cache_file, project],
+            env=env
+        )
+        self.assertEqual(b'True', output)
+
+        # Files that are gone are dropped from the cache
+        os.remove(helper_file)
+        common.get_lambada_class(project)
+        with open(self.cache_file) as stream:
+            self.assertEqual([python_file], list(json.load(stream)))
+
+        # Broken cache files are scanned again
+        with open(self.cache_file, 'w') as stream:
+            stream.write('{')
+        common._DISCOVERY_CACHE.clear()
+        with patch('lambada.common.ast.parse', wraps=ast.parse) as parse:
+            self.assertIsNotNone(common.get_lambada_class(project))
+            self.assertEqual(1, parse.call_count)
+
     @patch('lambada.common.LambadaConfig._validate')
     @patch('lambada.common.LambadaConfig._validate_vpc')
     def test_lambda_config(self, vpc_validate, validate):
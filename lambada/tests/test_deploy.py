@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the :mod::`lambada.deploy` module.
+"""
+import os
+import shutil
+from tempfile import mkdtemp
+from unittest import TestCase
+
+from mock import MagicMock
+
+from lambada import deploy, Dancer, Lambada
+from lambada.common import LambadaConfig
+
+
+class TestDeploy(TestCase):
+    """
+    Test class for :mod::`lambada.deploy` module.
+    """
+    def test_dancer_config(self):
+        """Verify dancer configuration wins over the tune."""
+        tune = Lambada(memory=256, timeout=10)
+        dancer = Dancer(lambda *_: None, 'hi', 'yo', memory=512)
+        config = deploy.dancer_config(tune, dancer)
+        self.assertEqual(512, config['memory'])
+        self.assertEqual(10, config['timeout'])
+        self.assertEqual('hi', config['name'])
+        self.assertEqual(256, tune.config['memory'])
+        self.assertEqual('lambda.tune', config['handler'])
+
+        # Bootstrapped dancers are deployed with the routing handler
+        dancer = Dancer(lambda *_: None, 'hi', 'yo', bootstrap=True)
+        config = deploy.dancer_config(tune, dancer)
+        self.assertEqual('lambada.routing.handler', config['handler'])
+        self.assertEqual('lambda.tune', tune.config['handler'])
+
+    def test_hash_dancer(self):
+        """Verify the hash is stable and depends on both inputs."""
+        config = dict(name='hi', memory=128, extra_files=['a', 'b'])
+        dancer_hash = deploy.hash_dancer('abc', config)
+        self.assertEqual(
+            dancer_hash,
+            deploy.hash_dancer('abc', dict(reversed(list(config.items()))))
+        )
+        self.assertNotEqual(dancer_hash, deploy.hash_dancer('abd', config))
+        config['memory'] = 256
+        self.assertNotEqual(dancer_hash, deploy.hash_dancer('abc', config))
+
+    def test_deploy_state(self):
+        """Verify state is recorded, saved, and reloaded."""
+        temp_dir = mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        state_file = os.path.join(temp_dir, 'nested', 'state.json')
+        config = dict(name='hi', region='us-east-1', memory=128)
+
+        state = deploy.DeployState(state_file)
+        self.assertIsNone(state.get(config))
+        self.assertFalse(state.is_current(config, 'abc'))
+        state.record(config, 'abc')
+        self.assertTrue(state.is_current(config, 'abc'))
+        state.save()
+
+        state = deploy.DeployState(state_file)
+        self.assertTrue(state.is_current(config, 'abc'))
+        self.assertFalse(state.is_current(config, 'abd'))
+        self.assertEqual(config, state.get(config)['config'])
+        # Same name in another region is a different function
+        config['region'] = 'us-west-2'
+        self.assertFalse(state.is_current(config, 'abc'))
+
+    def test_config_changes(self):
+        """Verify changes are split by whether they need a new package."""
+        deployed = dict(name='hi', memory=128, timeout=3, requirements=['a'])
+        self.assertEqual(([], []), deploy.config_changes(deployed, deployed))
+        # Changes to the package are for uploads to find
+        self.assertEqual(
+            (['memory', 'variables'], ['layer']),
+            deploy.config_changes(
+                deployed,
+                dict(
+                    name='hi',
+                    memory=256,
+                    timeout=3,
+                    requirements=('a', 'b'),
+                    variables=dict(A='1'),
+                    layer='deps',
+                )
+            )
+        )
+
+    def test_function_configuration(self):
+        """Verify the configuration is built like the uploader does."""
+        tune = Lambada(role='role', memory=256)
+        dancer = Dancer(lambda *_: None, 'hi', 'yo', timeout=10)
+        config = deploy.dancer_config(tune, dancer)
+        config['variables'] = dict(A='1')
+        arguments = deploy.function_configuration(
+            LambadaConfig('.', config)
+        )
+        self.assertEqual('hi', arguments['FunctionName'])
+        self.assertEqual('yo', arguments['Description'])
+        self.assertEqual(256, arguments['MemorySize'])
+        self.assertEqual(10, arguments['Timeout'])
+        self.assertEqual(dict(Variables=dict(A='1')), arguments['Environment'])
+        self.assertEqual(
+            dict(SubnetIds=[], SecurityGroupIds=[]), arguments['VpcConfig']
+        )
+
+    def test_sync_dancers_defaults(self):
+        """Verify the defaults filled in for the update aren't recorded."""
+        temp_dir = mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        state = deploy.DeployState(os.path.join(temp_dir, 'state.json'))
+        tune = Lambada(role='role')
+        dancer = Dancer(lambda *_: None, 'hi', 'yo')
+        config = deploy.dancer_config(tune, dancer)
+        config['runtime'] = 'python3.6'
+        state.record(config, deploy.hash_dancer('abc', config), 'abc')
+        client_factory = MagicMock()
+        update = client_factory.return_value.update_function_configuration
+
+        self.assertEqual([], deploy.sync_dancers(
+            temp_dir, tune, [dancer], state, 1, client_factory
+        ))
+        self.assertEqual('python2.7', update.call_args[1]['Runtime'])
+        config = deploy.dancer_config(tune, dancer)
+        self.assertIsNone(state.get(config)['config']['runtime'])
+        self.assertTrue(
+            state.is_current(config, deploy.hash_dancer('abc', config))
+        )
+
+    def test_sync_dancers(self):
+        """Verify only changed configuration of uploaded dancers is synced."""
+        temp_dir = mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        state = deploy.DeployState(os.path.join(temp_dir, 'state.json'))
+        tune = Lambada(role='role', memory=128)
+        dancers = [
+            Dancer(lambda *_: None, name, 'yo') for name in ('a', 'b', 'c')
+        ]
+        for dancer in dancers[:2]:
+            config = deploy.dancer_config(tune, dancer)
+            state.record(config, deploy.hash_dancer('abc', config), 'abc')
+        client_factory = MagicMock()
+        client = client_factory.return_value
+
+        # Nothing changed, and the last dancer was never uploaded
+        self.assertEqual([], deploy.sync_dancers(
+            temp_dir, tune, dancers, state, 2, client_factory
+        ))
+        self.assertFalse(client.update_function_configuration.called)
+
+        # Dry runs don't touch anything
+        tune.config['memory'] = 512
+        self.assertEqual([], deploy.sync_dancers(
+            temp_dir, tune, dancers, state, 2, client_factory, dry_run=True
+        ))
+        self.assertFalse(client_factory.called)
+
+        # One client per region, and failures don't stop other dancers
+        client.update_function_configuration.side_effect = [
+            None, ValueError('nope')
+        ]
+        failed = deploy.sync_dancers(
+            temp_dir, tune, dancers, state, 2, client_factory
+        )
+        client_factory.assert_called_once_with('us-east-1')
+        self.assertEqual(2, client.update_function_configuration.call_count)
+        self.assertEqual(1, len(failed))
+        self.assertEqual(
+            set([512, 128]),
+            set(
+                state.get(deploy.dancer_config(tune, dancer))['config']
+                ['memory'] for dancer in dancers[:2]
+            )
+        )
+        # Synced dancers are current, so the next upload skips them
+        synced = dancers[1] if dancers[0].name in failed else dancers[0]
+        config = deploy.dancer_config(tune, synced)
+        self.assertTrue(
+            state.is_current(config, deploy.hash_dancer('abc', config))
+        )
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the :mod::`lambada.events` module.
+"""
+import base64
+import json
+from unittest import TestCase
+
+from mock import patch
+from six import assertRaisesRegex
+
+from lambada import events
+
+
+class TestEvents(TestCase):
+    """
+    Test class for :mod::`lambada.events` module.
+    """
+    def test_loads(self):
+        """Verify payloads decode with whichever backend is in use."""
+        self.assertEqual(dict(a=[1]), events.loads('{"a": [1]}'))
+        self.assertEqual(dict(a=[1]), events.loads(b'{"a": [1]}'))
+        self.assertIsNone(events.loads(''))
+        with patch.multiple(
+            'lambada.events', JSON_BACKEND='json', json_loads=json.loads
+        ):
+            self.assertEqual(dict(a=[1]), events.loads(b'{"a": [1]}'))
+
+    @patch('lambada.events.json_loads', wraps=events.json_loads)
+    def test_api_gateway(self, json_loads):
+        """Verify API Gateway bodies are decoded once."""
+        raw = dict(
+            body='{"name": "lambada"}',
+            headers={'Content-Type': 'application/json'},
+            httpMethod='POST',
+            path='/dance',
+            queryStringParameters=None,
+            pathParameters=dict(id='1'),
+        )
+        event = events.ApiGatewayEvent(raw)
+        self.assertEqual('lambada', event.body['name'])
+        self.assertIs(event.body, event.body)
+        self.assertEqual(1, json_loads.call_count)
+        self.assertEqual('POST', event.method)
+        self.assertEqual('/dance', event.path)
+        self.assertEqual({}, event.query)
+        self.assertEqual(dict(id='1'), event.path_parameters)
+        self.assertEqual('application/json', event.headers['Content-Type'])
+
+        # Still works like the raw event
+        self.assertEqual(raw['body'], event['body'])
+        self.assertEqual('POST', event.get('httpMethod'))
+        self.assertIn('path', event)
+        self.assertEqual(len(raw), len(event))
+        self.assertEqual(sorted(raw), sorted(event))
+        self.assertIn('ApiGatewayEvent', repr(event))
+
+        event = events.ApiGatewayEvent(dict(
+            body=base64.b64encode(b'[1, 2]').decode('ascii'),
+            isBase64Encoded=True,
+        ))
+        self.assertEqual('[1, 2]', event.text)
+        self.assertEqual([1, 2], event.body)
+        self.assertIsNone(events.ApiGatewayEvent({}).body)
+        self.assertIsInstance(
+            events.ApiGatewayEvent.body, events.memoized_property
+        )
+
+    def test_records(self):
+        """Verify SQS and SNS records are viewed and decoded."""
+        event = events.SQSEvent(dict(Records=[
+            dict(messageId='a', body='{"order": 1}'),
+            dict(messageId='b', body='2'),
+        ]))
+        self.assertIs(event.records, event.records)
+        self.assertEqual(['a', 'b'], [r.message_id for r in event.records])
+        self.assertEqual([dict(order=1), 2], [r.body for r in event.records])
+
+        event = events.SNSEvent(dict(Records=[
+            dict(Sns=dict(Subject='hi', Message='{"a": 1}'))
+        ]))
+        self.assertEqual('hi', event.records[0].subject)
+        self.assertEqual(dict(a=1), event.records[0].message)
+
+    def test_adapter(self):
+        """Verify adapters are found by event type."""
+        self.assertIsNone(events.adapter('raw'))
+        self.assertIsNone(events.adapter('raw', record=True))
+        self.assertIs(events.ApiGatewayEvent, events.adapter('api_gateway'))
+        self.assertIs(events.SQSRecord, events.adapter('sqs', record=True))
+        with assertRaisesRegex(self, ValueError, 'Unknown event type'):
+            events.adapter('kafka')
+        with assertRaisesRegex(self, ValueError, 'have no records'):
+            events.adapter('api_gateway', record=True)
@@ -2,6 +2,12 @@
 Tests for the :mod::`lambada` module.
 """
 from __future__ import print_function
+import json
+import os
+import shutil
+import sys
+from tempfile import mkdtemp
+import time
 from unittest import TestCase
 
 from mock import MagicMock, patch
@@ -9,6 +15,7 @@ from six import assertRaisesRegex, StringIO
 import yaml
 
 import lambada
+from lambada.metrics import MemorySink
 from lambada.common import LambdaContext, get_lambada_class
 from lambada.tests.common import make_fixture_path
 
@@ -56,6 +63,58 @@ class TestLambada(TestCase):
         # Make sure we don't have our private attribute
         self.assertNotIn('_frozen', yaml_output.getvalue())
 
+    @patch.dict('lambada.Bouncer._instances', clear=True)
+    @patch('lambada.get_config_from_env')
+    @patch('lambada.get_config_from_file')
+    def test_bouncer_get(self, config_file, config_env):
+        """Verify bouncers are shared and loaded on first use."""
+        config_file.return_value = dict(foo='bar')
+        config_env.return_value = {}
+        tune = lambada.Lambada()
+        self.assertFalse(config_file.called)
+        self.assertEqual('bar', tune.bouncer.foo)
+        self.assertIs(tune.bouncer, lambada.Bouncer.get())
+        self.assertIs(tune.bouncer, lambada.Lambada().bouncer)
+        self.assertEqual(1, config_file.call_count)
+
+        # Different arguments are different bouncers
+        bouncer = lambada.Bouncer.get(env_prefix='OTHER_')
+        self.assertIsNot(bouncer, tune.bouncer)
+        self.assertIs(bouncer, lambada.Bouncer.get(env_prefix='OTHER_'))
+        config_env.assert_called_with('OTHER_')
+
+        # Explicit bouncers are used as is
+        self.assertIs(bouncer, lambada.Lambada(bouncer=bouncer).bouncer)
+
+    def test_bouncer_compile(self):
+        """Verify bouncers compile to JSON that loads back the same."""
+        with patch.dict(
+            'lambada.os.environ', dict(BOUNCER_FOO='bar'), clear=True
+        ):
+            bouncer = lambada.Bouncer(
+                make_fixture_path('config', 'basic.yml')
+            )
+        output = StringIO()
+        bouncer.compile(output)
+        self.assertNotIn('_frozen', output.getvalue())
+
+        temp_dir = mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        compiled = os.path.join(temp_dir, '_lambada.json')
+        with open(compiled, 'w') as stream:
+            stream.write(output.getvalue())
+        self.assertDictEqual(
+            dict(fluff=['marshmellow', 'pillow'], foo='bar', baz='things'),
+            lambada.get_config_from_file(compiled)
+        )
+        # Compiled configuration is found before YAML
+        with patch('lambada.CONFIG_PATHS', [
+                compiled, make_fixture_path('config', 'basic.yml')
+        ]):
+            with patch('lambada.yaml.load') as yaml_load:
+                self.assertEqual('bar', lambada.get_config_from_file()['foo'])
+                self.assertFalse(yaml_load.called)
+
     def test_bouncer_env(self):
         """
         Validate the environment variable loader works as expected.
@@ -150,6 +209,17 @@ class TestLambada(TestCase):
         with assertRaisesRegex(self, Exception, 'No matching dancer'):
             tune('bye', context)
 
+        # Stage suffixes and qualifiers are only removed for known stages
+        with assertRaisesRegex(self, Exception, 'function: test-prod'):
+            tune('hi', LambdaContext('test-prod'))
+        tune.config['stages'] = ['prod']
+        context = LambdaContext('test-prod')
+        tune('hi', context)
+        tune.dancers['test'].assert_called_with('hi', context)
+        context = LambdaContext('test:live')
+        tune('hi', context)
+        tune.dancers['test'].assert_called_with('hi', context)
+
     def test_decorator(self):
         """
         Test out decorators using a test fixture.
@@ -171,3 +241,287 @@ class TestLambada(TestCase):
         for dancer in tune.dancers.keys():
             context = LambdaContext(dancer)
             self.assertEqual('Event: fhqwhgads', tune('fhqwhgads', context))
+
+    def test_batch_dancer(self):
+        """Verify batch dancers report the records that failed."""
+        tune = get_lambada_class(make_fixture_path('batch'))
+        with open(make_fixture_path('batch', 'sqs_event.json')) as stream:
+            event = json.load(stream)
+        expected = dict(batchItemFailures=[
+            dict(itemIdentifier='2e1424d4-f796-459a-8184-9c92662be6da')
+        ])
+        self.assertEqual(expected, tune(event, LambdaContext('handle')))
+        self.assertEqual(expected, tune(event, LambdaContext('threaded')))
+        self.assertEqual(
+            dict(batchItemFailures=[]), tune({}, LambdaContext('threaded'))
+        )
+
+        # Records that don't fit in the budget are retried
+        tune = lambada.Lambada()
+        clock = [0.0]
+
+        @tune.batch_dancer(budget_ms=950)
+        def slow(record, _):
+            """Take 30 ms of the budget with each record."""
+            clock[0] += 0.03
+            return record
+
+        records = [dict(messageId=str(index)) for index in range(10)]
+        with patch('lambada.default_timer', lambda: clock[0]), patch.object(
+                LambdaContext, 'get_remaining_time_in_millis',
+                return_value=1000
+        ):
+            failures = tune(
+                dict(Records=records), LambdaContext('slow', timeout=1)
+            )['batchItemFailures']
+        # Records started at 0 and 30 ms fit in the 50 ms budget
+        self.assertEqual(
+            [dict(itemIdentifier=str(index)) for index in range(2, 10)],
+            failures
+        )
+        self.assertEqual(slow.config['name'], 'slow')
+
+    def test_event_type(self):
+        """Verify dancers can get views of their events."""
+        tune = lambada.Lambada()
+
+        @tune.dancer(event_type='api_gateway')
+        def greet(event, _):
+            """Greet whoever is in the body."""
+            return 'Hi {}'.format(event.body['name'])
+
+        @tune.batch_dancer(event_type='sqs')
+        def orders(record, _):
+            """Fail orders without items."""
+            if not record.body['items']:
+                raise ValueError(record.message_id)
+
+        self.assertEqual('Hi you', tune(
+            dict(body='{"name": "you"}'), LambdaContext('greet')
+        ))
+        self.assertEqual(
+            dict(batchItemFailures=[dict(itemIdentifier='b')]),
+            tune(
+                dict(Records=[
+                    dict(messageId='a', body='{"items": [1]}'),
+                    dict(messageId='b', body='{"items": []}'),
+                ]),
+                LambdaContext('orders')
+            )
+        )
+        self.assertNotIn('event_type', orders.config)
+
+        tune.lazy_dancer('lazy_heavy.heavy', event_type='sqs')
+        self.assertEqual('sqs', tune.dancers['heavy'].event_type)
+
+    def test_metrics(self):
+        """Verify dancer calls are measured and sent to the sink."""
+        sink = MemorySink()
+        tune = lambada.Lambada(metrics_sink=sink)
+
+        @tune.dancer
+        def measured(event, _):
+            """Return the event or raise on request."""
+            if event == 'raise':
+                raise ValueError(event)
+            return event
+
+        self.assertEqual('hi', tune('hi', LambdaContext('measured')))
+        with self.assertRaises(ValueError):
+            tune('raise', LambdaContext('measured', timeout=10))
+        first, second = sink.for_dancer('measured')
+        self.assertTrue(first['cold_start'])
+        self.assertFalse(first['error'])
+        self.assertIsNone(first['remaining_ms'])
+        self.assertGreaterEqual(first['duration_ms'], 0)
+        self.assertGreaterEqual(first['cpu_ms'], 0)
+        self.assertFalse(second['cold_start'])
+        self.assertTrue(second['error'])
+        self.assertGreater(second['remaining_ms'], 9000)
+
+        # Stages report the dancer they resolve to
+        tune.config['stages'] = ['prod']
+        tune('hi', LambdaContext('measured-prod'))
+        self.assertEqual(3, len(sink.for_dancer('measured')))
+
+        # Broken sinks don't break the dancer
+        with patch.object(sink, 'emit', side_effect=IOError):
+            self.assertEqual('hi', tune('hi', LambdaContext('measured')))
+
+    def test_budget(self):
+        """Verify budgets measure the time left before the timeout."""
+        budget = lambada.Budget(LambdaContext('hi'))
+        self.assertIsNone(budget.remaining_ms())
+        self.assertFalse(budget.expired)
+        budget.check()
+        with budget:
+            self.assertEqual([1, 2], list(budget.iterate([1, 2])))
+
+        context = MagicMock()
+        context.get_remaining_time_in_millis.return_value = 1000
+        with patch('lambada.default_timer', return_value=0):
+            budget = lambada.Budget(context, 200)
+        with patch('lambada.default_timer', return_value=0.6):
+            self.assertAlmostEqual(200, budget.remaining_ms())
+            items = budget.iterate(range(5), reserve_ms=300)
+            self.assertEqual([], list(items))
+            self.assertEqual([0, 1, 2, 3, 4], items.remainder)
+        with patch('lambada.default_timer', return_value=0.9):
+            self.assertTrue(budget.expired)
+            with self.assertRaises(lambada.BudgetExceeded):
+                budget.check()
+            # Already out of budget on the way in, unless iterating
+            with budget:
+                pass
+            budget.cooperative = False
+            with self.assertRaises(lambada.BudgetExceeded):
+                with budget:
+                    pass  # pragma: no cover
+
+    def test_budget_dancer(self):
+        """Verify dancers with budgets are interrupted when it runs out."""
+        tune = lambada.Lambada()
+        calls = []
+
+        @tune.dancer(budget_ms=950)
+        def interrupted(*_):
+            """Sleep well past the budget."""
+            self.assertIsNotNone(tune.budget)
+            time.sleep(10)
+
+        @tune.dancer(budget_ms=950, on_budget=calls.append)
+        def hooked(*_):
+            """Sleep past the budget to call the hook."""
+            time.sleep(0.1)
+
+        clock = [0.0]
+
+        @tune.dancer(budget_ms=950)
+        def batch(event, _):
+            """Process items taking 20 ms each until the budget runs out."""
+            items = tune.budget.iterate(event)
+            for _ in items:
+                clock[0] += 0.02
+            return items.remainder
+
+        start = time.time()
+        with self.assertRaises(lambada.BudgetExceeded):
+            tune('hi', LambdaContext('interrupted', timeout=1))
+        self.assertLess(time.time() - start, 5)
+        self.assertIsNone(tune.budget)
+
+        tune('hi', LambdaContext('hooked', timeout=1))
+        self.assertEqual(1, len(calls))
+        self.assertTrue(calls[0].expired)
+
+        with patch('lambada.default_timer', lambda: clock[0]), patch.object(
+                LambdaContext, 'get_remaining_time_in_millis',
+                return_value=1000
+        ):
+            remainder = tune(range(10), LambdaContext('batch', timeout=1))
+        # Items started at 0, 20 and 40 ms fit in the 50 ms budget
+        self.assertEqual(list(range(3, 10)), remainder)
+
+        # No timeout means no budget to run out
+        self.assertEqual([], tune(range(3), LambdaContext('batch')))
+
+    @patch('lambada.default_timer')
+    def test_resource(self, timer):
+        """Verify resources are created once and refreshed when stale."""
+        timer.return_value = 0
+        tune = lambada.Lambada()
+        created = []
+        closed = []
+
+        @tune.resource(ttl=10, close=closed.append)
+        def connection():
+            """Make a new fake connection."""
+            created.append(len(created))
+            return created[-1]
+
+        self.assertIs(connection, tune.resources['connection'])
+        self.assertFalse(created)
+        self.assertEqual(0, connection())
+        self.assertEqual(0, tune.get_resource('connection'))
+        self.assertEqual(
+            dict(connection=dict(hits=1, misses=1, creation_time=0)),
+            tune.resource_stats()
+        )
+
+        # Expired objects are closed and created again
+        timer.return_value = 11
+        self.assertEqual(1, connection())
+        self.assertEqual([0], closed)
+        self.assertEqual(2, connection.stats['misses'])
+
+        with self.assertRaises(KeyError):
+            tune.get_resource('nope')
+
+    def test_resource_check(self):
+        """Verify health checks and naming of resources."""
+        tune = lambada.Lambada()
+        healthy = [True]
+        checks = [lambda _: healthy[0], lambda _: 1 / 0]
+        for check in checks:
+            @tune.resource('client', check=check)
+            def make_client():
+                """Make a new client."""
+                return object()
+            first = make_client()
+            self.assertIn('client', tune.resources)
+            if check is checks[0]:
+                self.assertIs(first, make_client())
+                healthy[0] = False
+            self.assertIsNot(first, make_client())
+
+        @tune.resource
+        def bare():
+            """Resource without arguments."""
+            return 'bare'
+        self.assertEqual('bare', tune.get_resource('bare'))
+        bare.reset()
+        self.assertEqual('bare', bare())
+        self.assertEqual(2, bare.stats['misses'])
+
+    def test_lazy_dancer(self):
+        """
+        Verify lazy dancers import their module only when first called.
+        """
+        with assertRaisesRegex(self, ValueError, 'need a module'):
+            lambada.LazyDancer('crunch')
+
+        sys.modules.pop('lazy_heavy', None)
+        tune = get_lambada_class(make_fixture_path('lazy'))
+        self.assertEqual(
+            set(('crunch', 'light', 'eager')), set(tune.dancers.keys())
+        )
+        self.assertIsInstance(tune.dancers['crunch'], lambada.LazyDancer)
+        self.assertEqual(1024, tune.dancers['crunch'].config['memory'])
+        self.assertNotIn('lazy_heavy', sys.modules)
+
+        original_sys_path = sys.path[:]
+        sys.path.append(make_fixture_path('lazy', None))
+        try:
+            context = LambdaContext('crunch')
+            self.assertEqual('Crunched: hi', tune('hi', context))
+            self.assertIn('lazy_heavy', sys.modules)
+            # The loaded dancer replaces the lazy one
+            crunch = tune.dancers['crunch']
+            self.assertNotIsInstance(crunch, lambada.LazyDancer)
+            self.assertEqual(1024, crunch.config['memory'])
+            self.assertEqual('Crunched: bye', tune('bye', context))
+            self.assertIs(crunch, tune.dancers['crunch'])
+
+            # Functions already decorated as dancers get unwrapped
+            self.assertEqual(
+                'Decorated: hi', tune('hi', LambdaContext('light'))
+            )
+            # And lazy dancers can be called directly too
+            dancer = lambada.LazyDancer('lazy_heavy.crunch')
+            self.assertEqual('Crunched: yo', dancer('yo', context))
+            self.assertEqual(
+                ['lazy_heavy'], sys.modules['lazy_heavy'].IMPORTS
+            )
+        finally:
+            sys.path = original_sys_path
+            sys.modules.pop('lazy_heavy', None)
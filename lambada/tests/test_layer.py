@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the :mod::`lambada.layer` module.
+"""
+import base64
+import hashlib
+import os
+import shutil
+from tempfile import mkdtemp
+from unittest import TestCase
+import zipfile
+
+from mock import patch, MagicMock
+
+from lambada import layer, Lambada
+from lambada.build import BuildCache
+
+
+class TestLayer(TestCase):
+    """
+    Test class for :mod::`lambada.layer` module.
+    """
+    def setUp(self):
+        """Create a scratch directory."""
+        self.temp_dir = mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+
+    def make_venv(self, venv_dir):
+        """Lay out a fake virtualenv with a couple of packages."""
+        site_packages = os.path.join(
+            venv_dir, 'lib', 'python3.6', 'site-packages'
+        )
+        os.makedirs(os.path.join(site_packages, 'pkg'))
+        for name, contents in (('six.py', 'six'), ('pkg/__init__.py', '')):
+            with open(os.path.join(site_packages, name), 'w') as stream:
+                stream.write(contents)
+        lib64 = os.path.join(venv_dir, 'lib64')
+        os.symlink(os.path.join(venv_dir, 'lib'), lib64)
+        return site_packages
+
+    def test_site_packages(self):
+        """Verify symlinked site packages are only found once."""
+        site_packages = self.make_venv(os.path.join(self.temp_dir, 'venv'))
+        self.assertEqual(
+            [site_packages],
+            layer.site_packages(os.path.join(self.temp_dir, 'venv'))
+        )
+        self.assertEqual([], layer.site_packages(self.temp_dir))
+
+    def test_zip_layer(self):
+        """Verify packages are zipped reproducibly under python/."""
+        venv_dir = os.path.join(self.temp_dir, 'venv')
+        self.make_venv(venv_dir)
+        first = os.path.join(self.temp_dir, 'first.zip')
+        second = os.path.join(self.temp_dir, 'second.zip')
+        self.assertEqual(first, layer.zip_layer(venv_dir, first))
+        layer.zip_layer(venv_dir, second)
+        with zipfile.ZipFile(first) as layer_zip:
+            self.assertEqual(
+                ['python/pkg/__init__.py', 'python/six.py'],
+                layer_zip.namelist()
+            )
+            self.assertEqual(b'six', layer_zip.read('python/six.py'))
+        with open(first, 'rb') as first_zip, open(second, 'rb') as second_zip:
+            self.assertEqual(first_zip.read(), second_zip.read())
+
+    @patch('lambada.layer.install_dependencies')
+    def test_build_layer(self, install):
+        """Verify dependencies are installed, and reused with a cache."""
+        install.side_effect = lambda path, requirements, venv_dir: (
+            self.make_venv(venv_dir)
+        )
+        destination = os.path.join(self.temp_dir, 'layer.zip')
+        self.assertEqual(
+            destination,
+            layer.build_layer(self.temp_dir, ['six'], destination)
+        )
+        self.assertEqual(self.temp_dir, install.call_args[0][0])
+        self.assertEqual(['six'], install.call_args[0][1])
+        # The temporary virtualenv is removed
+        self.assertFalse(os.path.exists(install.call_args[0][2]))
+        with zipfile.ZipFile(destination) as layer_zip:
+            self.assertIn('python/six.py', layer_zip.namelist())
+
+        cache = BuildCache(os.path.join(self.temp_dir, 'cache'))
+        layer.build_layer(self.temp_dir, ['six'], destination, cache)
+        layer.build_layer(self.temp_dir, ['six'], destination, cache)
+        self.assertEqual(2, install.call_count)
+        with zipfile.ZipFile(destination) as layer_zip:
+            self.assertIn('python/six.py', layer_zip.namelist())
+
+    def test_code_sha256(self):
+        """Verify zips are hashed like Lambda reports them."""
+        zip_file = os.path.join(self.temp_dir, 'layer.zip')
+        with open(zip_file, 'wb') as stream:
+            stream.write(b'layer')
+        self.assertEqual(
+            base64.b64encode(hashlib.sha256(b'layer').digest()).decode(),
+            layer.code_sha256(zip_file)
+        )
+
+    def test_publish_layer(self):
+        """Verify new layer contents are published and others reused."""
+        zip_file = os.path.join(self.temp_dir, 'layer.zip')
+        with open(zip_file, 'wb') as stream:
+            stream.write(b'layer')
+        client = MagicMock()
+        client.list_layer_versions.return_value = dict(LayerVersions=[])
+        client.publish_layer_version.return_value = dict(
+            LayerVersionArn='arn:deps:1'
+        )
+        self.assertEqual(
+            ('arn:deps:1', True),
+            layer.publish_layer(client, 'deps', zip_file, ['python3.6'])
+        )
+        client.list_layer_versions.assert_called_with(
+            LayerName='deps', MaxItems=1
+        )
+        client.publish_layer_version.assert_called_once_with(
+            LayerName='deps',
+            Description='',
+            Content=dict(ZipFile=b'layer'),
+            CompatibleRuntimes=['python3.6'],
+        )
+
+        # Identical contents aren't published again
+        client.reset_mock()
+        client.list_layer_versions.return_value = dict(LayerVersions=[
+            dict(Version=1, LayerVersionArn='arn:deps:1')
+        ])
+        client.get_layer_version.return_value = dict(
+            Content=dict(CodeSha256=layer.code_sha256(zip_file))
+        )
+        self.assertEqual(
+            ('arn:deps:1', False),
+            layer.publish_layer(client, 'deps', zip_file)
+        )
+        client.get_layer_version.assert_called_with(
+            LayerName='deps', VersionNumber=1
+        )
+        self.assertFalse(client.publish_layer_version.called)
+
+        # Changed contents are
+        client.get_layer_version.return_value = dict(
+            Content=dict(CodeSha256='changed')
+        )
+        client.publish_layer_version.return_value = dict(
+            LayerVersionArn='arn:deps:2'
+        )
+        self.assertEqual(
+            ('arn:deps:2', True),
+            layer.publish_layer(client, 'deps', zip_file)
+        )
+        self.assertNotIn(
+            'CompatibleRuntimes', client.publish_layer_version.call_args[1]
+        )
+
+    def test_merge_layers(self):
+        """Verify other layers are kept and old versions replaced."""
+        arn = 'arn:aws:lambda:us-east-1:123456789012:layer:{}:{}'
+        self.assertEqual(
+            [arn.format('deps', 2)],
+            layer.merge_layers([], arn.format('deps', 2))
+        )
+        self.assertEqual(
+            [arn.format('deps', 2), arn.format('other', 1)],
+            layer.merge_layers(
+                [arn.format('deps', 1), arn.format('other', 1)],
+                arn.format('deps', 2)
+            )
+        )
+        self.assertEqual(
+            [arn.format('other', 1), arn.format('deps', 2)],
+            layer.merge_layers([arn.format('other', 1)], arn.format('deps', 2))
+        )
+
+    def test_layer_runtimes(self):
+        """Verify the runtimes of the dancers using the layer are found."""
+        tune = Lambada(layer='deps')
+        tune.dancer(name='default')(lambda event, _: event)
+        tune.dancer(name='newer', runtime='python3.6')(lambda event, _: event)
+        tune.dancer(
+            name='bundled', layer=None, runtime='python3.7'
+        )(lambda event, _: event)
+        self.assertEqual(
+            ['python2.7', 'python3.6'], layer.layer_runtimes(tune, 'deps')
+        )
+        tune.config['runtime'] = 'python3.6'
+        self.assertEqual(['python3.6'], layer.layer_runtimes(tune, 'deps'))
+        self.assertEqual([], layer.layer_runtimes(tune, 'other'))
+
+    @patch('lambada.layer.PackageUploader.upload')
+    @patch('lambda_uploader.uploader.boto3')
+    def test_layer_uploader(self, boto3, upload):
+        """Verify the latest layer version is attached after uploading."""
+        client = boto3.session.Session.return_value.client.return_value
+        config = MagicMock()
+        config.name = 'shared'
+        config.config = dict(layer='deps')
+        config.vpc = None
+        pkg = MagicMock()
+
+        client.list_layer_versions.return_value = dict(LayerVersions=[])
+        with self.assertRaises(Exception) as context:
+            layer.LayerUploader(config, None).upload(pkg)
+        self.assertIn(
+            'Layer deps has not been published', str(context.exception)
+        )
+        self.assertFalse(upload.called)
+
+        client.list_layer_versions.return_value = dict(LayerVersions=[
+            dict(Version=2, LayerVersionArn='arn:deps:2')
+        ])
+        client.get_function_configuration.return_value = dict(Layers=[
+            dict(Arn='arn:other:1'), dict(Arn='arn:deps:1'),
+        ])
+        layer.LayerUploader(config, None).upload(pkg)
+        upload.assert_called_once_with(pkg)
+        # Configuration updates wait for the upload to be applied
+        self.assertEqual(
+            ['function_active', 'function_updated'],
+            [call[0][0] for call in client.get_waiter.call_args_list]
+        )
+        client.get_waiter.return_value.wait.assert_called_with(
+            FunctionName='shared'
+        )
+        client.update_function_configuration.assert_called_once_with(
+            FunctionName='shared', Layers=['arn:other:1', 'arn:deps:2']
+        )
+
+        # Dancers without a layer upload as usual
+        client.reset_mock()
+        config.config = dict(layer=None)
+        layer.LayerUploader(config, None).upload(pkg)
+        self.assertFalse(client.list_layer_versions.called)
+        self.assertFalse(client.update_function_configuration.called)
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the :mod::`lambada.logs` module.
+"""
+import json
+import logging
+from unittest import TestCase
+
+from mock import patch, MagicMock
+
+from lambada import logs, Lambada
+from lambada.common import LambdaContext
+from lambada.events import SQSEvent
+from lambada.metrics import MemorySink, MultiSink
+
+
+class TestLogs(TestCase):
+    """
+    Test class for :mod::`lambada.logs` module.
+    """
+    def test_preview(self):
+        """Verify previews stay short however big the value is."""
+        self.assertEqual("{'a': 1}", logs.preview(dict(a=1)))
+        self.assertEqual('None', logs.preview(None))
+
+        text = logs.preview('x' * 10 ** 6)
+        self.assertLessEqual(len(text), logs.PREVIEW_CHARS)
+        self.assertIn('...', text)
+
+        records = dict(Records=[dict(body='y' * 1000)] * 10000)
+        text = logs.preview(records, 64)
+        self.assertLessEqual(len(text), 64)
+        self.assertTrue(text.startswith("{'Records': [{'body': 'yyy"))
+
+        # Event views are previewed by their raw event
+        text = logs.preview(SQSEvent(records))
+        self.assertTrue(text.startswith("SQSEvent({'Records'"))
+        self.assertLessEqual(len(text), logs.PREVIEW_CHARS)
+
+        self.assertEqual('...', logs.preview('x' * 10, 2))
+
+    def test_log_sink(self):
+        """Verify invocations are logged as JSON with an event preview."""
+        logger = MagicMock()
+        logger.isEnabledFor.return_value = True
+        sink = logs.LogSink(logger, preview_chars=16)
+        invocation = dict(
+            dancer='hi',
+            request_id='abc',
+            duration_ms=1.5,
+            cpu_ms=1.0,
+            cold_start=True,
+            error=False,
+            remaining_ms=None,
+            timestamp=1000,
+            event='z' * 100,
+        )
+        sink.emit(invocation)
+        level, message, line = logger.log.call_args[0]
+        self.assertEqual(logging.INFO, level)
+        self.assertEqual('%s', message)
+        self.assertEqual(
+            dict(
+                dancer='hi',
+                request_id='abc',
+                duration_ms=1.5,
+                cpu_ms=1.0,
+                cold_start=True,
+                error=False,
+                remaining_ms=None,
+                timestamp=1000,
+                event="'zzzzz...zzzzzz'",
+            ),
+            json.loads(line)
+        )
+
+        # Events can be left out entirely
+        sink.preview_chars = 0
+        self.assertNotIn('event', sink.format(invocation))
+
+        # Nothing is formatted when the logger is disabled
+        logger.reset_mock()
+        logger.isEnabledFor.return_value = False
+        with patch.object(sink, 'format') as format_invocation:
+            sink.emit(invocation)
+        self.assertFalse(format_invocation.called)
+        self.assertFalse(logger.log.called)
+
+    @patch('lambada.logs.random.random')
+    def test_log_sink_sampling(self, random):
+        """Verify invocations are sampled by dancer, except errors."""
+        random.return_value = 0.5
+        sink = logs.LogSink(sample_rate=0.4, sample_rates=dict(busy=0.6))
+        self.assertFalse(sink.sampled(dict(dancer='hi', error=False)))
+        self.assertTrue(sink.sampled(dict(dancer='hi', error=True)))
+        self.assertTrue(sink.sampled(dict(dancer='busy', error=False)))
+        sink.sample_rates['busy'] = 0
+        self.assertFalse(sink.sampled(dict(dancer='busy', error=False)))
+        sink.sample_rate = 1
+        random.reset_mock()
+        self.assertTrue(sink.sampled(dict(dancer='hi', error=False)))
+        self.assertFalse(random.called)
+
+    def test_tune_logging(self):
+        """Verify tunes give the sink the event and request id."""
+        logger = MagicMock()
+        logger.isEnabledFor.return_value = True
+        tune = Lambada(metrics_sink=logs.LogSink(logger))
+
+        @tune.dancer
+        def echo(event, _):
+            """Return the event."""
+            return event
+
+        context = LambdaContext('echo', aws_request_id='req-1')
+        with patch('lambada.log') as log:
+            log.isEnabledFor.return_value = True
+            self.assertEqual('x' * 1000, tune('x' * 1000, context))
+        # Debug logging of the call only has previews
+        _, name, arguments = log.debug.call_args[0]
+        self.assertEqual('echo', name)
+        self.assertEqual(
+            '{}, {}'.format(logs.preview('x' * 1000), logs.preview(context)),
+            arguments
+        )
+
+        logged = json.loads(logger.log.call_args[0][2])
+        self.assertEqual('echo', logged['dancer'])
+        self.assertEqual('req-1', logged['request_id'])
+        self.assertEqual(logs.preview('x' * 1000), logged['event'])
+
+    def test_wrap_logging(self):
+        """Verify calls are logged with whatever arguments they have."""
+        # pylint: disable=protected-access
+        wrapped = Lambada._wrap(lambda *args, **kwargs: None, 'any')
+        with patch('lambada.log') as log:
+            log.isEnabledFor.return_value = True
+            wrapped('a', b='c')
+            self.assertEqual(
+                ('Calling %s with arguments: %s', 'any', "'a', b='c'"),
+                log.debug.call_args[0]
+            )
+            wrapped()
+            self.assertEqual('', log.debug.call_args[0][2])
+
+            log.reset_mock()
+            log.isEnabledFor.return_value = False
+            wrapped('a')
+            self.assertFalse(log.debug.called)
+
+    def test_tune_logging_and_metrics(self):
+        """Verify tunes can log invocations and measure them together."""
+        logger = MagicMock()
+        logger.isEnabledFor.return_value = True
+        measured = MemorySink()
+        tune = Lambada(
+            metrics_sink=MultiSink(measured, logs.LogSink(logger))
+        )
+        tune.dancer(name='echo')(lambda event, _: event)
+        tune('hi', LambdaContext('echo'))
+        self.assertEqual(1, len(measured.for_dancer('echo')))
+        self.assertNotIn('event', measured.invocations[0])
+        logged = json.loads(logger.log.call_args[0][2])
+        self.assertEqual("'hi'", logged['event'])
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the :mod::`lambada.metrics` module.
+"""
+import json
+from unittest import TestCase
+
+from mock import patch
+from six import StringIO
+
+from lambada import metrics
+
+INVOCATION = dict(
+    dancer='hi',
+    duration_ms=1.5,
+    cpu_ms=1.0,
+    cold_start=True,
+    remaining_ms=None,
+    error=False,
+    timestamp=1000,
+)
+
+
+class TestMetrics(TestCase):
+    """
+    Test class for :mod::`lambada.metrics` module.
+    """
+    def test_sink(self):
+        """Verify sinks have to implement emit."""
+        with self.assertRaises(NotImplementedError):
+            metrics.MetricsSink().emit(INVOCATION)
+
+    def test_emf_sink(self):
+        """Verify invocations are written as embedded metric format."""
+        stream = StringIO()
+        metrics.EMFSink('Tests', stream).emit(INVOCATION)
+        document = json.loads(stream.getvalue())
+        self.assertEqual('\n', stream.getvalue()[-1])
+        self.assertEqual(
+            dict(
+                Timestamp=1000,
+                CloudWatchMetrics=[dict(
+                    Namespace='Tests',
+                    Dimensions=[['Dancer']],
+                    Metrics=[
+                        dict(Name='Duration', Unit='Milliseconds'),
+                        dict(Name='CPUTime', Unit='Milliseconds'),
+                        dict(Name='ColdStart', Unit='Count'),
+                        dict(Name='Errors', Unit='Count'),
+                    ],
+                )],
+            ),
+            document.pop('_aws')
+        )
+        self.assertEqual(
+            dict(Dancer='hi', Duration=1.5, CPUTime=1.0, ColdStart=1,
+                 Errors=0),
+            document
+        )
+
+        # Defaults to stdout at the time of writing
+        with patch('lambada.metrics.sys.stdout', StringIO()) as stdout:
+            metrics.EMFSink().emit(dict(INVOCATION, remaining_ms=10))
+        document = json.loads(stdout.getvalue())
+        self.assertEqual(10, document['RemainingTimeAtStart'])
+        self.assertEqual(
+            'Lambada', document['_aws']['CloudWatchMetrics'][0]['Namespace']
+        )
+
+    def test_memory_sink(self):
+        """Verify invocations are kept in memory."""
+        sink = metrics.MemorySink()
+        sink.emit(INVOCATION)
+        sink.emit(dict(INVOCATION, dancer='bye'))
+        self.assertEqual(2, len(sink.invocations))
+        self.assertEqual([INVOCATION], sink.for_dancer('hi'))
+        sink.clear()
+        self.assertEqual([], sink.invocations)
+
+    def test_multi_sink(self):
+        """Verify every sink gets the invocation, events only if asked."""
+        plain, broken, eventful = (
+            metrics.MemorySink(), metrics.MemorySink(), metrics.MemorySink()
+        )
+        eventful.include_event = True
+        sink = metrics.MultiSink(plain, broken, eventful)
+        self.assertTrue(sink.include_event)
+        self.assertFalse(metrics.MultiSink(plain).include_event)
+
+        invocation = dict(INVOCATION, event='hello')
+        with patch.object(broken, 'emit', side_effect=IOError):
+            sink.emit(invocation)
+        self.assertEqual([INVOCATION], plain.invocations)
+        self.assertEqual([invocation], eventful.invocations)
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the :mod::`lambada.replay` module.
+"""
+import json
+import sys
+from unittest import TestCase
+
+from six import StringIO
+
+from lambada import replay
+from lambada.common import get_lambada_class
+from lambada.tests.common import make_fixture_path
+
+
+class TestReplay(TestCase):
+    """
+    Test class for :mod::`lambada.replay` module.
+    """
+    def setUp(self):
+        """Load the replay fixture and keep sys.path clean."""
+        self.path = make_fixture_path('replay')
+        self.tune = get_lambada_class(self.path)
+        original_sys_path = sys.path[:]
+        self.addCleanup(setattr, sys, 'path', original_sys_path)
+
+    def events(self):
+        """Open the fixture events."""
+        return open(make_fixture_path('replay', 'events.jsonl'))
+
+    def test_add_project_path(self):
+        """Verify the project directory ends up on the path once."""
+        replay.add_project_path(self.path)
+        replay.add_project_path(make_fixture_path('replay', None))
+        directory = make_fixture_path('replay', None)
+        self.assertEqual(1, sys.path.count(directory))
+
+    def test_replay_event(self):
+        """Verify results and errors of single events."""
+        self.assertEqual(
+            dict(index=3, result=4),
+            replay.replay_event(self.tune, 'double', 3, '2')
+        )
+        result = replay.replay_event(self.tune, 'double', 0, '"boom"')
+        self.assertEqual(0, result['index'])
+        self.assertEqual("ValueError('boom')", result['error'])
+        self.assertIn('Traceback', result['traceback'])
+        self.assertIn(
+            'error', replay.replay_event(self.tune, 'double', 0, 'nope')
+        )
+        self.assertEqual(
+            "{'a'}",
+            replay.replay_event(self.tune, 'opaque', 0, '"a"')['result']
+        )
+
+    def test_read_events(self):
+        """Verify blank lines are skipped."""
+        self.assertEqual(
+            [(0, 'a\n'), (1, 'b\n'), (2, 'c')],
+            list(replay.read_events(StringIO('a\n\n  \nb\nc')))
+        )
+
+    def check_results(self, results):
+        """Verify the fixture events were replayed in order."""
+        self.assertEqual(
+            [0, 1, 2, 3, 4], [result['index'] for result in results]
+        )
+        self.assertEqual(2, results[0]['result'])
+        self.assertEqual('abab', results[1]['result'])
+        self.assertIn('boom', results[2]['error'])
+        self.assertEqual([1, 1], results[3]['result'])
+        self.assertIn('error', results[4])
+
+    def test_replay(self):
+        """Replay the fixture events in process."""
+        with self.events() as events:
+            self.check_results(list(
+                replay.replay(self.path, self.tune, 'double', events)
+            ))
+
+    def test_replay_workers(self):
+        """Replay the fixture events with a pool of processes."""
+        with self.events() as events:
+            self.check_results(list(replay.replay(
+                self.path, None, 'double', events, workers=2, chunksize=2
+            )))
+
+    def test_format_result(self):
+        """Verify results become sorted JSON lines."""
+        line = replay.format_result(dict(index=1, result=[1]))
+        self.assertEqual('{"index": 1, "result": [1]}\n', line)
+        self.assertEqual(dict(index=1, result=[1]), json.loads(line))
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the :mod::`lambada.report` module.
+"""
+import os
+import shutil
+from tempfile import mkdtemp
+from unittest import TestCase
+import zipfile
+
+from mock import patch
+
+from lambada import report
+
+PACKAGE_FILES = {
+    'lambda.py': 'import fast\nimport slow\n',
+    'fast.py': 'VALUE = 1\n',
+    # Takes a quarter of a second by the clock of the import script
+    'slow/__init__.py': (
+        'import __main__\n'
+        '__main__.default_timer = lambda: __main__.start + 0.25\n'
+    ),
+    'slow/tests/test_slow.py': 'assert True\n' * 100,
+    'slow/__pycache__/slow.cpython-36.pyc': 'x' * 200,
+    'slow/README.rst': 'Slow things\n',
+    'slow-1.0.dist-info/METADATA': 'Name: slow\n',
+    'broken.py': 'raise ImportError("no way")\n',
+    '_speedups.so': 'not really a binary',
+    '_lambada.json': '{}',
+}
+
+
+class TestReport(TestCase):
+    """
+    Test class for :mod::`lambada.report` module.
+    """
+    def setUp(self):
+        """Build a package to report on."""
+        self.temp_dir = mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.zip_file = os.path.join(self.temp_dir, 'lambda.zip')
+        with zipfile.ZipFile(
+                self.zip_file, 'w', zipfile.ZIP_DEFLATED
+        ) as archive:
+            archive.writestr('slow/', '')
+            for name, content in sorted(PACKAGE_FILES.items()):
+                archive.writestr(name, content)
+
+    def test_classify(self):
+        """Verify files that aren't needed at run time are flagged."""
+        self.assertIsNone(report.classify('requests/api.py'))
+        self.assertIsNone(report.classify('lambda.py'))
+        self.assertIsNone(report.classify('certifi/cacert.pem'))
+        self.assertEqual(
+            'pycache', report.classify('six/__pycache__/six.cpython-36.pyc')
+        )
+        self.assertEqual('pycache', report.classify('six.pyc'))
+        self.assertEqual(
+            'dist-info', report.classify('six-1.10.0.dist-info/RECORD')
+        )
+        self.assertEqual('dist-info', report.classify('six.egg-info/PKG-INFO'))
+        self.assertEqual('tests', report.classify('numpy/tests/a.py'))
+        self.assertEqual('tests', report.classify('yaml/test_yaml.py'))
+        self.assertEqual('tests', report.classify('conftest.py'))
+        self.assertEqual('docs', report.classify('pkg/docs/index.html'))
+        self.assertEqual('docs', report.classify('README.md'))
+        self.assertEqual(
+            'binaries', report.classify('numpy/core/_multiarray.so')
+        )
+        self.assertEqual('binaries', report.classify('libs/libz.so.1.2.11'))
+
+    def test_top_level(self):
+        """Verify files are grouped by their top-level package."""
+        self.assertEqual('requests', report.top_level('requests/api.py'))
+        self.assertEqual('six', report.top_level('six.py'))
+        self.assertEqual('_cffi', report.top_level('_cffi.abi3.so'))
+        self.assertEqual(
+            'six-1.10.0.dist-info',
+            report.top_level('six-1.10.0.dist-info/RECORD')
+        )
+        self.assertEqual(
+            ['_speedups', 'broken', 'fast', 'lambda', 'slow'],
+            report.importable_modules(sorted(PACKAGE_FILES))
+        )
+
+    def test_import_time(self):
+        """Verify imports are timed, or fail, in a new process."""
+        directory = os.path.join(self.temp_dir, 'package')
+        with zipfile.ZipFile(self.zip_file) as archive:
+            archive.extractall(directory)
+        seconds, error = report.import_time(directory, 'slow')
+        self.assertIsNone(error)
+        self.assertAlmostEqual(0.25, seconds)
+        seconds, error = report.import_time(directory, 'broken')
+        self.assertIsNone(seconds)
+        self.assertEqual('ImportError: no way', error)
+
+    @patch('lambada.report.import_time')
+    def test_package_report(self, import_time):
+        """Verify sizes and import times are broken down by package."""
+        timings = {
+            'lambda': (0.3, None),
+            'slow': (0.25, None),
+            'fast': (0.001, None),
+            'broken': (None, 'ImportError: no way'),
+            '_speedups': (None, 'ImportError: invalid ELF header'),
+        }
+
+        def fake_import_time(directory, module):
+            """Check the package is unpacked and look up the timing."""
+            self.assertTrue(
+                os.path.isfile(os.path.join(directory, 'lambda.py'))
+            )
+            return timings[module]
+        import_time.side_effect = fake_import_time
+
+        result = report.package_report(self.zip_file)
+        packages = {package['name']: package for package in result['packages']}
+        self.assertEqual(
+            set(['lambda', 'fast', 'slow', 'slow-1.0.dist-info', 'broken',
+                 '_speedups', '_lambada']),
+            set(packages)
+        )
+        self.assertEqual('slow', result['packages'][0]['name'])
+        slow = packages['slow']
+        self.assertEqual(4, slow['files'])
+        self.assertEqual(
+            1200 + 200 + 12 + len(PACKAGE_FILES['slow/__init__.py']),
+            slow['uncompressed_bytes']
+        )
+        self.assertEqual(1200 + 200 + 12, slow['strippable_bytes'])
+        self.assertEqual(250, slow['import_ms'])
+        self.assertEqual(1, packages['fast']['import_ms'])
+        self.assertEqual(300, packages['lambda']['import_ms'])
+        self.assertIsNone(packages['broken']['import_ms'])
+        self.assertEqual(
+            'ImportError: no way', packages['broken']['import_error']
+        )
+        self.assertEqual(
+            'ImportError: invalid ELF header',
+            packages['_speedups']['import_error']
+        )
+        self.assertEqual(0, packages['_speedups']['strippable_bytes'])
+        self.assertNotIn('import_ms', packages['_lambada'])
+
+        self.assertEqual(
+            sum(len(content) for content in PACKAGE_FILES.values()),
+            result['uncompressed_bytes']
+        )
+        self.assertEqual(
+            os.path.getsize(self.zip_file), result['zip_bytes']
+        )
+        self.assertLess(result['zip_limit_percent'], 1)
+        strippable = result['strippable']
+        self.assertEqual(list(report.STRIPPABLE), list(strippable))
+        self.assertEqual(1, strippable['tests']['files'])
+        self.assertEqual(1200, strippable['tests']['uncompressed_bytes'])
+        self.assertEqual(1, strippable['dist-info']['files'])
+        self.assertEqual(1, strippable['binaries']['files'])
+
+        self.assertNotIn(
+            'import_ms', report.package_report(self.zip_file, False)
+            ['packages'][0]
+        )
+
+    def test_format_report(self):
+        """Verify the report is formatted as a table."""
+        lines = report.format_report(
+            report.package_report(self.zip_file, imports=False), limit=2
+        )
+        self.assertTrue(lines[0].startswith(self.zip_file))
+        self.assertIn('of the 50.0 MB limit', lines[0])
+        self.assertIn('of the 250.0 MB limit', lines[0])
+        self.assertTrue(lines[3].endswith('  slow'))
+        self.assertTrue(lines[5].endswith('5 more'))
+        self.assertIn('Could be stripped:', lines)
+        self.assertTrue(lines[-1].endswith('binaries (debug symbols)'))
+        self.assertEqual('12 B', report.format_size(12))
+        self.assertEqual('1.5 KB', report.format_size(1536))
+        self.assertEqual('2.0 MB', report.format_size(2 * 1024 * 1024))
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the :mod::`lambada.routing` module.
+"""
+import json
+import os
+import shutil
+import sys
+from tempfile import mkdtemp
+from unittest import TestCase
+
+from mock import patch
+
+from lambada import routing
+from lambada.common import get_lambada_class, LambdaContext
+from lambada.metrics import MemorySink
+from lambada.tests.common import make_fixture_path
+
+
+class TestRouting(TestCase):
+    """
+    Test class for :mod::`lambada.routing` module.
+    """
+    def setUp(self):
+        """Start without any loaded routes."""
+        routing._routes.clear()  # pylint: disable=protected-access
+        routing._targets.clear()  # pylint: disable=protected-access
+        self.addCleanup(routing._routes.clear)  # pylint: disable=W0212
+        self.addCleanup(routing._targets.clear)  # pylint: disable=W0212
+        self.project = make_fixture_path('routing', None)
+
+    def test_normalize_function_name(self):
+        """Verify qualifiers and stage suffixes are removed."""
+        stages = ['prod', 'dev']
+        self.assertEqual('hi', routing.normalize_function_name('hi'))
+        self.assertEqual(
+            'hi-prod', routing.normalize_function_name('hi-prod')
+        )
+        self.assertEqual(
+            'hi', routing.normalize_function_name('hi-prod', stages)
+        )
+        self.assertEqual(
+            'hi', routing.normalize_function_name('hi_dev:live', stages)
+        )
+        self.assertEqual('hi', routing.normalize_function_name(
+            'arn:aws:lambda:us-east-1:123456789012:function:hi-prod:v2',
+            stages
+        ))
+        # Only one suffix is removed, and never the whole name
+        self.assertEqual(
+            'hi-dev', routing.normalize_function_name('hi-dev-prod', stages)
+        )
+        self.assertEqual(
+            '-prod', routing.normalize_function_name('-prod', stages)
+        )
+
+    def test_build_routes(self):
+        """Verify dancers route to their module unless they need the tune."""
+        tune = get_lambada_class(self.project)
+        self.assertEqual(
+            dict(
+                handler='lambda:tune',
+                stages=['prod', 'dev'],
+                routes=dict(
+                    hello='lambda:hello',
+                    report='routing_reports:report',
+                    # Budgets and lazy event views are applied by the tune
+                    timed='lambda:tune',
+                    parsed='lambda:tune',
+                    # The module attribute has a different name
+                    renamed='lambda:named',
+                ),
+            ),
+            routing.build_routes(tune, self.project)
+        )
+        # Modules outside the project can't be imported by the package
+        self.assertEqual(
+            'lambda:tune',
+            routing.build_routes(tune, mkdtemp())['routes']['hello']
+        )
+        tune.metrics_sink = MemorySink()
+        self.assertEqual(
+            set(['lambda:tune']),
+            set(routing.build_routes(tune, self.project)['routes'].values())
+        )
+
+    def test_write_routes(self):
+        """Verify manifests are written into the project and read back."""
+        temp_dir = mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        tune = get_lambada_class(self.project)
+        path = routing.write_routes(tune, temp_dir)
+        self.assertEqual(os.path.join(temp_dir, routing.ROUTES_FILE), path)
+        self.assertEqual(
+            routing.build_routes(tune, temp_dir), routing.load_routes(path)
+        )
+        with patch.dict(os.environ, dict(LAMBADA_ROUTES=path)):
+            self.assertEqual(
+                routing.build_routes(tune, temp_dir), routing.load_routes()
+            )
+
+    def test_handler(self):
+        """Verify the handler only imports the called dancer's module."""
+        temp_dir = mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        path = os.path.join(temp_dir, routing.ROUTES_FILE)
+        with open(path, 'w') as stream:
+            json.dump(dict(
+                handler='routing_reports:missing',
+                stages=['prod'],
+                routes=dict(report='routing_reports:report'),
+            ), stream)
+
+        sys.modules.pop('routing_reports', None)
+        self.addCleanup(sys.modules.pop, 'routing_reports', None)
+        original_sys_path = sys.path[:]
+        self.addCleanup(setattr, sys, 'path', original_sys_path)
+        sys.path.append(self.project)
+        with patch.dict(os.environ, dict(LAMBADA_ROUTES=path)):
+            self.assertEqual(
+                'Report: hi',
+                routing.handler('hi', LambdaContext('report-prod'))
+            )
+        self.assertIn('routing_reports', sys.modules)
+        # Targets are kept for warm calls
+        os.remove(path)
+        self.assertEqual(
+            'Report: yo', routing.handler('yo', LambdaContext('report-prod'))
+        )
+        # Unknown functions go to the tune
+        with self.assertRaises(AttributeError):
+            routing.handler('hi', LambdaContext('unknown'))
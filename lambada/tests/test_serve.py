@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the :mod::`lambada.serve` module.
+"""
+import json
+from threading import Thread
+from unittest import TestCase
+
+from six.moves.urllib.error import HTTPError
+from six.moves.urllib.request import Request, urlopen
+
+from lambada import Lambada, serve
+from lambada.tests.common import make_fixture_path
+
+
+class TestServe(TestCase):
+    """
+    Test class for :mod::`lambada.serve` module.
+    """
+    def test_function_name(self):
+        """Verify names are found in every form of function."""
+        self.assertEqual('hi', serve.function_name('hi'))
+        self.assertEqual('hi', serve.function_name('hi:$LATEST'))
+        self.assertEqual('hi', serve.function_name(
+            'arn:aws:lambda:us-east-1:123456789012:function:hi:prod'
+        ))
+
+    def test_invoke_stage(self):
+        """Verify deployed names with a stage suffix find their dancer."""
+        tune = Lambada(stages=['prod'])
+        tune.dancer(name='hello')(lambda event, _: event)
+        self.assertEqual(
+            (200, False, '1'), serve.invoke(tune, 'hello-prod', b'1')
+        )
+        self.assertEqual(404, serve.invoke(tune, 'hello-dev', b'1')[0])
+
+    def invoke(self, url, path, payload=b'', headers=None):
+        """Post to the server and decode the response."""
+        request = Request(url + path, data=payload, headers=headers or {})
+        response = urlopen(request)
+        body = response.read().decode('UTF-8')
+        return (
+            response.getcode(),
+            response.info().get('X-Amz-Function-Error'),
+            json.loads(body) if body else None
+        )
+
+    def test_server(self):
+        """Invoke dancers through a running server."""
+        server = serve.InvokeServer(
+            make_fixture_path('serve'), ('127.0.0.1', 0), workers=2
+        )
+        thread = Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        url = 'http://127.0.0.1:{}'.format(server.server_address[1])
+        path = '/2015-03-31/functions/{}/invocations'
+
+        status, error, body = self.invoke(
+            url, path.format('counter'), b'{"a": 1}'
+        )
+        self.assertEqual(200, status)
+        self.assertIsNone(error)
+        self.assertEqual(dict(a=1), body['event'])
+        self.assertTrue(body['remaining'])
+
+        # Workers stay warm between invocations
+        calls = {}
+        for _ in range(6):
+            body = self.invoke(url, path.format('counter:$LATEST'))[2]
+            self.assertIsNone(body['event'])
+            calls[body['pid']] = max(calls.get(body['pid'], 0), body['calls'])
+        self.assertEqual(7, sum(calls.values()))
+
+        status, error, body = self.invoke(url, path.format('fail'), b'1')
+        self.assertEqual((200, 'Unhandled'), (status, error))
+        self.assertEqual('ValueError', body['errorType'])
+        self.assertEqual('Nope', body['errorMessage'])
+
+        self.assertEqual(
+            (202, None, None),
+            self.invoke(url, path.format('counter'), b'2', {
+                'X-Amz-Invocation-Type': 'Event'
+            })
+        )
+        self.assertEqual(
+            (204, None, None),
+            self.invoke(url, path.format('counter'), b'', {
+                'X-Amz-Invocation-Type': 'DryRun'
+            })
+        )
+
+        for bad_path in (path.format('nope'), '/nope'):
+            with self.assertRaises(HTTPError) as context:
+                self.invoke(url, bad_path, b'{}')
+            self.assertEqual(404, context.exception.code)
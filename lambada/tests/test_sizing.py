@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the :mod::`lambada.sizing` module.
+"""
+from __future__ import print_function
+from unittest import TestCase
+
+from lambada import sizing, Lambada
+from lambada.common import get_lambada_class
+from lambada.tests.common import make_fixture_path
+
+MEGABYTE = 1024 * 1024
+
+
+def make_measurements(peak_rss, slowest_ms, cpu_ratio):
+    """
+    Build measurements like :func:`lambada.sizing.measure` returns.
+    """
+    return dict(
+        cpu_ratio=cpu_ratio,
+        wall_ms=dict(max=slowest_ms),
+        memory=dict(
+            baseline_rss_bytes=40 * MEGABYTE,
+            peak_rss_bytes=peak_rss,
+            peak_allocated_bytes=10 * MEGABYTE,
+        ),
+    )
+
+
+class TestSizing(TestCase):
+    """
+    Test class for :mod::`lambada.sizing` module.
+    """
+    def test_measure(self):
+        """Measure a dancer that sometimes fails."""
+        tune = Lambada()
+        calls = []
+
+        @tune.dancer
+        def picky(event, _):  # pylint: disable=unused-variable
+            """Only accept even events, allocating a list for them."""
+            calls.append(event)
+            print('Sized: {}'.format(event))
+            if event % 2:
+                raise ValueError('Not even')
+            return list(range(10000))
+
+        measured = sizing.measure(tune, 'picky', [0, 1, 2])
+        # Warmup, one measured and one traced call per event
+        self.assertEqual([0, 0, 1, 2, 0, 1, 2], calls)
+        self.assertEqual(3, measured['calls'])
+        self.assertEqual(1, measured['errors'])
+        self.assertLessEqual(
+            measured['cpu_ms']['min'], measured['cpu_ms']['max']
+        )
+        self.assertGreater(measured['wall_ms']['max'], 0)
+        self.assertGreater(measured['memory']['peak_allocated_bytes'], 10000)
+        self.assertLessEqual(
+            measured['memory']['baseline_rss_bytes'],
+            measured['memory']['peak_rss_bytes']
+        )
+
+        measured = sizing.measure(tune, 'picky', [0], iterations=4, warmup=0)
+        self.assertEqual(4, measured['calls'])
+
+    def test_recommend(self):
+        """Verify recommendations have headroom and stay within limits."""
+        # 100 MB with 30% headroom rounds up to 192 MB
+        self.assertEqual(
+            dict(memory=192, timeout=2),
+            sizing.recommend(make_measurements(100 * MEGABYTE, 1500, 0.1))
+        )
+        self.assertEqual(
+            dict(memory=128, timeout=1),
+            sizing.recommend(make_measurements(10 * MEGABYTE, 10, 0.1))
+        )
+        self.assertEqual(
+            dict(memory=10240, timeout=900),
+            sizing.recommend(make_measurements(1e12, 1e9, 0.1))
+        )
+        # Without RSS the allocations are added to the starting RSS
+        self.assertEqual(
+            128, sizing.recommend(make_measurements(None, 1, 0.1))['memory']
+        )
+        # CPU-bound dancers get less CPU at lower memory
+        self.assertEqual(
+            dict(memory=192, timeout=12),
+            sizing.recommend(make_measurements(100 * MEGABYTE, 1000, 0.9))
+        )
+        self.assertEqual(
+            dict(memory=1856, timeout=2),
+            sizing.recommend(make_measurements(1400 * MEGABYTE, 1000, 0.9))
+        )
+        self.assertEqual(
+            dict(memory=128, timeout=1),
+            sizing.recommend(make_measurements(10 * MEGABYTE, 1, 0.1), 0)
+        )
+
+    def test_size_dancer(self):
+        """Verify reports have the current and recommended settings."""
+        tune = Lambada(memory=1024)
+
+        @tune.dancer(timeout=10)
+        def spin(event, _):  # pylint: disable=unused-variable
+            """Keep the CPU busy."""
+            return sum(range(event))
+
+        report = sizing.size_dancer(tune, tune.dancers['spin'], [10000])
+        self.assertEqual('spin', report['dancer'])
+        self.assertEqual(dict(memory=1024, timeout=10), report['current'])
+        self.assertEqual(
+            sizing.recommend(report['measured']), report['recommended']
+        )
+        self.assertEqual(
+            sizing.cpu_bound(report['measured']), report['cpu_bound']
+        )
+
+    def test_set_decorator_kwargs(self):
+        """Verify settings are replaced or added to the decorator."""
+        settings = dict(memory=256, timeout=3)
+        self.assertEqual(
+            '@tune.dancer(memory=256, timeout=3)\n',
+            sizing.set_decorator_kwargs('@tune.dancer\n', settings)
+        )
+        self.assertEqual(
+            '@tune.dancer(memory=256, timeout=3)\n',
+            sizing.set_decorator_kwargs('@tune.dancer()\n', settings)
+        )
+        self.assertEqual(
+            "@tune.dancer(name='hi', memory=256, timeout=3)\n",
+            sizing.set_decorator_kwargs("@tune.dancer(name='hi')\n", settings)
+        )
+        self.assertEqual(
+            "@tune.dancer(memory=256, name='hi', timeout=3)\n",
+            sizing.set_decorator_kwargs(
+                "@tune.dancer(memory=MEMORY, name='hi', timeout = 30)\n",
+                settings
+            )
+        )
+        self.assertEqual(
+            "@tune.dancer(\n    name='hi', memory=256, timeout=3\n)\n",
+            sizing.set_decorator_kwargs(
+                "@tune.dancer(\n    name='hi',\n)\n", settings
+            )
+        )
+
+    def test_decorator_patch(self):
+        """Verify the patch changes only the dancer's decorator."""
+        path = make_fixture_path('basic', None)
+        tune = get_lambada_class(path)
+        patch = sizing.decorator_patch(
+            tune.dancers['hi'], path, dict(memory=256, timeout=3)
+        )
+        self.assertIn('--- a/lambda.py\n+++ b/lambda.py\n', patch)
+        self.assertIn("-@tune.dancer(name='hi')\n", patch)
+        self.assertIn(
+            "+@tune.dancer(name='hi', memory=256, timeout=3)\n", patch
+        )
+        self.assertEqual(1, patch.count('\n-@'))
+
+        patch = sizing.decorator_patch(
+            tune.dancers['test_lambada'], path, dict(memory=256)
+        )
+        self.assertIn('+@tune.dancer(memory=256)\n', patch)
+
+        # Dancers registered without a decorator can't be patched
+        tune = Lambada()
+        tune.dancer(name='bare')(lambda event, _: event)
+        with self.assertRaises(ValueError):
+            sizing.decorator_patch(tune.dancers['bare'], path, dict(memory=1))
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the :mod::`lambada.startup` module.
+"""
+import io
+import json
+import os
+import shutil
+import sys
+from tempfile import mkdtemp
+from unittest import TestCase
+
+from mock import patch
+
+from lambada import startup
+from lambada.tests.common import make_fixture_path
+
+
+def make_node(name, time, children=None):
+    """Make an import tree node."""
+    return dict(name=name, time=time, children=children or [])
+
+
+class TestStartup(TestCase):
+    """
+    Test class for :mod::`lambada.startup` module.
+    """
+    def test_import_timer(self):
+        """Verify nested imports are recorded as a tree."""
+        original_sys_path = sys.path[:]
+        sys.path.append(make_fixture_path('startup', None))
+        self.addCleanup(setattr, sys, 'path', original_sys_path)
+        for name in ('startup_outer', 'startup_inner'):
+            self.addCleanup(sys.modules.pop, name, None)
+
+        with startup.ImportTimer() as imports:
+            # Already imported modules are left out
+            __import__('os')
+            __import__('startup_outer')
+        self.assertEqual(1, len(imports.root['children']))
+        outer = imports.root['children'][0]
+        self.assertEqual('startup_outer', outer['name'])
+        self.assertEqual('startup_inner', outer['children'][0]['name'])
+        self.assertGreaterEqual(outer['children'][0]['time'], 0.01)
+        self.assertGreaterEqual(outer['time'], outer['children'][0]['time'])
+        self.assertEqual(outer['time'], imports.root['time'])
+
+    def test_prune_imports(self):
+        """Verify only the slowest imports and their parents remain."""
+        tree = make_node('', 10, [
+            make_node('slow', 8, [make_node('slower', 6), make_node('a', 1)]),
+            make_node('fast', 2, [make_node('b', 0.5)]),
+        ])
+        self.assertEqual(1, startup.self_time(tree['children'][0]))
+        self.assertEqual(0, startup.self_time(make_node('x', 1, [
+            make_node('y', 2)
+        ])))
+        pruned = startup.prune_imports(tree, 2)
+        self.assertEqual(['slow'], [c['name'] for c in pruned['children']])
+        self.assertEqual(
+            ['slower'], [c['name'] for c in pruned['children'][0]['children']]
+        )
+        # The original is left alone
+        self.assertEqual(2, len(tree['children'][0]['children']))
+        self.assertEqual([], startup.prune_imports(tree, 0)['children'])
+        self.assertEqual(
+            [], startup.prune_imports(make_node('', 0), 5)['children']
+        )
+
+    def test_profile_startup(self):
+        """Profile the basic fixture in process."""
+        profile = startup.profile_startup(
+            make_fixture_path('basic'), 'hi', 'yo', warm_calls=3
+        )
+        self.assertEqual('hi', profile['dancer'])
+        self.assertEqual(3, len(profile['warm_calls']))
+        self.assertGreater(profile['import_time'], 0)
+        self.assertGreater(profile['first_call'], 0)
+        self.assertIn('imports', profile)
+
+        lines = startup.format_profile(profile)
+        self.assertEqual('Startup profile for hi', lines[0])
+        self.assertIn('import of handler module', lines[2])
+        self.assertIn('warm call average of 3', lines[4])
+
+        profile['warm_calls'] = []
+        profile['imports'] = make_node('', 1, [make_node('pandas', 1)])
+        lines = startup.format_profile(profile)
+        self.assertNotIn('warm call', '\n'.join(lines))
+        self.assertIn('pandas', lines[-1])
+
+        with self.assertRaises(Exception):
+            startup.profile_startup(
+                make_fixture_path('nodancers'), 'hi', 'yo'
+            )
+
+    def test_run_profile(self):
+        """Profile the basic fixture in a new process."""
+        profile = startup.run_profile(
+            make_fixture_path('basic'), 'hi', 'yo', warm_calls=2
+        )
+        self.assertEqual('hi', profile['dancer'])
+        self.assertEqual(2, len(profile['warm_calls']))
+
+    def test_main(self):
+        """Verify main writes the profile as JSON."""
+        temp_dir = mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        output = os.path.join(temp_dir, 'profile.json')
+        with patch('lambada.startup.profile_startup') as profile_startup:
+            profile_startup.return_value = dict(dancer='hi')
+            startup.main(['path', 'hi', 'yo', '2', output])
+            profile_startup.assert_called_with('path', 'hi', 'yo', 2)
+        with io.open(output, encoding='UTF-8') as stream:
+            self.assertEqual(dict(dancer='hi'), json.load(stream))